@@ -21,6 +21,9 @@ class Settings(BaseSettings):
     BOT_TOKEN: str = ""
     OWNER_ID: Optional[int] = None
     ADMINS: List[int] = Field(default_factory=list)
+    # Свой Bot API сервер (локальная заглушка app/scripts/fake_tg_api.py или telegram-bot-api);
+    # пусто — ходим в api.telegram.org
+    TELEGRAM_API_BASE: Optional[str] = None
 
     # === Storage / DB ===
     DATABASE_URL: Optional[str] = None
@@ -34,6 +37,12 @@ class Settings(BaseSettings):
 
     REDIS_DSN: Optional[str] = None  # web может не использовать redis
 
+    # FSM (app/core/fsm_storage.py): TTL ключей в Redis и in-process L1 кэш
+    FSM_STATE_TTL_S: int = 86400
+    FSM_DATA_TTL_S: int = 86400
+    FSM_L1_TTL_S: float = 2.0
+    FSM_L1_SIZE: int = 10_000
+
     # === Контент / приватные чаты ===
     CONTENT_CHANNEL_ID: Optional[int] = Field(
         default=None,
@@ -44,6 +53,13 @@ class Settings(BaseSettings):
     INVITE_TTL_HOURS: int = 168
     GRACE_HOURS: int = 24
 
+    # Индекс дедлайнов доступа в Redis (app/services/deadline_index.py); без REDIS_DSN — скан access_grants
+    ACCESS_DEADLINES_KEY: str = "access:deadlines"
+    DEADLINE_POLL_S: int = 5
+    DEADLINE_BATCH: int = 500
+    DEADLINE_RETRY_S: int = 60
+    DEADLINE_BACKSTOP_MIN: int = 60     # редкий скан access_grants поверх индекса (страховка)
+
     # === Подписка / триал ===
     TRIAL_ENABLED: bool = True
     TRIAL_MODE: str = Field("paid", description="paid | free | off")
@@ -54,6 +70,27 @@ class Settings(BaseSettings):
     AUTO_RENEW_PLAN: Optional[str] = None
     TRIAL_CONVERT_PLAN: Optional[str] = None  # legacy alias
 
+    # Кэш активной подписки по tg_id (app/services/entitlements.py)
+    ENTITLEMENT_TTL_S: float = 300.0
+    ENTITLEMENT_NEGATIVE_TTL_S: float = 5.0
+    ENTITLEMENT_CACHE_SIZE: int = 50_000
+
+    # === Кэш таблицы settings (app/services/settings_cache.py) ===
+    SETTINGS_NOTIFY_CHANNEL: str = "settings_changed"
+    # страховочная полная перезагрузка, сек; 0 — только NOTIFY
+    SETTINGS_RELOAD_S: float = 300.0
+
+    # === Медиа: file_id локальных файлов (app/services/media_registry.py) ===
+    # как часто stat() файла, чтобы заметить замену и перезалить
+    MEDIA_RECHECK_S: float = 60.0
+
+    # === Каталог бесплатных материалов (app/services/material_catalog.py) ===
+    MATERIALS_PAGE_SIZE: int = 10
+    # лимит текста сообщения Telegram — 4096; запас под заголовок и экранирование
+    MATERIALS_PAGE_MAX_CHARS: int = 3500
+    # изменения из других процессов подхватываются не позже чем через TTL; 0 — только invalidate()
+    MATERIALS_CACHE_TTL_S: float = 300.0
+
     # === Цены тарифов ===
     PLAN_PRICES_RUB: str = "m1:990,m3:2490,m12:8990"
 
@@ -65,6 +102,16 @@ class Settings(BaseSettings):
     # === Robokassa ===
     RK_RECURRING_ENABLED: bool = False
 
+    # === Автопродление (app/services/renewal_service.py), включается RK_RECURRING_ENABLED ===
+    RENEW_CLIENT: str = Field("rk", description="rk | stub")
+    RENEW_INTERVAL_MIN: int = 30
+    RENEW_WINDOW_HOURS: int = 24       # списываем за сутки до окончания
+    RENEW_BATCH_SIZE: int = 200
+    RENEW_CONCURRENCY: int = 20
+    RENEW_MAX_PER_RUN: int = 5000      # бюджет списаний на один прогон
+    RENEW_TIME_BUDGET_S: int = 600     # и по времени
+    RENEW_MAX_ATTEMPTS: int = 3        # попыток на один период подписки
+
     # === Веб-приложение / вебхуки ===
     PUBLIC_BASE_URL: str = "http://localhost:8080"
     WEBHOOK_URL: str = ""
@@ -73,10 +120,52 @@ class Settings(BaseSettings):
 
     # === Планировщик / напоминания ===
     SCHEDULER_TZ: str = "UTC"
+    # лидер среди реплик бота (pg advisory lock, app/scheduler/locks.py)
+    SCHEDULER_LEADER_ELECTION: bool = True
+    SCHEDULER_LEADER_CHECK_S: float = 15.0
     REMINDERS_HOURS_BEFORE: List[int] = Field(default_factory=lambda: [72, 24, 3])
+    # общий темп массовых отправок процесса: рассылки + напоминания + опросы (app/core/rate_limit.py).
+    # Лимит бота Telegram ~30 сообщений/с; оставляем запас для ответов на апдейты
+    TG_BULK_RATE_PER_S: float = 20.0
+    # опрос причин оттока: через столько часов после окончания непродлённой подписки; 0 — выключен
+    CHURN_SURVEY_AFTER_H: int = 2
+    # диспетчер напоминаний (app/services/reminder_service.py)
+    REMINDERS_INTERVAL_S: int = 60
+    REMINDERS_BATCH_SIZE: int = 500
+    REMINDERS_CONCURRENCY: int = 20
+    REMINDERS_MAX_BATCHES_PER_TICK: int = 20
+
+    # === Рассылки админа (app/services/broadcast_service.py) ===
+    BROADCAST_CONCURRENCY: int = 8
+    BROADCAST_CHUNK: int = 200          # получателей на транзакцию/чекпойнт
+    BROADCAST_POLL_S: int = 15          # подхват running-рассылок (в т.ч. после падения)
+
+    # === Реплика для чтения (app/core/replica.py); пусто — всё читается с primary ===
+    REPLICA_DATABASE_URL: str = ""
+    REPLICA_MAX_LAG_S: float = 5.0         # больше — читаем с primary
+    REPLICA_LAG_CHECK_S: float = 5.0
+    REPLICA_MAX_ERRORS: int = 3            # столько ошибок за окно -> cooldown
+    REPLICA_ERROR_WINDOW_S: float = 30.0
+    REPLICA_COOLDOWN_S: float = 60.0
+
+    # === Ретеншн: перенос старых строк в *_archive (app/services/retention_service.py) ===
+    # 0 — политика выключена
+    RETENTION_ACCESS_GRANTS_DAYS: int = 30     # после истечения доступа / ссылки
+    RETENTION_PAYMENTS_DAYS: int = 30          # брошенные pending / failed; paid не трогаем
+    RETENTION_CONSENT_LOGS_DAYS: int = 180     # согласия не удаляются, только уезжают в архив
+    RETENTION_BATCH_SIZE: int = 1000
+    RETENTION_MAX_BATCHES: int = 500           # на таблицу за прогон
+    RETENTION_PAUSE_MS: int = 50               # пауза между батчами: не душим WAL/реплику
+    RETENTION_HOUR_UTC: int = 4                # ежедневный прогон
+
+    # === Локальный spill батч-писателей, если БД недоступна (app/services/batch_writer.py) ===
+    SPOOL_DIR: str = "var/spool"
 
     # === Отладка SQL ===
     SQL_ECHO: bool = False
+    # учёт запросов на апдейт/HTTP-запрос (app/core/db_stats.py); 0 — выключено
+    DB_SLOW_QUERY_MS: int = 200
+    DB_N_PLUS_ONE_THRESHOLD: int = 5   # один и тот же запрос столько раз за операцию
 
     # === Логи ===
     log_level: str = Field(default="INFO", alias="LOG_LEVEL")
@@ -90,6 +179,10 @@ class Settings(BaseSettings):
         default=None,
         description="Куда слать паспорта на модерацию; если не задано — возьмем OWNER_ID или первого из ADMINS",
     )
+    # TTL состояния верификации/согласия в Redis (app/services/age_verify_store.py)
+    AGE_VERIFIED_TTL_DAYS: int = 365
+    AGE_PENDING_TTL_HOURS: int = 72
+    CONSENT_TTL_MINUTES: int = 60
 
     # Дополнительные ссылки (используются в хендлерах)
     OFFERTA_URL: str = "https://example.com/offer"
@@ -2,19 +2,21 @@
 from __future__ import annotations
 
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.redis import RedisStorage
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
+from app.core.fsm_storage import CachedRedisStorage
 from app.db import SessionLocal, engine  # реэкспорт для main.py
 from app.models.base import Base
 
 from app.repositories.subscription_repo import SubscriptionRepo
 from app.repositories.payment_repo import PaymentRepo
 from app.repositories.user_repo import UserRepo
+from app.repositories.material_repo import MaterialRepo
 
 from app.services.subscription_service import SubscriptionService
 from app.services.payment_service import PaymentService
+from app.services.material_service import MaterialService
 
 
 async def init_db() -> None:
@@ -30,7 +32,13 @@ async def build_dp(bot: Bot) -> Dispatcher:
     """
     Собираем Dispatcher для aiogram 3.x.
     """
-    storage = RedisStorage.from_url(settings.REDIS_DSN)
+    storage = CachedRedisStorage.from_url(
+        settings.REDIS_DSN,
+        state_ttl=settings.FSM_STATE_TTL_S or None,
+        data_ttl=settings.FSM_DATA_TTL_S or None,
+        l1_ttl=settings.FSM_L1_TTL_S,
+        l1_size=settings.FSM_L1_SIZE,
+    )
     dp = Dispatcher(storage=storage)
     return dp
 
@@ -43,17 +51,21 @@ async def build_services(bot: Bot, session: AsyncSession):
     subs_repo = SubscriptionRepo(session)
     pay_repo = PaymentRepo(session)
     users_repo = UserRepo(session)
+    materials_repo = MaterialRepo(session)
 
     # services
     subs_svc = SubscriptionService(subs_repo)
     pay_svc = PaymentService(session)  # внутри сам подтянет repo-классы
+    materials_svc = MaterialService(materials_repo)
 
     return {
         "subscriptions": subs_svc,
         "payments": pay_svc,
+        "materials": materials_svc,
         "repos": {
             "subscriptions": subs_repo,
             "payments": pay_repo,
             "users": users_repo,
+            "materials": materials_repo,
         },
     }
@@ -0,0 +1,131 @@
+# app/core/db_stats.py
+from __future__ import annotations
+
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import settings
+
+logger = logging.getLogger("app.db.stats")
+
+_T0 = "_db_stats_t0"
+
+
+class DbStats:
+    """Счётчики БД на одну операцию (апдейт бота / HTTP-запрос / джоба)."""
+
+    __slots__ = ("label", "statements", "commits", "rollbacks", "rows", "db_ms", "by_sql", "started")
+
+    def __init__(self, label: str = "-") -> None:
+        self.label = label
+        self.statements = 0
+        self.commits = 0
+        self.rollbacks = 0
+        self.rows = 0
+        self.db_ms = 0.0
+        # текст запроса (с плейсхолдерами) -> сколько раз выполнен: детектор N+1
+        self.by_sql: Counter = Counter()
+        self.started = time.perf_counter()
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        return [(sql, n) for sql, n in self.by_sql.most_common() if n >= threshold]
+
+    def as_log_extra(self) -> Dict[str, Any]:
+        top = self.by_sql.most_common(1)
+        return {
+            "db_statements": self.statements,
+            "db_commits": self.commits,
+            "db_rows": self.rows,
+            "db_ms": round(self.db_ms, 1),
+            "db_max_repeat": top[0][1] if top else 0,
+        }
+
+
+_current: ContextVar[Optional[DbStats]] = ContextVar("db_stats", default=None)
+
+
+def current() -> Optional[DbStats]:
+    return _current.get()
+
+
+def _short(sql: str, limit: int = 300) -> str:
+    sql = " ".join(sql.split())
+    return sql if len(sql) <= limit else sql[:limit] + "…"
+
+
+@contextmanager
+def track(label: str = "-") -> Iterator[DbStats]:
+    """
+    Считать запросы/строки/время всего, что выполнится внутри блока (в этой
+    asyncio-задаче и порождённых ей). На выходе — предупреждение о N+1: один и
+    тот же запрос DB_N_PLUS_ONE_THRESHOLD+ раз за операцию.
+    """
+    stats = DbStats(label)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+        threshold = settings.DB_N_PLUS_ONE_THRESHOLD
+        if threshold > 0:
+            for sql, n in stats.repeated(threshold):
+                logger.warning("n+1 suspect in %s: %dx %s", label, n, _short(sql))
+
+
+def _on_before_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if context is not None:
+        setattr(context, _T0, time.perf_counter())
+    stats = _current.get()
+    if stats is None:
+        return
+    # executemany/insertmanyvalues — одна запись на батч, т.е. на round trip
+    stats.statements += 1
+    style = getattr(getattr(context, "execute_style", None), "name", "")
+    if not executemany and style != "INSERTMANYVALUES":
+        # батчи одного multi-row INSERT — не N+1
+        stats.by_sql[statement] += 1
+
+
+def _on_after_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    t0 = getattr(context, _T0, None) if context is not None else None
+    elapsed_ms = (time.perf_counter() - t0) * 1000 if t0 is not None else 0.0
+    rows = getattr(cursor, "rowcount", -1) or 0
+    stats = _current.get()
+    if stats is not None:
+        stats.db_ms += elapsed_ms
+        if rows > 0:
+            stats.rows += rows
+    if settings.DB_SLOW_QUERY_MS and elapsed_ms >= settings.DB_SLOW_QUERY_MS:
+        logger.warning(
+            "slow query %.0fms rows=%s in %s: %s",
+            elapsed_ms, rows, stats.label if stats is not None else "-", _short(statement),
+        )
+
+
+def _on_commit(conn) -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.commits += 1
+
+
+def _on_rollback(conn) -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.rollbacks += 1
+
+
+def install(engine: AsyncEngine) -> None:
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", _on_before_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _on_before_execute)
+    event.listen(sync_engine, "after_cursor_execute", _on_after_execute)
+    event.listen(sync_engine, "commit", _on_commit)
+    event.listen(sync_engine, "rollback", _on_rollback)
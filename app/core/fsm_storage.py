@@ -0,0 +1,114 @@
+# app/core/fsm_storage.py
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Dict, Optional, cast
+
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import StateType, StorageKey
+from aiogram.fsm.storage.redis import RedisStorage
+
+
+class _Entry:
+    __slots__ = ("state", "data", "expires")
+
+    def __init__(self, state: Optional[str], data: Dict[str, Any], expires: float) -> None:
+        self.state = state
+        self.data = data
+        self.expires = expires
+
+
+class CachedRedisStorage(RedisStorage):
+    """
+    Двухуровневое FSM-хранилище: L1 — маленький LRU в памяти процесса, L2 — Redis.
+
+    - state и data читаются из Redis одним pipeline (2 GET за один round trip)
+      и кладутся в L1 вместе, поэтому get_state + get_data/update_data
+      в одном апдейте стоят максимум один запрос;
+    - пустое состояние тоже кэшируется: фильтр AgeCheck.waiting_photo на сообщениях,
+      пришедших в пределах l1_ttl от предыдущего, не ходит в Redis (при паузах
+      дольше l1_ttl каждый апдейт — промах, см. benchmarks/fsm_redis_calls.py);
+    - запись идёт write-through, L1 обновляется сразу;
+    - state_ttl/data_ttl — TTL ключей в Redis, брошенные состояния протухают сами.
+
+    l1_ttl держим коротким (секунды): при нескольких процессах бота апдейты одного
+    пользователя могут попасть в разные процессы, и L1 другого процесса увидит
+    изменение не позже чем через l1_ttl.
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        l1_size: int = 10_000,
+        l1_ttl: float = 2.0,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.l1_size = l1_size
+        self.l1_ttl = l1_ttl
+        self._l1: OrderedDict[StorageKey, _Entry] = OrderedDict()
+
+    # ---------- L1 ----------
+
+    def _l1_get(self, key: StorageKey) -> Optional[_Entry]:
+        entry = self._l1.get(key)
+        if entry is None:
+            return None
+        if entry.expires < time.monotonic():
+            del self._l1[key]
+            return None
+        self._l1.move_to_end(key)
+        return entry
+
+    def _l1_put(self, key: StorageKey, state: Optional[str], data: Dict[str, Any]) -> None:
+        self._l1[key] = _Entry(state, data, time.monotonic() + self.l1_ttl)
+        self._l1.move_to_end(key)
+        while len(self._l1) > self.l1_size:
+            self._l1.popitem(last=False)
+
+    async def _load(self, key: StorageKey) -> _Entry:
+        entry = self._l1_get(key)
+        if entry is not None:
+            return entry
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.get(self.key_builder.build(key, "state"))
+            pipe.get(self.key_builder.build(key, "data"))
+            raw_state, raw_data = await pipe.execute()
+        if isinstance(raw_state, bytes):
+            raw_state = raw_state.decode("utf-8")
+        if isinstance(raw_data, bytes):
+            raw_data = raw_data.decode("utf-8")
+        data = cast(Dict[str, Any], self.json_loads(raw_data)) if raw_data else {}
+        self._l1_put(key, raw_state, data)
+        return self._l1[key]
+
+    # ---------- BaseStorage ----------
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._load(key)).state
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return dict((await self._load(key)).data)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        value = cast(Optional[str], state.state if isinstance(state, State) else state)
+        await super().set_state(key, state)
+        cached = self._l1_get(key)
+        if cached is not None:
+            cached.state = value
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, dict):
+            msg = f"Data must be a dict or dict-like object, got {type(data).__name__}"
+            raise DataNotDictLikeError(msg)
+        await super().set_data(key, data)
+        cached = self._l1_get(key)
+        if cached is not None:
+            cached.data = dict(data)
+
+    async def close(self) -> None:
+        self._l1.clear()
+        await super().close()
@@ -13,12 +13,15 @@ def setup_logging() -> None:
         fmt = (
             '{"ts":"%(asctime)s","lvl":"%(levelname)s","name":"%(name)s",'
             '"msg":"%(message)s","update_id":"%(update_id)s",'
-            '"user_id":"%(user_id)s","invoice_id":"%(invoice_id)s"}'
+            '"user_id":"%(user_id)s","invoice_id":"%(invoice_id)s",'
+            '"db_statements":"%(db_statements)s","db_commits":"%(db_commits)s",'
+            '"db_rows":"%(db_rows)s","db_ms":"%(db_ms)s"}'
         )
     else:
         fmt = (
             "%(asctime)s | %(levelname)5s | %(name)s | %(message)s "
-            "| upd=%(update_id)s user=%(user_id)s inv=%(invoice_id)s"
+            "| upd=%(update_id)s user=%(user_id)s inv=%(invoice_id)s "
+            "db=%(db_statements)s/%(db_commits)s rows=%(db_rows)s db_ms=%(db_ms)s"
         )
 
     dictConfig({
@@ -51,7 +54,7 @@ def setup_logging() -> None:
 class CtxFilter(logging.Filter):
     """Добавляет безопасные поля, чтобы форматтер не падал, когда нет extra."""
     def filter(self, record: logging.LogRecord) -> bool:
-        for k in ("update_id", "user_id", "invoice_id"):
+        for k in ("update_id", "user_id", "invoice_id", "db_statements", "db_commits", "db_rows", "db_ms"):
             if not hasattr(record, k):
                 setattr(record, k, "-")
         return True
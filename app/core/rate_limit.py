@@ -0,0 +1,38 @@
+# app/core/rate_limit.py
+from __future__ import annotations
+
+import asyncio
+
+from app.config import settings
+
+
+class RateLimiter:
+    """
+    Темп отправки на процесс: не чаще rate сообщений в секунду, равномерно.
+    pause() — Telegram ответил RetryAfter: все отправители ждут, а не долбят дальше.
+    """
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._paused_until = 0.0
+
+    async def wait(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            start = max(now, self._next, self._paused_until)
+            if start <= now:
+                self._next = now + self.interval
+                return
+            # слот не резервируем заранее: pause() во время сна должна остановить всех
+            await asyncio.sleep(start - now)
+
+    def pause(self, seconds: float) -> None:
+        until = asyncio.get_running_loop().time() + seconds
+        self._paused_until = max(self._paused_until, until)
+
+
+# лимит Telegram — на бота, а не на рассылку: все массовые отправки процесса
+# (рассылки, напоминания, опросы оттока) делят один темп
+bulk_send_limiter = RateLimiter(settings.TG_BULK_RATE_PER_S)
@@ -0,0 +1,186 @@
+# app/core/replica.py
+from __future__ import annotations
+
+import asyncio
+import copy
+import functools
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Optional, TypeVar
+
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core import db_stats
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+_WROTE = "wrote"
+
+# лаг реплики; если всё проиграно (receive == replay), лаг 0 даже на простаивающем primary
+_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+_REPLICA_ERRORS = (OperationalError, InterfaceError, DBAPIError, OSError, asyncio.TimeoutError)
+
+
+# ---------- read-your-writes: сессия, которая писала, читает только с primary ----------
+
+@event.listens_for(Session, "after_flush")
+def _mark_flush(session: Session, flush_context) -> None:
+    session.info[_WROTE] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_dml(state) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info[_WROTE] = True
+
+
+def session_wrote(session: AsyncSession) -> bool:
+    """Флаг держится до закрытия сессии: после commit реплика всё ещё может отставать."""
+    return bool(session.info.get(_WROTE))
+
+
+class ReplicaRouter:
+    """
+    Маршрутизация read-only методов репозиториев на реплику.
+
+    Реплика используется, только если:
+      - задан REPLICA_DATABASE_URL;
+      - вызывающая сессия ещё ничего не писала (read-your-writes в UnitOfWork);
+      - лаг (проверяется лениво, раз в REPLICA_LAG_CHECK_S) <= REPLICA_MAX_LAG_S;
+      - реплика не в cooldown: REPLICA_MAX_ERRORS ошибок за REPLICA_ERROR_WINDOW_S
+        выключают её на REPLICA_COOLDOWN_S.
+    Иначе — primary, как без реплики.
+    """
+
+    def __init__(
+        self,
+        engine: Optional[AsyncEngine],
+        *,
+        max_lag_s: float,
+        lag_check_s: float,
+        max_errors: int,
+        error_window_s: float,
+        cooldown_s: float,
+    ) -> None:
+        self.engine = engine
+        self.sessions = async_sessionmaker(bind=engine, expire_on_commit=False) if engine is not None else None
+        self.max_lag_s = max_lag_s
+        self.lag_check_s = lag_check_s
+        self.max_errors = max_errors
+        self.error_window_s = error_window_s
+        self.cooldown_s = cooldown_s
+
+        self.lag_s: Optional[float] = None
+        self._checked_at = 0.0
+        self._down_until = 0.0
+        self._errors: Deque[float] = deque()
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "ReplicaRouter":
+        engine = None
+        if settings.REPLICA_DATABASE_URL:
+            engine = create_async_engine(settings.REPLICA_DATABASE_URL, echo=False, pool_pre_ping=True)
+            db_stats.install(engine)
+        return cls(
+            engine,
+            max_lag_s=settings.REPLICA_MAX_LAG_S,
+            lag_check_s=settings.REPLICA_LAG_CHECK_S,
+            max_errors=settings.REPLICA_MAX_ERRORS,
+            error_window_s=settings.REPLICA_ERROR_WINDOW_S,
+            cooldown_s=settings.REPLICA_COOLDOWN_S,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.engine is not None
+
+    async def close(self) -> None:
+        if self.engine is not None:
+            await self.engine.dispose()
+
+    # ---------- здоровье ----------
+
+    def record_error(self, exc: BaseException) -> None:
+        now = time.monotonic()
+        self._errors.append(now)
+        while self._errors and now - self._errors[0] > self.error_window_s:
+            self._errors.popleft()
+        if len(self._errors) >= self.max_errors and now >= self._down_until:
+            self._down_until = now + self.cooldown_s
+            self._errors.clear()
+            logger.warning("replica: %d errors, primary only for %.0fs (last: %r)",
+                           self.max_errors, self.cooldown_s, exc)
+
+    async def _refresh_lag(self) -> None:
+        async with self._lock:
+            if time.monotonic() - self._checked_at < self.lag_check_s:
+                return
+            try:
+                async with self.engine.connect() as conn:
+                    self.lag_s = float((await conn.execute(_LAG_SQL)).scalar() or 0.0)
+            except _REPLICA_ERRORS as e:
+                self.lag_s = None
+                self.record_error(e)
+            self._checked_at = time.monotonic()
+            if self.lag_s is not None and self.lag_s > self.max_lag_s:
+                logger.warning("replica: lag %.1fs > %.1fs, reads go to primary", self.lag_s, self.max_lag_s)
+
+    async def usable(self) -> bool:
+        if self.engine is None or time.monotonic() < self._down_until:
+            return False
+        if time.monotonic() - self._checked_at >= self.lag_check_s:
+            await self._refresh_lag()
+        return self.lag_s is not None and self.lag_s <= self.max_lag_s and time.monotonic() >= self._down_until
+
+
+replica = ReplicaRouter.from_settings()
+
+
+def read_only(fn: F = None, *, fallback_on_none: bool = False):
+    """
+    Маркер read-only метода репозитория/сервиса (сессия в self.s).
+
+    Метод выполняется на копии объекта с отдельной сессией реплики — транзакция
+    вызывающего не трогается, и ошибка реплики не ломает его unit of work.
+    Ошибка реплики -> повтор на primary. fallback_on_none=True — пустой результат
+    перепроверяется на primary (строка могла ещё не доехать, например свежий счёт).
+
+    Результат — отсоединённые объекты: read_only только для методов, чей результат
+    не меняют и не сохраняют обратно.
+    """
+
+    def decorate(method: F) -> F:
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            session = getattr(self, "s", None)
+            if session is None or session_wrote(session) or not await replica.usable():
+                return await method(self, *args, **kwargs)
+            try:
+                async with replica.sessions() as rs:
+                    clone = copy.copy(self)
+                    clone.s = rs
+                    result = await method(clone, *args, **kwargs)
+            except _REPLICA_ERRORS as e:
+                replica.record_error(e)
+                logger.warning("replica: %s failed (%r), retry on primary", method.__qualname__, e)
+                return await method(self, *args, **kwargs)
+            if fallback_on_none and result is None:
+                return await method(self, *args, **kwargs)
+            return result
+
+        wrapper.__read_only__ = True  # type: ignore[attr-defined]
+        return wrapper  # type: ignore[return-value]
+
+    return decorate(fn) if fn is not None else decorate
@@ -0,0 +1,68 @@
+# app/core/tg_session.py
+from __future__ import annotations
+
+import json
+from typing import Any, Dict
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.methods.base import TelegramMethod
+from aiogram.types import InlineKeyboardMarkup, InputFile
+from aiohttp import FormData
+from pydantic import ConfigDict, PrivateAttr
+
+
+def _drop_none(value: Any) -> Any:
+    # то же, что BaseSession.prepare_value делает с None внутри dict/list
+    if isinstance(value, dict):
+        return {k: _drop_none(v) for k, v in value.items() if v is not None}
+    if isinstance(value, list):
+        return [_drop_none(v) for v in value if v is not None]
+    return value
+
+
+class PreparedMarkup(InlineKeyboardMarkup):
+    """
+    Неизменяемая инлайн-клавиатура с готовым JSON для Bot API.
+
+    Собирается один раз (app/services/screen_cache.py); PreparedAiohttpSession
+    кладёт self.json в запрос как есть — без model_dump и json.dumps на каждую
+    отправку.
+    """
+
+    model_config = ConfigDict(frozen=True)
+    _json: str = PrivateAttr(default="")
+
+    @classmethod
+    def freeze(cls, markup: InlineKeyboardMarkup) -> "PreparedMarkup":
+        if isinstance(markup, cls):
+            return markup
+        frozen = cls(inline_keyboard=markup.inline_keyboard)
+        # json.dumps — как json_dumps сессии по умолчанию: запрос байт в байт тот же
+        frozen._json = json.dumps(_drop_none(markup.model_dump(warnings=False)))
+        return frozen
+
+    @property
+    def json(self) -> str:  # type: ignore[override]
+        return self._json
+
+
+class PreparedAiohttpSession(AiohttpSession):
+    """AiohttpSession, который не сериализует PreparedMarkup заново."""
+
+    def build_form_data(self, bot: Bot, method: TelegramMethod[Any]) -> FormData:
+        markup = getattr(method, "reply_markup", None)
+        if not isinstance(markup, PreparedMarkup) or not markup.json:
+            return super().build_form_data(bot=bot, method=method)
+
+        form = FormData(quote_fields=False)
+        files: Dict[str, InputFile] = {}
+        for key, value in method.model_dump(warnings=False, exclude={"reply_markup"}).items():
+            value = self.prepare_value(value, bot=bot, files=files)
+            if not value:
+                continue
+            form.add_field(key, value)
+        form.add_field("reply_markup", markup.json)
+        for key, value in files.items():
+            form.add_field(key, value.read(bot), filename=value.filename or key)
+        return form
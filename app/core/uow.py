@@ -0,0 +1,62 @@
+# app/core/uow.py
+from __future__ import annotations
+
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import SessionLocal
+
+_UOW_FLAG = "uow"
+
+
+def in_uow(session: AsyncSession) -> bool:
+    return bool(session.info.get(_UOW_FLAG))
+
+
+async def commit_unless_uow(session: AsyncSession) -> None:
+    """
+    Конец бизнес-операции в сервисе: если транзакцией владеет UnitOfWork —
+    только flush (commit сделает он, один раз на апдейт/запрос), иначе commit.
+    """
+    if in_uow(session):
+        await session.flush()
+    else:
+        await session.commit()
+
+
+class UnitOfWork:
+    """
+    Одна транзакция на апдейт бота / HTTP-запрос.
+
+    Репозитории только flush-ат, сервисы зовут commit_unless_uow(); сам commit —
+    на выходе из блока (rollback при исключении). commit() посреди блока — для
+    случаев, когда дальше уходит внешний эффект, ссылающийся на запись
+    (ссылка на оплату, инвайт), и строка должна быть видна до него.
+
+        async with UnitOfWork() as session:
+            await PaymentService(session).confirm_payment(inv)
+    """
+
+    def __init__(self, session_factory=SessionLocal) -> None:
+        self.session_factory = session_factory
+        self.session: Optional[AsyncSession] = None
+
+    async def __aenter__(self) -> AsyncSession:
+        self.session = self.session_factory()
+        self.session.info[_UOW_FLAG] = True
+        return self.session
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        session, self.session = self.session, None
+        try:
+            if exc_type is None:
+                await session.commit()
+            else:
+                await session.rollback()
+        finally:
+            await session.close()
+
+    async def commit(self) -> None:
+        if self.session is not None:
+            await self.session.commit()
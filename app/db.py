@@ -5,6 +5,7 @@ from typing import AsyncGenerator
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from app.config import settings
+from app.core import db_stats
 
 
 # === 1. Общая база для всех моделей ===
@@ -21,6 +22,8 @@ engine = create_async_engine(
     pool_pre_ping=True,
     future=True,
 )
+# счётчики запросов/commit-ов на апдейт/запрос (app/core/db_stats.py)
+db_stats.install(engine)
 
 
 # === 3. Сессия ===
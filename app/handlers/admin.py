@@ -1,26 +1,41 @@
-from aiogram import Router, F
+from aiogram import Bot, Router, F
+from aiogram.filters import Command, CommandObject
 from aiogram.types import Message
 from app.config import settings
+from app.repositories.broadcast_repo import AUDIENCES
+from app.services.admin_service import AdminService
+from app.services.broadcast_service import broadcaster
 
 router = Router()
 
+def _is_admin(uid: int) -> bool:
+    return uid == settings.OWNER_ID or uid in set(map(int, settings.ADMINS))
+
+def _fake_provider(_) -> bool:
+    # /fake_paid подтверждает оплату без денег — только с фейковым провайдером
+    return settings.PAYMENT_PROVIDER == "fake"
+
+def _parse_id(command: CommandObject) -> int | None:
+    try:
+        return int((command.args or "").strip())
+    except ValueError:
+        return None
+
 @router.message(F.text == "/admin")
 async def admin_root(m: Message):
-    if m.from_user.id != settings.OWNER_ID:
+    if not _is_admin(m.from_user.id):
         await m.answer("Нет доступа.")
         return
     await m.answer("Админ-панель: скоро тут будет управление.")
 
-@router.message(F.text.startswith("/fake_paid"))
+@router.message(F.text.startswith("/fake_paid"), _fake_provider)
 async def fake_paid_cmd(m: Message, payments):
     """
     /fake_paid <provider_invoice_id>
     Подтверждаем фейковую оплату и активируем/продлеваем подписку.
-    Доступно только админам.
+    Доступно только админам и только при PAYMENT_PROVIDER=fake.
     """
-    # защита по админам
-    admins = set(map(int, settings.ADMINS))
-    if m.from_user.id not in admins:
+    if not _is_admin(m.from_user.id):
         return await m.reply("Недостаточно прав.")
 
     parts = m.text.strip().split(maxsplit=1)
@@ -36,4 +51,74 @@ async def fake_paid_cmd(m: Message, payments):
             f"Действует до: <b>{sub.expires_at:%Y-%m-%d %H:%M:%S %Z}</b>"
         )
     except Exception as e:
-        return await m.reply(f"Не удалось подтвердить: {e}")
\ No newline at end of file
+        return await m.reply(f"Не удалось подтвердить: {e}")
+
+# ---------- рассылки ----------
+
+@router.message(Command("broadcast"))
+async def broadcast_create(m: Message, session):
+    """
+    /broadcast <сегмент> <текст>
+    Создаёт черновик и показывает размер аудитории; отправка — /broadcast_start <id>.
+    Текст берётся с форматированием (HTML), как его набрал админ.
+    """
+    if not _is_admin(m.from_user.id):
+        return await m.reply("Недостаточно прав.")
+    # html_text: жирный/ссылки из сообщения админа доедут до получателей
+    parts = (m.html_text or "").split(maxsplit=2)
+    if len(parts) < 3 or parts[1] not in AUDIENCES:
+        return await m.reply(
+            "Формат: /broadcast &lt;сегмент&gt; &lt;текст&gt;\n"
+            f"Сегменты: {', '.join(AUDIENCES)}"
+        )
+    b, size = await AdminService(session).create_broadcast(parts[2], parts[1], m.from_user.id)
+    return await m.reply(
+        f"Рассылка <b>#{b.id}</b> создана (сегмент <b>{b.audience}</b>, сейчас получателей: <b>{size}</b>).\n"
+        f"Запуск: /broadcast_start {b.id}"
+    )
+
+@router.message(Command("broadcast_start"))
+async def broadcast_start(m: Message, command: CommandObject, session, uow, bot: Bot):
+    if not _is_admin(m.from_user.id):
+        return await m.reply("Недостаточно прав.")
+    bid = _parse_id(command)
+    if bid is None:
+        return await m.reply("Формат: /broadcast_start &lt;id&gt;")
+    if not await AdminService(session).start_broadcast(bid):
+        return await m.reply(f"Рассылку #{bid} нельзя запустить (нет такой или уже идёт/завершена).")
+    # статус running должен быть виден задаче до её старта
+    await uow.commit()
+    broadcaster.kick(bot, bid)
+    return await m.reply(f"Рассылка #{bid} запущена. Прогресс: /broadcast_status {bid}")
+
+@router.message(Command("broadcast_pause"))
+async def broadcast_pause(m: Message, command: CommandObject, session):
+    if not _is_admin(m.from_user.id):
+        return await m.reply("Недостаточно прав.")
+    bid = _parse_id(command)
+    if bid is None or not await AdminService(session).pause_broadcast(bid):
+        return await m.reply("Нечего ставить на паузу.")
+    return await m.reply(f"Рассылка #{bid} на паузе (текущий чанк дойдёт). Продолжить: /broadcast_start {bid}")
+
+@router.message(Command("broadcast_cancel"))
+async def broadcast_cancel(m: Message, command: CommandObject, session):
+    if not _is_admin(m.from_user.id):
+        return await m.reply("Недостаточно прав.")
+    bid = _parse_id(command)
+    if bid is None or not await AdminService(session).cancel_broadcast(bid):
+        return await m.reply("Нечего отменять.")
+    return await m.reply(f"Рассылка #{bid} отменена.")
+
+@router.message(Command("broadcast_status"))
+async def broadcast_status(m: Message, command: CommandObject, session):
+    if not _is_admin(m.from_user.id):
+        return await m.reply("Недостаточно прав.")
+    bid = _parse_id(command)
+    b, stats = await AdminService(session).broadcast_report(bid) if bid is not None else (None, {})
+    if b is None:
+        return await m.reply("Рассылка не найдена.")
+    return await m.reply(
+        f"Рассылка <b>#{b.id}</b> ({b.audience}): <b>{b.status}</b>\n"
+        f"Отправлено: {b.sent}, заблокировали бота: {b.blocked}, ошибок: {b.failed}, "
+        f"в процессе: {stats.get('pending', 0)}, неизвестно: {stats.get('unknown', 0)}"
+    )
@@ -2,7 +2,8 @@ from __future__ import annotations
 
 import logging
 import secrets
-from typing import Optional, Dict
+from datetime import datetime, timezone
+from typing import Optional
 
 from aiogram import Router, F
 from aiogram.types import (
@@ -12,13 +13,15 @@ from aiogram.types import (
 from aiogram.fsm.state import StatesGroup, State
 from aiogram.fsm.context import FSMContext
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text as sql_text
 
 from app.config import settings
-from app.db import get_session
+from app.core.uow import UnitOfWork
 from app.services.payment_service import PaymentService
+from app.services.age_verify_store import age_store
+from app.services.writers import consent_writer
 from app.pay.robokassa import build_payment_link
-from app.handlers.pay import PRICE_RUB, pay_kb  # reuse цен и кнопок
+from app.services.screen_cache import Screen, cached_screen
+from app.handlers.pay import price_for_plan, pay_kb  # reuse цен и кнопок
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -34,28 +37,23 @@ def _admin_chat_id() -> Optional[int]:
 
 SUPPORT_URL: str = getattr(settings, "SUPPORT_URL", "https://t.me/your_support_here")
 
-# in-memory для MVP (на проде лучше хранить в БД)
-VERIFIED_USERS: set[int] = set()
-PENDING: Dict[str, Dict] = {}  # token -> {"user_id": int, "file_id": str}
-
 BASE_TO_U18 = {"m1": "m1_u18", "m3": "m3_u18", "m6": "m6_u18"}
 
-PRICE_RUB_U18: Dict[str, int] = {
-    "m1_u18": int(round(PRICE_RUB["m1"] * 0.75)),
-    "m3_u18": int(round(PRICE_RUB["m3"] * 0.75)),
-    "m6_u18": int(round(PRICE_RUB["m6"] * 0.75)),
-}
-LABEL_U18: Dict[str, str] = {
-    "m1_u18": f"1 месяц −25% — {PRICE_RUB_U18['m1_u18']} ₽",
-    "m3_u18": f"3 месяца −25% — {PRICE_RUB_U18['m3_u18']} ₽",
-    "m6_u18": f"6 месяцев −25% — {PRICE_RUB_U18['m6_u18']} ₽",
-}
-
-POLICY_HTML = (
-    "\n\nНажимая «Оплатить», ты подтверждаешь согласие с "
-    f"<a href='{getattr(settings,'PRIVACY_URL','https://example.com/privacy')}'>Политикой конфиденциальности</a> "
-    f"и <a href='{getattr(settings,'OFFERTA_URL','https://example.com/offer')}'>Публичной офертой</a>."
-)
+# цены и ссылки читаются при сборке экрана: экраны кэшируются и пересобираются
+# при смене каталога планов (app/services/screen_cache.py)
+def price_u18(plan_code: str) -> int:
+    return int(round(price_for_plan(plan_code.replace("_u18", "")) * 0.75))
+
+def _label_u18(plan_code: str) -> str:
+    period = {"m1_u18": "1 месяц", "m3_u18": "3 месяца", "m6_u18": "6 месяцев"}[plan_code]
+    return f"{period} −25% — {price_u18(plan_code)} ₽"
+
+def _policy_html() -> str:
+    return (
+        "\n\nНажимая «Оплатить», ты подтверждаешь согласие с "
+        f"<a href='{getattr(settings,'PRIVACY_URL','https://example.com/privacy')}'>Политикой конфиденциальности</a> "
+        f"и <a href='{getattr(settings,'OFFERTA_URL','https://example.com/offer')}'>Публичной офертой</a>."
+    )
 
 CONSENT_TEXT = (
     "✅ Я даю согласие на регулярные списания, на обработку персональных данных "
@@ -83,9 +81,9 @@ def kb_admin_decision(token: str) -> InlineKeyboardMarkup:
 
 def kb_u18_discount_plans() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text=LABEL_U18["m1_u18"], callback_data="u18:tariff:m1_u18")],
-        [InlineKeyboardButton(text=LABEL_U18["m3_u18"], callback_data="u18:tariff:m3_u18")],
-        [InlineKeyboardButton(text=LABEL_U18["m6_u18"], callback_data="u18:tariff:m6_u18")],
+        [InlineKeyboardButton(text=_label_u18("m1_u18"), callback_data="u18:tariff:m1_u18")],
+        [InlineKeyboardButton(text=_label_u18("m3_u18"), callback_data="u18:tariff:m3_u18")],
+        [InlineKeyboardButton(text=_label_u18("m6_u18"), callback_data="u18:tariff:m6_u18")],
         [InlineKeyboardButton(text="← Назад к тарифам", callback_data="open_tariffs")],
     ])
 
@@ -111,35 +109,19 @@ def card_text_u18(plan_code: str) -> str:
         "m3_u18": "🎟 <b>Подписка на 3 месяца</b> — скидка 25%",
         "m6_u18": "🎟 <b>Подписка на 6 месяцев</b> — скидка 25%",
     }[plan_code]
-    price = PRICE_RUB_U18[plan_code]
-    return f"{title}\nЦена: {price} ₽{POLICY_HTML}"
+    price = price_u18(plan_code)
+    return f"{title}\nЦена: {price} ₽{_policy_html()}"
 
 def plan_period_days(plan_code: str) -> int:
     base = plan_code.replace("_u18", "")
     return {"m1": 30, "m3": 90, "m6": 180}[base]
 
 def plan_amount(plan_code: str) -> int:
-    return PRICE_RUB_U18[plan_code] if plan_code.endswith("_u18") else PRICE_RUB[plan_code]
-
-async def save_consent(session: AsyncSession, *, user_id: int, plan: str, price_rub: int, period_days: int) -> None:
-    # без миграций: создаём таблицу, если её нет
-    await session.execute(sql_text("""
-    CREATE TABLE IF NOT EXISTS consent_logs (
-        id BIGSERIAL PRIMARY KEY,
-        user_id BIGINT NOT NULL,
-        plan VARCHAR(32) NOT NULL,
-        price_rub INTEGER NOT NULL,
-        period_days INTEGER NOT NULL,
-        consent_text TEXT NOT NULL,
-        offer_url VARCHAR(255) NOT NULL,
-        privacy_url VARCHAR(255) NOT NULL,
-        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-    );
-    """))
-    await session.execute(sql_text("""
-        INSERT INTO consent_logs (user_id, plan, price_rub, period_days, consent_text, offer_url, privacy_url)
-        VALUES (:user_id, :plan, :price_rub, :period_days, :consent_text, :offer_url, :privacy_url)
-    """), {
+    return price_u18(plan_code) if plan_code.endswith("_u18") else price_for_plan(plan_code)
+
+def save_consent(*, user_id: int, plan: str, price_rub: int, period_days: int) -> None:
+    # таблица создаётся миграцией; запись уходит в фоновый батч, клик не ждёт commit
+    consent_writer.submit({
         "user_id": user_id,
         "plan": plan,
         "price_rub": price_rub,
@@ -147,23 +129,57 @@ async def save_consent(session: AsyncSession, *, user_id: int, plan: str, price_
         "consent_text": CONSENT_TEXT,
         "offer_url": getattr(settings, "OFFERTA_URL", "https://example.com/offer"),
         "privacy_url": getattr(settings, "PRIVACY_URL", "https://example.com/privacy"),
+        "created_at": datetime.now(timezone.utc),
     })
-    await session.commit()
 
-# ---------- U18 ENTRY ----------
-@router.callback_query(F.data == "u18_start")
-async def u18_start(call: CallbackQuery, state: FSMContext):
-    text = (
+# ---------- готовые экраны (app/services/screen_cache.py) ----------
+@cached_screen
+def u18_intro_screen() -> Screen:
+    return Screen(
         "Нужна верификация возраста.\n\n"
         "Пришли <b>фото паспорта</b> (можно закрыть серию и номер). "
         "Должны быть видны <b>ФИО</b> и <b>дата рождения</b>.\n\n"
-        "Если остались вопросы — «Поддержка». Или «Назад», если передумал."
+        "Если остались вопросы — «Поддержка». Или «Назад», если передумал.",
+        kb_u18_intro(),
+    )
+
+@cached_screen
+def u18_plans_screen() -> Screen:
+    return Screen(
+        "Возраст подтвержден. Доступна <b>скидка −25%</b> на подписку.\n"
+        "Выбери тариф:",
+        kb_u18_discount_plans(),
     )
+
+@cached_screen
+def u18_rejected_screen() -> Screen:
+    return Screen(
+        "Увы, верификация отклонена. Возвращаю к тарифам.",
+        InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton(text="⬅️ Назад к тарифам", callback_data="open_tariffs")]
+        ]),
+    )
+
+@cached_screen
+def consent_screen(plan_code: str, agreed: bool) -> Screen:
+    return Screen(consent_text(plan_code), consent_kb(plan_code, agreed))
+
+@cached_screen
+def card_screen(plan_code: str) -> Screen:
+    # ссылка на оплату у каждого счёта своя — кэшируется только текст
+    return Screen(card_text_u18(plan_code) if plan_code.endswith("_u18") else (
+        f"🎟 <b>Подписка {plan_code}</b>\nЦена: {plan_amount(plan_code)} ₽{_policy_html()}"
+    ))
+
+# ---------- U18 ENTRY ----------
+@router.callback_query(F.data == "u18_start")
+async def u18_start(call: CallbackQuery, state: FSMContext):
+    screen = u18_intro_screen()
     await state.set_state(AgeCheck.waiting_photo)
     try:
-        await call.message.edit_text(text, reply_markup=kb_u18_intro())
+        await call.message.edit_text(screen.text, reply_markup=screen.kb)
     except Exception:
-        await call.message.answer(text, reply_markup=kb_u18_intro())
+        await call.message.answer(screen.text, reply_markup=screen.kb)
     await call.answer()
 
 # ---------- ПРИЁМ ПАСПОРТА ----------
@@ -177,7 +193,7 @@ async def u18_got_passport(msg: Message, state: FSMContext):
     file_id = msg.photo[-1].file_id
     user = msg.from_user
     token = secrets.token_urlsafe(16)
-    PENDING[token] = {"user_id": user.id, "file_id": file_id}
+    await age_store.put_pending(token, user_id=user.id, file_id=file_id)
 
     caption = (
         "<b>Верификация возраста</b>\n\n"
@@ -211,23 +227,21 @@ async def u18_need_photo(msg: Message, state: FSMContext):
 @router.callback_query(F.data.startswith("age:approve:"))
 async def age_approve(call: CallbackQuery):
     token = call.data.split(":", 2)[-1]
-    info = PENDING.pop(token, None)
+    info = await age_store.claim_pending(token)
     if not info:
         await call.answer("Заявка уже обработана или устарела.", show_alert=True)
         return
 
     user_id = info["user_id"]
-    VERIFIED_USERS.add(user_id)
+    await age_store.mark_verified(user_id)
 
+    screen = u18_plans_screen()
     try:
         await call.bot.send_message(
             chat_id=user_id,
-            text=(
-                "Возраст подтвержден. Доступна <b>скидка −25%</b> на подписку.\n"
-                "Выбери тариф:"
-            ),
+            text=screen.text,
             parse_mode="HTML",
-            reply_markup=kb_u18_discount_plans(),
+            reply_markup=screen.kb,
         )
     except Exception as e:
         logger.exception("Не смог уведомить пользователя: %s", e)
@@ -245,19 +259,18 @@ async def age_approve(call: CallbackQuery):
 @router.callback_query(F.data.startswith("age:reject:"))
 async def age_reject(call: CallbackQuery):
     token = call.data.split(":", 2)[-1]
-    info = PENDING.pop(token, None)
+    info = await age_store.claim_pending(token)
     if not info:
         await call.answer("Заявка уже обработана или устарела.", show_alert=True)
         return
 
     user_id = info["user_id"]
+    screen = u18_rejected_screen()
     try:
         await call.bot.send_message(
             chat_id=user_id,
-            text="Увы, верификация отклонена. Возвращаю к тарифам.",
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="⬅️ Назад к тарифам", callback_data="open_tariffs")]
-            ])
+            text=screen.text,
+            reply_markup=screen.kb,
         )
     except Exception as e:
         logger.exception("Не смог уведомить пользователя: %s", e)
@@ -273,8 +286,6 @@ async def age_reject(call: CallbackQuery):
     await call.answer("Отклонено.")
 
 # ---------- СОГЛАСИЕ ----------
-CONSENT_STATE: Dict[int, Dict[str, bool]] = {}  # user_id -> {plan_code: agreed}
-
 def consent_text(plan_code: str) -> str:
     price = plan_amount(plan_code)
     period = plan_period_days(plan_code)
@@ -298,28 +309,24 @@ def consent_text(plan_code: str) -> str:
 @router.callback_query(F.data.startswith("consent:toggle:"))
 async def consent_toggle(call: CallbackQuery):
     plan = call.data.split(":", 2)[-1]
-    uid = call.from_user.id
-    CONSENT_STATE.setdefault(uid, {})
-    current = CONSENT_STATE[uid].get(plan, False)
-    CONSENT_STATE[uid][plan] = not current
+    agreed = await age_store.toggle_consent(call.from_user.id, plan)
     try:
-        await call.message.edit_reply_markup(reply_markup=consent_kb(plan, CONSENT_STATE[uid][plan]))
+        await call.message.edit_reply_markup(reply_markup=consent_screen(plan, agreed).kb)
     except Exception:
         pass
     await call.answer()
 
 @router.callback_query(F.data.startswith("consent:confirm:"))
-async def consent_confirm(call: CallbackQuery, session: AsyncSession = get_session()):
+async def consent_confirm(call: CallbackQuery, session: AsyncSession, uow: UnitOfWork):
     plan = call.data.split(":", 2)[-1]
     uid = call.from_user.id
-    agreed = CONSENT_STATE.get(uid, {}).get(plan, False)
+    agreed = await age_store.get_consent(uid, plan)
     if not agreed:
         await call.answer("Поставь галочку согласия, иначе не смогу оформить подписку.", show_alert=True)
         return
 
     # лог согласия (без IP/UA)
-    await save_consent(
-        session,
+    save_consent(
         user_id=uid,
         plan=plan,
         price_rub=plan_amount(plan),
@@ -329,6 +336,8 @@ async def consent_confirm(call: CallbackQuery, session: AsyncSession = get_sessi
     # создаём инвойс и генерим ссылку; флаг Recurring внутри robokassa.py учитывает settings.RK_RECURRING_ENABLED
     svc = PaymentService(session)
     payment, invoice_uuid = await svc.create_invoice(tg_user_id=uid, plan=plan)
+    # счёт должен попасть в БД раньше, чем ссылка на оплату уйдёт пользователю
+    await uow.commit()
     try:
         inv_id = int(invoice_uuid[:8], 16)
     except Exception:
@@ -343,10 +352,7 @@ async def consent_confirm(call: CallbackQuery, session: AsyncSession = get_sessi
     )
 
     # карточка + кнопки «Оплатить/Проверить/Назад»
-    text = card_text_u18(plan) if plan.endswith("_u18") else (
-        f"🎟 <b>Подписка {plan}</b>\nЦена: {plan_amount(plan)} ₽{POLICY_HTML}"
-    )
-    await call.message.answer(text, reply_markup=pay_kb(pay_url))
+    await call.message.answer(card_screen(plan).text, reply_markup=pay_kb(pay_url))
     await call.answer()
 
 # ---------- U18 выбор тарифов ----------
@@ -354,9 +360,10 @@ async def consent_confirm(call: CallbackQuery, session: AsyncSession = get_sessi
 async def u18_tariff_consent(call: CallbackQuery):
     plan_code = call.data.split(":", 2)[-1]  # m1_u18|m3_u18|m6_u18
     uid = call.from_user.id
-    if uid not in VERIFIED_USERS:
+    if not await age_store.is_verified(uid):
         await call.answer("Нет верификации. Нажми «Мне нет 18 лет» и пройди проверку.", show_alert=True)
         return
-    CONSENT_STATE.setdefault(uid, {})[plan_code] = False
-    await call.message.answer(consent_text(plan_code), reply_markup=consent_kb(plan_code, False))
+    await age_store.set_consent(uid, plan_code, False)
+    screen = consent_screen(plan_code, False)
+    await call.message.answer(screen.text, reply_markup=screen.kb)
     await call.answer()
@@ -1,3 +1,25 @@
-from aiogram import Router
+# app/handlers/churn.py
+from aiogram import F, Router
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import CallbackQuery
+
+from app.repositories.user_repo import UserRepo
+from app.services.churn_service import CB_PREFIX, THANKS_TEXT, ChurnService
+
 router = Router()
-# Placeholder: опрос причин будет после истечения
+
+# Ответ на опрос оттока (его шлёт диспетчер напоминаний, kind=churn).
+# В БД здесь только чтение users.id; сама запись — фоновым батчем churn_writer.
+@router.callback_query(F.data.startswith(CB_PREFIX))
+async def churn_answer(call: CallbackQuery, session):
+    code = call.data[len(CB_PREFIX):]
+    user_id = await UserRepo(session).id_by_tg_id(call.from_user.id)
+    if user_id is None or not ChurnService().submit(user_id, code):
+        await call.answer()
+        return
+    try:
+        # убираем кнопки: повторный тап не даст второй ответ
+        await call.message.edit_text(THANKS_TEXT)
+    except TelegramBadRequest:
+        pass
+    await call.answer("Спасибо!")
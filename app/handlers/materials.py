@@ -1,14 +1,32 @@
 from aiogram import Router, F
-from aiogram.types import Message
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import CallbackQuery, LinkPreviewOptions, Message
+from app.services.material_catalog import CB_NOOP, CB_PREFIX
 from app.services.material_service import MaterialService
 
 router = Router()
+_NO_PREVIEW = LinkPreviewOptions(is_disabled=True)
 
 @router.message(F.text == "Бесплатные материалы")
 async def list_materials(m: Message, materials: MaterialService):
-    items = await materials.list()
-    if not items:
-        await m.answer("Пока пусто. Скоро добавим.")
+    page = await materials.page(0)
+    await m.answer(page.text, reply_markup=page.kb, link_preview_options=_NO_PREVIEW)
+
+@router.callback_query(F.data == CB_NOOP)
+async def materials_noop(call: CallbackQuery):
+    await call.answer()
+
+@router.callback_query(F.data.startswith(CB_PREFIX))
+async def materials_page(call: CallbackQuery, materials: MaterialService):
+    try:
+        index = int(call.data[len(CB_PREFIX):])
+    except ValueError:
+        await call.answer()
         return
-    text = "\n".join([f"• <b>{x.title}</b> — {x.description or ''}" for x in items])
-    await m.answer(text or "Пусто")
+    page = await materials.page(index)
+    try:
+        await call.message.edit_text(page.text, reply_markup=page.kb, link_preview_options=_NO_PREVIEW)
+    except TelegramBadRequest:
+        # двойной тап: "message is not modified"
+        pass
+    await call.answer()
@@ -9,6 +9,7 @@ from aiogram.client.bot import Bot
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import SessionLocal
+from app.repositories.user_repo import UserRepo
 from app.services.access_service import AccessService
 
 router = Router(name="members")
@@ -33,3 +34,11 @@ async def on_member_join(event: ChatMemberUpdated, bot: Bot):
     async with SessionLocal() as session:  # type: AsyncSession
         svc = AccessService(session, bot)
         await svc.mark_used(tg_user_id=user_id, chat_id=chat_id, invite_link=link)
+
+
+# Личка с ботом: пользователь заблокировал / разблокировал бота.
+# Рассылка помечает blocked сама по 403, а разблокировку видно только здесь.
+@router.my_chat_member(F.chat.type == "private")
+async def on_bot_blocked_changed(event: ChatMemberUpdated, session: AsyncSession):
+    blocked = event.new_chat_member.status == "kicked"
+    await UserRepo(session).set_blocked(event.from_user.id, blocked)
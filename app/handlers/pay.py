@@ -6,11 +6,14 @@ from datetime import datetime, timedelta
 from aiogram import Router, F
 from aiogram.client.bot import Bot
 from aiogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton, Message
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import SessionLocal
+from app.core.uow import UnitOfWork
 from app.services.payment_service import PaymentService
 from app.services.access_service import AccessService
+from app.services.age_verify_store import age_store
 from app.pay.robokassa import build_payment_link
+from app.services.screen_cache import Screen, cached_screen
 from app.config import settings
 
 CONTENT_CHANNEL_ID = int(os.getenv("CONTENT_CHANNEL_ID"))
@@ -56,6 +59,10 @@ def price_for_plan(plan: str) -> int:
     return _price_for_plan(plan)
 
 
+def _fmt_rub(amount: int) -> str:
+    return f"{amount} ₽"
+
+
 
 # ---------- подписи и тексты ----------
 def _label(plan: str) -> str:
@@ -103,16 +110,43 @@ def pay_kb(url: str) -> InlineKeyboardMarkup:
     ])
 
 
+# ---------- готовые экраны (собираются один раз, см. app/services/screen_cache.py) ----------
+@cached_screen
+def tariffs_screen() -> Screen:
+    return Screen(_tariffs_text(), tariffs_kb())
+
+
+@cached_screen
+def u18_info_screen() -> Screen:
+    return Screen(
+        "🔖 Скидка 25% для пользователей младше 18 лет подключается через верификацию.",
+        back_to_tariffs_kb(),
+    )
+
+
+@cached_screen
+def consent_screen(plan: str, agreed: bool) -> Screen:
+    return Screen(consent_text(plan), consent_kb(plan, agreed))
+
+
+@cached_screen
+def card_screen(plan: str) -> Screen:
+    # кнопка оплаты со ссылкой у каждого счёта своя — кэшируется только текст
+    return Screen(card_text(plan))
+
+
 # ---------- общий вход в меню тарифов ----------
 @router.callback_query(F.data == "open_tariffs")
 async def open_tariffs(call: CallbackQuery):
-    await call.message.answer(_tariffs_text(), reply_markup=tariffs_kb())
+    screen = tariffs_screen()
+    await call.message.answer(screen.text, reply_markup=screen.kb)
     await call.answer()
 
 
 @router.message(F.text.lower().contains("оформить подписку"))
 async def open_tariffs_from_text(msg: Message):
-    await msg.answer(_tariffs_text(), reply_markup=tariffs_kb())
+    screen = tariffs_screen()
+    await msg.answer(screen.text, reply_markup=screen.kb)
 
 
 # ---------- согласие на рекуррент ----------
@@ -169,115 +203,111 @@ def card_text(plan: str) -> str:
 
 
 @router.callback_query(F.data.startswith("tariff:"))
-async def show_tariff_or_info(call: CallbackQuery):
+async def show_tariff_or_info(call: CallbackQuery, session: AsyncSession, uow: UnitOfWork):
     plan = call.data.split(":", 1)[1]
 
     # инфо по u18
     if plan == "u18_info":
-        await call.message.answer(
-            "🔖 Скидка 25% для пользователей младше 18 лет подключается через верификацию.",
-            reply_markup=back_to_tariffs_kb(),
-        )
+        screen = u18_info_screen()
+        await call.message.answer(screen.text, reply_markup=screen.kb)
         await call.answer()
         return
 
     # обычные планы — сначала экран согласия (далее обработает age_verify)
     if plan in ("m1", "m3", "m6"):
-        await call.message.answer(consent_text(plan), reply_markup=consent_kb(plan, False))
+        await age_store.set_consent(call.from_user.id, plan, False)
+        screen = consent_screen(plan, False)
+        await call.message.answer(screen.text, reply_markup=screen.kb)
         await call.answer()
         return
 
     # прочее (например, trial) — разовый платёж
-    async with SessionLocal() as session:
-        svc = PaymentService(session)
+    svc = PaymentService(session)
 
-        # Robokassa требует числовой InvId; делаем уникальный 32-битный
-        from uuid import uuid4
-        inv_id = int(uuid4().hex[:8], 16)
+    # Robokassa требует числовой InvId; делаем уникальный 32-битный
+    from uuid import uuid4
+    inv_id = int(uuid4().hex[:8], 16)
 
-        # создаём инвойс с provider_invoice_id равным InvId (чтобы вебхук/поиск сошлись)
-        payment, invoice_id = await svc.create_invoice(
-            tg_user_id=call.from_user.id,
-            plan=plan,
-            provider_invoice_id=str(inv_id),
-        )
-
-        pay_url = build_payment_link(
-            amount_rub=float(_price_for_plan(plan)),
-            inv_id=inv_id,
-            user_id=call.from_user.id,
-            description=f"Подписка {plan}",
-        )
+    # создаём инвойс с provider_invoice_id равным InvId (чтобы вебхук/поиск сошлись)
+    payment, invoice_id = await svc.create_invoice(
+        tg_user_id=call.from_user.id,
+        plan=plan,
+        provider_invoice_id=str(inv_id),
+    )
+    # счёт должен попасть в БД раньше, чем ссылка на оплату уйдёт пользователю
+    await uow.commit()
+
+    pay_url = build_payment_link(
+        amount_rub=float(_price_for_plan(plan)),
+        inv_id=inv_id,
+        user_id=call.from_user.id,
+        description=f"Подписка {plan}",
+    )
 
-    await call.message.answer(card_text(plan), reply_markup=pay_kb(pay_url))
+    await call.message.answer(card_screen(plan).text, reply_markup=pay_kb(pay_url))
     await call.answer()
 
 
 # ---------- проверка оплаты ----------
 @router.callback_query(F.data == "check_payment")
-async def check_payment(call: CallbackQuery, bot: Bot):
-    async with SessionLocal() as session:
-        pay = PaymentService(session)
-
-        # 1) есть ли активная подписка
-        if not await pay.user_has_active_subscription(call.from_user.id):
-            await call.message.answer("⏳ Оплата ещё не подтвердилась. Попробуй через минуту.")
-            await call.answer()
-            return
-
-        # 2) проверяем членство
-        access = AccessService(session, bot)
-        in_channel = await access.is_member(CONTENT_CHANNEL_ID, call.from_user.id)
-        in_group = await access.is_member(CONTENT_CHAT_ID, call.from_user.id)
-
-        if in_channel and in_group:
-            await call.message.answer("✅ Доступ уже активен: ты состоишь и в канале, и в чате.")
-            await call.answer()
-            return
-
-        # 3) срок доступа по плану
-        sub = await pay.get_active_subscription(call.from_user.id)
-        plan = getattr(sub, "plan", "m1")
-        access_days = PLAN_ACCESS_DAYS.get(plan, 30)
-
-        # 4) пробуем реюзнуть живые ссылки, иначе генерим новые и пишем в БД
-        links: list[str] = []
-        reuse_window_min = 5
-
-        if not in_channel:
-            old_ch = await access.get_unexpired_link(call.from_user.id, CONTENT_CHANNEL_ID, reuse_window_min)
-            if old_ch:
-                links.append(f"Канал: {old_ch}")
-            else:
-                ch_new = await access.create_one_time_link(
-                    tg_user_id=call.from_user.id,
-                    chat_id=CONTENT_CHANNEL_ID,
-                    ttl_minutes=60,
-                    access_days=access_days,
-                )
-                links.append(f"Канал: {ch_new}")
-
-        if not in_group:
-            old_gr = await access.get_unexpired_link(call.from_user.id, CONTENT_CHAT_ID, reuse_window_min)
-            if old_gr:
-                links.append(f"Чат: {old_gr}")
-            else:
-                gr_new = await access.create_one_time_link(
-                    tg_user_id=call.from_user.id,
-                    chat_id=CONTENT_CHAT_ID,
-                    ttl_minutes=60,
-                    access_days=access_days,
-                )
-                links.append(f"Чат: {gr_new}")
-
-        # 5) сообщение пользователю
-        if links:
-            await call.message.answer(
-                "✅ Оплата подтверждена.\n\n"
-                + "\n".join(links)
-                + "\n\nСсылки одноразовые и действуют 60 минут."
-            )
+async def check_payment(call: CallbackQuery, bot: Bot, session: AsyncSession, uow: UnitOfWork):
+    pay = PaymentService(session)
+
+    # 1) есть ли активная подписка
+    if not await pay.user_has_active_subscription(call.from_user.id):
+        await call.message.answer("⏳ Оплата ещё не подтвердилась. Попробуй через минуту.")
+        await call.answer()
+        return
+
+    # 2) проверяем членство
+    access = AccessService(session, bot)
+    in_channel = await access.is_member(CONTENT_CHANNEL_ID, call.from_user.id)
+    in_group = await access.is_member(CONTENT_CHAT_ID, call.from_user.id)
+
+    if in_channel and in_group:
+        await call.message.answer("✅ Доступ уже активен: ты состоишь и в канале, и в чате.")
+        await call.answer()
+        return
+
+    # 3) срок доступа по плану
+    sub = await pay.get_active_subscription(call.from_user.id)
+    plan = getattr(sub, "plan", "m1")
+    access_days = PLAN_ACCESS_DAYS.get(plan, 30)
+
+    # 4) пробуем реюзнуть живые ссылки, недостающие генерим пачкой (один INSERT + commit)
+    reuse_window_min = 5
+    labels = {CONTENT_CHANNEL_ID: "Канал", CONTENT_CHAT_ID: "Чат"}
+    found: dict[int, str] = {}
+    need: list[int] = []
+
+    for chat_id, joined in ((CONTENT_CHANNEL_ID, in_channel), (CONTENT_CHAT_ID, in_group)):
+        if joined:
+            continue
+        old = await access.get_unexpired_link(call.from_user.id, chat_id, reuse_window_min)
+        if old:
+            found[chat_id] = old
         else:
-            await call.message.answer("✅ Доступ активен.")
+            need.append(chat_id)
+
+    if need:
+        found.update(await access.create_links(
+            tg_user_id=call.from_user.id,
+            chat_ids=need,
+            ttl_minutes=60,
+            access_days=access_days,
+        ))
+        # выдачи должны попасть в БД раньше, чем инвайты уйдут пользователю
+        await uow.commit()
+    links = [f"{label}: {found[chat_id]}" for chat_id, label in labels.items() if chat_id in found]
+
+    # 5) сообщение пользователю
+    if links:
+        await call.message.answer(
+            "✅ Оплата подтверждена.\n\n"
+            + "\n".join(links)
+            + "\n\nСсылки одноразовые и действуют 60 минут."
+        )
+    else:
+        await call.message.answer("✅ Доступ активен.")
 
     await call.answer()
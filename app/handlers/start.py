@@ -7,9 +7,11 @@ from aiogram.types import (
     Message,
     InlineKeyboardMarkup,
     InlineKeyboardButton,
-    FSInputFile,
 )
 
+from app.services.media_registry import media_registry
+from app.services.screen_cache import Screen, cached_screen
+
 router = Router()
 
 WELCOME_TEXT = (
@@ -31,13 +33,20 @@ def _welcome_kb() -> InlineKeyboardMarkup:
         [InlineKeyboardButton(text="Получить пробный период", callback_data="tariff:trial3_10")],
     ])
 
+@cached_screen
+def welcome_screen() -> Screen:
+    return Screen(WELCOME_TEXT, _welcome_kb())
+
 # Картинка лежит тут: app/assets/ЭПОХА (5).png
 BANNER_PATH = Path(__file__).resolve().parents[1] / "assets" / "ЭПОХА (5).png"
 
 @router.message(CommandStart())
 async def start(message: Message) -> None:
-    if BANNER_PATH.exists():
-        photo = FSInputFile(BANNER_PATH)
-        await message.answer_photo(photo=photo, caption=WELCOME_TEXT, reply_markup=_welcome_kb())
-    else:
-        await message.answer(WELCOME_TEXT, reply_markup=_welcome_kb())
+    screen = welcome_screen()
+    # баннер заливается один раз, дальше уходит по file_id
+    sent = await media_registry.send(
+        message.bot, message.chat.id, BANNER_PATH,
+        caption=screen.text, reply_markup=screen.kb,
+    )
+    if sent is None:
+        await message.answer(screen.text, reply_markup=screen.kb)
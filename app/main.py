@@ -9,19 +9,27 @@ from typing import Any
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.enums import ParseMode
 from aiogram.types import BotCommand
-from sqlalchemy.ext.asyncio import AsyncSession
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from app.scheduler.jobs import setup_scheduler
+from app.scheduler.locks import LeaderElector
 
 from app.config import settings
 from app.core.logging import setup_logging, attach_ctx_filter
-from app.container import build_dp, build_services, init_db
+from app.core.replica import replica
+from app.core.tg_session import PreparedAiohttpSession
+from app.container import build_dp, init_db
 from app.db import SessionLocal, engine
-from app.middlewares.deps import DepsMiddleware
 from app.middlewares.logging import LoggingMiddleware
+from app.middlewares.uow import UnitOfWorkMiddleware
+from app.services.age_verify_store import age_store
+from app.services.deadline_index import deadline_index
+from app.services.settings_cache import settings_cache
+from app.services.broadcast_service import broadcaster
+from app.services.writers import ALL_WRITERS
 from app.handlers.members import router as members_router
 
 # ---- Логи первыми ----
@@ -36,6 +44,9 @@ from app.handlers.payments_rk import router as payments_rk_router
 from app.handlers.pay import router as pay_router
 from app.handlers.errors import router as errors_router
 from app.handlers.age_verify import router as age_verify_router  # NEW: U18 верификация
+from app.handlers.materials import router as materials_router
+from app.handlers.admin import router as admin_router
+from app.handlers.churn import router as churn_router
 
 
 async def setup_bot_commands(bot: Bot) -> None:
@@ -55,9 +66,17 @@ async def main() -> None:
         settings.PAYMENT_PROVIDER,
     )
 
+    # TELEGRAM_API_BASE позволяет увести бота на локальную заглушку Bot API (нагрузочные прогоны)
+    # PreparedAiohttpSession отправляет готовые клавиатуры экранов без повторной сериализации
+    session_kwargs: dict[str, Any] = {}
+    if settings.TELEGRAM_API_BASE:
+        session_kwargs["api"] = TelegramAPIServer.from_base(settings.TELEGRAM_API_BASE)
+        logger.info("boot: custom Bot API server %s", settings.TELEGRAM_API_BASE)
+
     bot = Bot(
         token=settings.BOT_TOKEN,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+        session=PreparedAiohttpSession(**session_kwargs),
     )
 
     # На всякий: сносим вебхук, чтобы polling не конфликтовал
@@ -78,18 +97,12 @@ async def main() -> None:
     else:
         logger.info("DB init skipped (use alembic upgrade head)")
 
-    session: AsyncSession = SessionLocal()
-    services: dict[str, Any] = await build_services(bot, session)
-
-    inject: dict[str, Any] = {
-        "session": session,
-        "payments": services.get("payments"),
-        "subs": services.get("subscriptions"),
-    }
+    # таблица settings в память + подписка на изменения из других процессов
+    await settings_cache.start()
 
-    # Middlewares
+    # Middlewares: транзакция (сессия + сервисы) на апдейт, а не одна сессия на процесс
     dp.update.outer_middleware(LoggingMiddleware())
-    dp.update.middleware(DepsMiddleware(session=session, services=inject))
+    dp.update.middleware(UnitOfWorkMiddleware(SessionLocal))
 
     # Routers — порядок важен
     dp.include_routers(
@@ -99,6 +112,9 @@ async def main() -> None:
         payments_rk_router,
         pay_router,
         members_router,   # новый
+        materials_router,
+        churn_router,
+        admin_router,
         errors_router,
     )
 
@@ -107,7 +123,11 @@ async def main() -> None:
 
     # ---------- Scheduler ----------
     scheduler = AsyncIOScheduler(timezone="UTC")
-    setup_scheduler(scheduler, bot)
+    leader = None
+    if settings.SCHEDULER_LEADER_ELECTION:
+        leader = LeaderElector(engine, check_interval=settings.SCHEDULER_LEADER_CHECK_S)
+        await leader.start()
+    setup_scheduler(scheduler, bot, leader=leader)
     scheduler.start()
 
     # Корректное завершение по сигналам
@@ -144,6 +164,19 @@ async def main() -> None:
     except Exception:
         logger.exception("scheduler shutdown failed")
 
+    # отдаём лидерство сразу, не дожидаясь, пока Postgres заметит закрытое соединение
+    if leader is not None:
+        try:
+            await leader.stop()
+        except Exception:
+            logger.exception("leader stop failed")
+
+    # рассылки дописывают текущий чанк; неотправленное подхватит следующий запуск
+    try:
+        await broadcaster.stop()
+    except Exception:
+        logger.exception("broadcaster stop failed")
+
     if not poll_task.done():
         poll_task.cancel()
         try:
@@ -161,17 +194,39 @@ async def main() -> None:
     except Exception:
         logger.exception("storage close failed")
 
-    # close bot session
+    # дописываем буферы батч-писателей (consent_logs и др.)
+    for writer in ALL_WRITERS:
+        try:
+            await writer.stop()
+        except Exception:
+            logger.exception("batch writer %s stop failed", writer.name)
+
+    # redis-состояние U18/согласий
     try:
-        await bot.session.close()
+        await age_store.close()
     except Exception:
-        logger.exception("bot session close failed")
+        logger.exception("age store close failed")
+
+    try:
+        await deadline_index.close()
+    except Exception:
+        logger.exception("deadline index close failed")
+
+    try:
+        await settings_cache.stop()
+    except Exception:
+        logger.exception("settings cache stop failed")
 
-    # close DB session
     try:
-        await session.close()
+        await replica.close()
     except Exception:
-        logger.exception("db session close failed")
+        logger.exception("replica engine close failed")
+
+    # close bot session
+    try:
+        await bot.session.close()
+    except Exception:
+        logger.exception("bot session close failed")
 
     # dispose engine
     try:
@@ -7,6 +7,8 @@ from typing import Any, Dict, Awaitable, Callable
 from aiogram import BaseMiddleware
 from aiogram.types import Update
 
+from app.core import db_stats
+
 logger = logging.getLogger("app.middleware.logging")
 
 INVOICE_RE = re.compile(r"(?:^|[\s:/])([0-9a-f]{32})\b", re.IGNORECASE)
@@ -78,34 +80,37 @@ class LoggingMiddleware(BaseMiddleware):
         )
 
         started = time.perf_counter()
-        try:
-            result = await handler(event, data)
-            duration_ms = int((time.perf_counter() - started) * 1000)
-            logger.info(
-                "handled",
-                extra={
-                    "update_id": update_id,
-                    "user_id": user_id,
-                    "chat_id": chat_id,
-                    "message_id": msg_id,
-                    "invoice_id": invoice_id,
-                    "event_type": type(event).__name__,
-                    "duration_ms": duration_ms,
-                },
-            )
-            return result
-        except Exception:
-            duration_ms = int((time.perf_counter() - started) * 1000)
-            logger.exception(
-                "handler_error",
-                extra={
-                    "update_id": update_id,
-                    "user_id": user_id,
-                    "chat_id": chat_id,
-                    "message_id": msg_id,
-                    "invoice_id": invoice_id,
-                    "event_type": type(event).__name__,
-                    "duration_ms": duration_ms,
-                },
-            )
-            raise
+        with db_stats.track(f"update:{update_id}:{getattr(event, 'event_type', type(event).__name__)}") as stats:
+            try:
+                result = await handler(event, data)
+                duration_ms = int((time.perf_counter() - started) * 1000)
+                logger.info(
+                    "handled",
+                    extra={
+                        "update_id": update_id,
+                        "user_id": user_id,
+                        "chat_id": chat_id,
+                        "message_id": msg_id,
+                        "invoice_id": invoice_id,
+                        "event_type": type(event).__name__,
+                        "duration_ms": duration_ms,
+                        **stats.as_log_extra(),
+                    },
+                )
+                return result
+            except Exception:
+                duration_ms = int((time.perf_counter() - started) * 1000)
+                logger.exception(
+                    "handler_error",
+                    extra={
+                        "update_id": update_id,
+                        "user_id": user_id,
+                        "chat_id": chat_id,
+                        "message_id": msg_id,
+                        "invoice_id": invoice_id,
+                        "event_type": type(event).__name__,
+                        "duration_ms": duration_ms,
+                        **stats.as_log_extra(),
+                    },
+                )
+                raise
@@ -0,0 +1,39 @@
+# app/middlewares/uow.py
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from app.container import build_services
+from app.core.uow import UnitOfWork
+from app.db import SessionLocal
+
+
+class UnitOfWorkMiddleware(BaseMiddleware):
+    """
+    Транзакция на апдейт: своя сессия (вместо одной общей на процесс), сервисы
+    поверх неё, один commit после хендлера / rollback при исключении.
+
+    Хендлеру доступны session, uow, payments, subs, materials. Перед внешним эффектом,
+    ссылающимся на запись (ссылка на оплату, инвайт), хендлер зовёт await uow.commit().
+    Сессия ленивая: апдейт без обращений к БД соединение из пула не берёт.
+    """
+
+    def __init__(self, session_factory=SessionLocal) -> None:
+        self.session_factory = session_factory
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        uow = UnitOfWork(self.session_factory)
+        async with uow as session:
+            services = await build_services(data.get("bot"), session)
+            data["session"] = session
+            data["uow"] = uow
+            data["payments"] = services.get("payments")
+            data["subs"] = services.get("subscriptions")
+            data["materials"] = services.get("materials")
+            return await handler(event, data)
@@ -72,6 +72,9 @@ MODEL_MODULES = [
     "app.models.setting",
     "app.models.material",
     "app.models.churn_reason",
+    "app.models.consent_log",
+    "app.models.archive",
+    "app.models.broadcast",
 ]
 
 _loaded = {}
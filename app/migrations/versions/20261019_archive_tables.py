@@ -0,0 +1,33 @@
+"""archive tables for the retention job: access_grants, payments, consent_logs"""
+from __future__ import annotations
+
+from alembic import op
+
+# Alembic identifiers
+revision = "20261019_archive_tables"
+down_revision = "20261019_hot_path_idx"
+branch_labels = None
+depends_on = None
+
+TABLES = ("access_grants", "payments", "consent_logs")
+
+
+def upgrade():
+    for t in TABLES:
+        # LIKE без INCLUDING: только колонки и NOT NULL — ни FK, ни индексов,
+        # ни nextval() исходной последовательности
+        op.execute(f"CREATE TABLE IF NOT EXISTS {t}_archive (LIKE {t})")
+        op.execute(
+            f"ALTER TABLE {t}_archive "
+            "ADD COLUMN IF NOT EXISTS archived_at timestamptz NOT NULL DEFAULT now()"
+        )
+        op.execute(
+            f"DO $$ BEGIN "
+            f"ALTER TABLE {t}_archive ADD CONSTRAINT pk_{t}_archive PRIMARY KEY (id); "
+            f"EXCEPTION WHEN invalid_table_definition OR duplicate_object THEN NULL; END $$"
+        )
+
+
+def downgrade():
+    for t in reversed(TABLES):
+        op.execute(f"DROP TABLE IF EXISTS {t}_archive")
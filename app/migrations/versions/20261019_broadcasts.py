@@ -0,0 +1,50 @@
+"""broadcasts + broadcast_deliveries for the admin broadcast engine"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# Alembic identifiers
+revision = "20261019_broadcasts"
+down_revision = "20261019_archive_tables"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "broadcasts",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("audience", sa.String(length=16), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False, server_default="draft"),
+        sa.Column("created_by", sa.BigInteger(), nullable=True),
+        sa.Column("cursor_user_id", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("sent", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("failed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("blocked", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_broadcasts")),
+    )
+    op.create_table(
+        "broadcast_deliveries",
+        sa.Column("broadcast_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False, server_default="pending"),
+        sa.Column("error", sa.String(length=255), nullable=True),
+        sa.Column("sent_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["broadcast_id"], ["broadcasts.id"],
+            name=op.f("fk_broadcast_deliveries_broadcast_id_broadcasts"), ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("broadcast_id", "user_id", name=op.f("pk_broadcast_deliveries")),
+    )
+    op.create_index("ix_broadcast_deliveries_status", "broadcast_deliveries", ["broadcast_id", "status"])
+
+
+def downgrade():
+    op.drop_index("ix_broadcast_deliveries_status", table_name="broadcast_deliveries")
+    op.drop_table("broadcast_deliveries")
+    op.drop_table("broadcasts")
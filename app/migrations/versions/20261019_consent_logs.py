@@ -0,0 +1,46 @@
+"""consent_logs table + indexes (merge of 93da2b239aea and 20251012_add_auto_renew)"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# Alembic identifiers
+revision = "20261019_consent_logs"
+# обе ветки от 2981e2aafc94 сходятся здесь
+down_revision = ("93da2b239aea", "20251012_add_auto_renew")
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+
+    # раньше таблицу создавал сам хендлер (CREATE TABLE IF NOT EXISTS) — не пересоздаём
+    if "consent_logs" not in insp.get_table_names():
+        op.create_table(
+            "consent_logs",
+            sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+            sa.Column("user_id", sa.BigInteger(), nullable=False),
+            sa.Column("plan", sa.String(length=32), nullable=False),
+            sa.Column("price_rub", sa.Integer(), nullable=False),
+            sa.Column("period_days", sa.Integer(), nullable=False),
+            sa.Column("consent_text", sa.Text(), nullable=False),
+            sa.Column("offer_url", sa.String(length=255), nullable=False),
+            sa.Column("privacy_url", sa.String(length=255), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+            sa.PrimaryKeyConstraint("id", name=op.f("pk_consent_logs")),
+        )
+
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_consent_logs_user_id_created_at "
+        "ON consent_logs (user_id, created_at)"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_consent_logs_created_at ON consent_logs (created_at)")
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_consent_logs_created_at")
+    op.execute("DROP INDEX IF EXISTS ix_consent_logs_user_id_created_at")
+    op.drop_table("consent_logs")
@@ -0,0 +1,70 @@
+"""composite/partial indexes for hot-path queries (CREATE INDEX CONCURRENTLY)"""
+from __future__ import annotations
+
+from alembic import context, op
+from sqlalchemy import text
+
+# Alembic identifiers
+revision = "20261019_hot_path_idx"
+down_revision = "20261019_subs_auto_renew_idx"
+branch_labels = None
+depends_on = None
+
+# (имя, DDL без "CREATE INDEX CONCURRENTLY IF NOT EXISTS <имя>")
+INDEXES = [
+    # AccessService.get_unexpired_link: tg_user_id = ? AND chat_id = ? AND used IS false
+    # AND invite_expires_at > ? ORDER BY invite_expires_at DESC LIMIT 1.
+    # Предикат пишется литералом (IS false), поэтому частичный индекс подходит и generic-плану.
+    (
+        "ix_access_grants_unused_link",
+        "ON access_grants (tg_user_id, chat_id, invite_expires_at) WHERE used IS false",
+    ),
+    # AccessService.get_expired_accesses / rebuild_deadlines: диапазон по access_expires_at
+    (
+        "ix_access_grants_access_expires_at",
+        "ON access_grants (access_expires_at) WHERE access_expires_at IS NOT NULL",
+    ),
+    # SubscriptionRepo.current_for_user / has_active_by_tg / get_active_by_tg:
+    # user_id = ? AND status = ? AND expires_at > ? ORDER BY expires_at DESC.
+    # status приходит bind-параметром — частичный индекс WHERE status='active'
+    # generic-план asyncpg использовать не смог бы, поэтому status в ключе.
+    (
+        "ix_subscriptions_user_status_expires",
+        "ON subscriptions (user_id, status, expires_at)",
+    ),
+]
+
+
+def _create_concurrently(name: str, ddl: str) -> None:
+    # упавший CONCURRENTLY оставляет INVALID-индекс, который IF NOT EXISTS молча пропустит
+    invalid = not context.is_offline_mode() and op.get_bind().execute(text(
+        "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+        "WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {"name": name}).scalar()
+    if invalid:
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {ddl}")
+
+
+def upgrade():
+    # CONCURRENTLY не работает внутри транзакции: env.py гоняет миграции в одной,
+    # autocommit_block её коммитит и выполняет DDL без блокировки записи в таблицы.
+    # payments (provider, provider_invoice_id) и reminders (sent_at IS NULL, due_at)
+    # уже покрыты: unique-индекс на provider_invoice_id и ix_reminders_pending_due_at.
+    if op.get_context().dialect.name != "postgresql":
+        for name, ddl in INDEXES:
+            op.execute(f"CREATE INDEX IF NOT EXISTS {name} {ddl}")
+        return
+    with op.get_context().autocommit_block():
+        for name, ddl in INDEXES:
+            _create_concurrently(name, ddl)
+
+
+def downgrade():
+    if op.get_context().dialect.name != "postgresql":
+        for name, _ in reversed(INDEXES):
+            op.execute(f"DROP INDEX IF EXISTS {name}")
+        return
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,22 @@
+"""partial index on reminders(due_at) for pending reminders"""
+from __future__ import annotations
+
+from alembic import op
+
+# Alembic identifiers
+revision = "20261019_reminders_pending_idx"
+down_revision = "20261019_consent_logs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # диспетчер (ReminderRepo.claim_due) сканирует только неотправленные по due_at
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_reminders_pending_due_at "
+        "ON reminders (due_at) WHERE sent_at IS NULL"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_reminders_pending_due_at")
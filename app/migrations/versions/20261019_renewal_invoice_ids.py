@@ -0,0 +1,44 @@
+"""payments.idempotency_key: renewal key moves out of provider_invoice_id"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# Alembic identifiers
+revision = "20261019_renewal_invoice_ids"
+down_revision = "20261019_broadcasts"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("payments", sa.Column("idempotency_key", sa.String(length=64), nullable=True))
+    op.create_unique_constraint(op.f("uq_payments_idempotency_key"), "payments", ["idempotency_key"])
+    # архив переносится по именам колонок (RetentionService) — колонка нужна и там
+    op.add_column("payments_archive", sa.Column("idempotency_key", sa.String(length=64), nullable=True))
+
+    # Старые автопродления: ключ renew:* -> idempotency_key, а provider_invoice_id —
+    # тот InvoiceID, с которым они уходили в Robokassa (payments.id). Если этот
+    # номер уже занят обычным счётом со случайным InvId, оставляем ключ как есть.
+    op.execute(
+        """
+        UPDATE payments p
+           SET idempotency_key = p.provider_invoice_id,
+               provider_invoice_id = CASE
+                   WHEN EXISTS (SELECT 1 FROM payments o WHERE o.provider_invoice_id = p.id::text)
+                   THEN p.provider_invoice_id
+                   ELSE p.id::text
+               END
+         WHERE p.provider_invoice_id LIKE 'renew:%'
+        """
+    )
+
+
+def downgrade():
+    op.execute(
+        "UPDATE payments SET provider_invoice_id = idempotency_key "
+        "WHERE idempotency_key LIKE 'renew:%'"
+    )
+    op.drop_column("payments_archive", "idempotency_key")
+    op.drop_constraint(op.f("uq_payments_idempotency_key"), "payments", type_="unique")
+    op.drop_column("payments", "idempotency_key")
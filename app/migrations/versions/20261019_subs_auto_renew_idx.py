@@ -0,0 +1,22 @@
+"""index subscriptions(auto_renew, expires_at) for the renewal engine"""
+from __future__ import annotations
+
+from alembic import op
+
+# Alembic identifiers
+revision = "20261019_subs_auto_renew_idx"
+down_revision = "20261019_reminders_pending_idx"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # RenewalService: auto_renew = true AND expires_at в окне, keyset по (expires_at, id)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_subscriptions_auto_renew_expires_at "
+        "ON subscriptions (auto_renew, expires_at)"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_subscriptions_auto_renew_expires_at")
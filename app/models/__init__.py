@@ -8,5 +8,7 @@ from .churn_reason import ChurnReason
 from .setting import Setting
 from .material import Material
 from .access_grant import AccessGrant
+from .consent_log import ConsentLog
+from .broadcast import Broadcast, BroadcastDelivery
 
-__all__ = ["Base","User","Subscription","Payment","AccessLink","Reminder","ChurnReason","Setting","Material","AccessGrant"]
+__all__ = ["Base","User","Subscription","Payment","AccessLink","Reminder","ChurnReason","Setting","Material","AccessGrant","ConsentLog","Broadcast","BroadcastDelivery"]
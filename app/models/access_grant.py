@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from sqlalchemy import BigInteger, String, Boolean, DateTime
+from sqlalchemy import BigInteger, String, Boolean, DateTime, Index, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base import Base
@@ -10,6 +10,20 @@ from app.models.base import Base
 
 class AccessGrant(Base):
     __tablename__ = "access_grants"
+    __table_args__ = (
+        # AccessService.get_unexpired_link: живая неиспользованная ссылка пользователя в чат
+        Index(
+            "ix_access_grants_unused_link",
+            "tg_user_id", "chat_id", "invite_expires_at",
+            postgresql_where=text("used IS false"),
+        ),
+        # отзыв доступа: диапазон по access_expires_at
+        Index(
+            "ix_access_grants_access_expires_at",
+            "access_expires_at",
+            postgresql_where=text("access_expires_at IS NOT NULL"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
 
@@ -0,0 +1,34 @@
+# app/models/archive.py
+from __future__ import annotations
+
+from sqlalchemy import Column, DateTime, Table, func
+
+from app.models.access_grant import AccessGrant
+from app.models.base import Base
+from app.models.consent_log import ConsentLog
+from app.models.payment import Payment
+
+
+def _archive_of(src: Table) -> Table:
+    """
+    <таблица>_archive: те же колонки (без FK, индексов и дефолтов — как
+    CREATE TABLE ... (LIKE src) в миграции) + archived_at. PK по id оставлен,
+    чтобы повторный перенос той же строки упал, а не задвоил её.
+    """
+    cols = [
+        Column(c.name, c.type, nullable=c.nullable, primary_key=c.primary_key, autoincrement=False)
+        for c in src.columns
+    ]
+    cols.append(Column("archived_at", DateTime(timezone=True), nullable=False, server_default=func.now()))
+    return Table(f"{src.name}_archive", Base.metadata, *cols)
+
+
+access_grants_archive = _archive_of(AccessGrant.__table__)
+payments_archive = _archive_of(Payment.__table__)
+consent_logs_archive = _archive_of(ConsentLog.__table__)
+
+ARCHIVES = {
+    AccessGrant.__tablename__: access_grants_archive,
+    Payment.__tablename__: payments_archive,
+    ConsentLog.__tablename__: consent_logs_archive,
+}
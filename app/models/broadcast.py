@@ -0,0 +1,54 @@
+# app/models/broadcast.py
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class Broadcast(Base):
+    """Рассылка админа. cursor_user_id — чекпойнт: users.id, до которого аудитория пройдена."""
+
+    __tablename__ = "broadcasts"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+    # all | active | expired | trial | never (app/repositories/broadcast_repo.py)
+    audience: Mapped[str] = mapped_column(String(16), nullable=False)
+    # draft -> running <-> paused -> done | cancelled
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="draft")
+    created_by: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+
+    cursor_user_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    sent: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    failed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    blocked: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class BroadcastDelivery(Base):
+    """
+    Получатель рассылки. Строка pending пишется ДО отправки: после падения такие
+    получатели не повторяются (помечаются unknown) — лучше недослать, чем задвоить.
+    """
+
+    __tablename__ = "broadcast_deliveries"
+    __table_args__ = (
+        Index("ix_broadcast_deliveries_status", "broadcast_id", "status"),
+    )
+
+    broadcast_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("broadcasts.id", ondelete="CASCADE"), primary_key=True
+    )
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # pending | sent | blocked | failed | unknown
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="pending")
+    error: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
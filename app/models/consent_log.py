@@ -0,0 +1,31 @@
+# app/models/consent_log.py
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Index, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class ConsentLog(Base):
+    """Журнал согласий на рекуррентные списания (пишется батчами через consent_writer)."""
+
+    __tablename__ = "consent_logs"
+    __table_args__ = (
+        Index("ix_consent_logs_user_id_created_at", "user_id", "created_at"),
+        Index("ix_consent_logs_created_at", "created_at"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    plan: Mapped[str] = mapped_column(String(32), nullable=False)
+    price_rub: Mapped[int] = mapped_column(Integer, nullable=False)
+    period_days: Mapped[int] = mapped_column(Integer, nullable=False)
+    consent_text: Mapped[str] = mapped_column(Text, nullable=False)
+    offer_url: Mapped[str] = mapped_column(String(255), nullable=False)
+    privacy_url: Mapped[str] = mapped_column(String(255), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
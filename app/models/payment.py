@@ -19,6 +19,9 @@ class Payment(Base):
     # 🔹 увеличено до 64 символов (UUID/hashes)
     provider_invoice_id: Mapped[str] = mapped_column(String(64), nullable=False, unique=True)
 
+    # ключ идемпотентности автопродления (renew:<sub>:<expires>:<attempt>), у обычных счетов NULL
+    idempotency_key: Mapped[str | None] = mapped_column(String(64), nullable=True, unique=True)
+
     # 🔹 увеличено для надёжности (fake / robokassa / stripe)
     provider: Mapped[str] = mapped_column(String(16), nullable=False)
 
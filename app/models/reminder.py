@@ -1,9 +1,13 @@
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import DateTime, String, func
+from sqlalchemy import DateTime, Index, String, func, text
 from .base import Base
 
 class Reminder(Base):
     __tablename__ = "reminders"
+    __table_args__ = (
+        # очередь диспетчера: только неотправленные, range scan по due_at
+        Index("ix_reminders_pending_due_at", "due_at", postgresql_where=text("sent_at IS NULL")),
+    )
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(index=True)
     kind: Mapped[str] = mapped_column(String(16), index=True) # trial_end | sub_end
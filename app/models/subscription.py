@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from sqlalchemy import String, DateTime, Boolean, ForeignKey, Integer
+from sqlalchemy import String, DateTime, Boolean, ForeignKey, Index, Integer
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
 from app.models.base import Base
@@ -7,6 +7,12 @@ from app.models.base import Base
 
 class Subscription(Base):
     __tablename__ = "subscriptions"
+    __table_args__ = (
+        # выборка движка автопродления (app/services/renewal_service.py)
+        Index("ix_subscriptions_auto_renew_expires_at", "auto_renew", "expires_at"),
+        # активная подписка пользователя: current_for_user / get_active_by_tg
+        Index("ix_subscriptions_user_status_expires", "user_id", "status", "expires_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
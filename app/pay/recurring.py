@@ -0,0 +1,130 @@
+# app/pay/recurring.py
+"""
+Клиенты повторных (рекуррентных) списаний для движка автопродления
+(app/services/renewal_service.py).
+
+    RobokassaRecurringClient — POST /Merchant/Recurring по «материнскому» платежу;
+    StubRecurringClient      — локальная заглушка для нагрузочных прогонов без сети.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+from typing import NamedTuple, Optional, Protocol
+
+import httpx
+
+from app.config import settings
+from app.pay.robokassa import RK_LOGIN, _signature
+
+logger = logging.getLogger(__name__)
+
+RK_RECURRING_ENDPOINT = os.getenv(
+    "ROBOKASSA_RECURRING_ENDPOINT",
+    "https://auth.robokassa.ru/Merchant/Recurring",
+)
+
+
+class ChargeResult(NamedTuple):
+    # paid    — деньги списаны, можно продлевать
+    # pending — запрос принят, итог придёт на ResultURL
+    # failed  — явный отказ, можно пробовать следующей попыткой
+    status: str
+    detail: str = ""
+
+
+class RecurringClient(Protocol):
+    # нужен ли InvId «материнского» платежа (без него списание невозможно)
+    requires_parent: bool
+
+    async def charge(
+        self,
+        *,
+        invoice_id: int,
+        parent_invoice_id: Optional[str],
+        amount_rub: float,
+        description: str,
+    ) -> ChargeResult: ...
+
+    async def close(self) -> None: ...
+
+
+class RobokassaRecurringClient:
+    """
+    Повторное списание Robokassa: подпись MerchantLogin:OutSum:InvoiceID:Password1,
+    ответ "OK..." значит только «принято» — итог приходит на ResultURL с InvId=invoice_id.
+    """
+
+    requires_parent = True
+
+    def __init__(self, endpoint: str = RK_RECURRING_ENDPOINT, *, timeout: float = 15.0, max_connections: int = 50) -> None:
+        self.endpoint = endpoint
+        self._http = httpx.AsyncClient(timeout=timeout, limits=httpx.Limits(max_connections=max_connections))
+
+    async def charge(
+        self,
+        *,
+        invoice_id: int,
+        parent_invoice_id: Optional[str],
+        amount_rub: float,
+        description: str,
+    ) -> ChargeResult:
+        if not parent_invoice_id:
+            return ChargeResult("failed", "no parent invoice")
+        out_sum = f"{amount_rub:.2f}"
+        form = {
+            "MerchantLogin": RK_LOGIN,
+            "InvoiceID": str(invoice_id),
+            "PreviousInvoiceID": str(parent_invoice_id),
+            "OutSum": out_sum,
+            "Description": description,
+            "SignatureValue": _signature(out_sum, invoice_id, {}),
+        }
+        resp = await self._http.post(self.endpoint, data=form)
+        text = resp.text.strip()
+        if resp.status_code == 200 and text.upper().startswith("OK"):
+            return ChargeResult("pending", text[:64])
+        return ChargeResult("failed", f"{resp.status_code}: {text[:120]}")
+
+    async def close(self) -> None:
+        await self._http.aclose()
+
+
+class StubRecurringClient:
+    """Синхронный «банк»: задержка + доля отказов, сразу финальный статус."""
+
+    requires_parent = False
+
+    def __init__(self, *, latency_ms: float = 50.0, jitter_ms: float = 50.0, decline_rate: float = 0.0) -> None:
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.decline_rate = decline_rate
+
+    async def charge(
+        self,
+        *,
+        invoice_id: int,
+        parent_invoice_id: Optional[str],
+        amount_rub: float,
+        description: str,
+    ) -> ChargeResult:
+        await asyncio.sleep((self.latency_ms + random.random() * self.jitter_ms) / 1000)
+        if random.random() < self.decline_rate:
+            return ChargeResult("failed", "declined (stub)")
+        return ChargeResult("paid", "stub")
+
+    async def close(self) -> None:
+        pass
+
+
+def build_recurring_client(kind: Optional[str] = None) -> RecurringClient:
+    kind = (kind or settings.RENEW_CLIENT).lower()
+    if kind == "stub":
+        return StubRecurringClient(
+            latency_ms=float(os.getenv("RENEW_STUB_LATENCY_MS", "50")),
+            jitter_ms=float(os.getenv("RENEW_STUB_JITTER_MS", "50")),
+            decline_rate=float(os.getenv("RENEW_STUB_DECLINE_RATE", "0")),
+        )
+    return RobokassaRecurringClient()
@@ -0,0 +1,172 @@
+# app/repositories/broadcast_repo.py
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, exists, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.broadcast import Broadcast, BroadcastDelivery
+from app.models.subscription import Subscription
+from app.models.user import User
+from app.utils.dates import now_utc
+
+AUDIENCES = ("all", "active", "expired", "trial", "never")
+
+
+def audience_filter(audience: str, now=None):
+    """
+    Условие на users для сегмента рассылки. Заблокировавшие бота отсекаются всегда.
+
+    active  — есть активная неистёкшая подписка;
+    trial   — активная пробная;
+    expired — подписки были, активной нет;
+    never   — подписок не было.
+    """
+    if audience not in AUDIENCES:
+        raise ValueError(f"unknown audience {audience!r}, expected one of {', '.join(AUDIENCES)}")
+    now = now or now_utc()
+    live = and_(
+        Subscription.user_id == User.id,
+        Subscription.status == "active",
+        Subscription.expires_at > now,
+    )
+    any_sub = exists().where(Subscription.user_id == User.id)
+    conds = [User.blocked.is_(False)]
+    if audience == "active":
+        conds.append(exists().where(live))
+    elif audience == "trial":
+        conds.append(exists().where(live, Subscription.is_trial.is_(True)))
+    elif audience == "expired":
+        conds.extend([any_sub, ~exists().where(live)])
+    elif audience == "never":
+        conds.append(~any_sub)
+    return and_(*conds)
+
+
+class BroadcastRepo:
+    def __init__(self, s: AsyncSession):
+        self.s = s
+
+    async def create(self, text: str, audience: str, created_by: Optional[int]) -> Broadcast:
+        audience_filter(audience)  # валидация сегмента до записи
+        b = Broadcast(text=text, audience=audience, status="draft", created_by=created_by)
+        self.s.add(b)
+        await self.s.flush()
+        return b
+
+    async def get(self, broadcast_id: int) -> Optional[Broadcast]:
+        return await self.s.get(Broadcast, broadcast_id, populate_existing=True)
+
+    async def status(self, broadcast_id: int) -> Optional[str]:
+        q = await self.s.execute(select(Broadcast.status).where(Broadcast.id == broadcast_id))
+        return q.scalar_one_or_none()
+
+    async def set_status(self, broadcast_id: int, status: str, *, only_from: Sequence[str] = (), **values: Any) -> bool:
+        """Переход статуса; only_from — из каких статусов он разрешён. False — переход не случился."""
+        stmt = update(Broadcast).where(Broadcast.id == broadcast_id)
+        if only_from:
+            stmt = stmt.where(Broadcast.status.in_(list(only_from)))
+        res = await self.s.execute(stmt.values(status=status, **values))
+        return res.rowcount > 0
+
+    async def start(self, broadcast_id: int) -> bool:
+        """draft/paused -> running; started_at — время первого запуска."""
+        return await self.set_status(
+            broadcast_id, "running", only_from=("draft", "paused"),
+            started_at=func.coalesce(Broadcast.started_at, now_utc()),
+        )
+
+    async def running_ids(self) -> List[int]:
+        q = await self.s.execute(select(Broadcast.id).where(Broadcast.status == "running").order_by(Broadcast.id))
+        return list(q.scalars())
+
+    async def audience_size(self, audience: str) -> int:
+        q = await self.s.execute(select(func.count()).select_from(User).where(audience_filter(audience)))
+        return int(q.scalar_one())
+
+    # ---------- проход по аудитории ----------
+
+    async def next_chunk(self, b: Broadcast, limit: int) -> List[Tuple[int, int]]:
+        """
+        Следующие получатели (users.id, tg_id): keyset по users.id от чекпойнта,
+        без тех, у кого уже есть строка доставки. Короткий запрос на чанк вместо
+        одного курсора на всю аудиторию — транзакция не висит всю рассылку.
+        """
+        delivered = exists().where(
+            BroadcastDelivery.broadcast_id == b.id,
+            BroadcastDelivery.user_id == User.id,
+        )
+        q = await self.s.execute(
+            select(User.id, User.tg_id)
+            .where(User.id > b.cursor_user_id, audience_filter(b.audience), ~delivered)
+            .order_by(User.id)
+            .limit(limit)
+        )
+        return [tuple(r) for r in q.all()]
+
+    async def claim(self, broadcast_id: int, user_ids: Sequence[int]) -> None:
+        """Строки pending до отправки: после падения эти получатели не получат второе сообщение."""
+        if not user_ids:
+            return
+        await self.s.execute(
+            insert(BroadcastDelivery),
+            [{"broadcast_id": broadcast_id, "user_id": uid, "status": "pending"} for uid in user_ids],
+        )
+
+    async def release(self, broadcast_id: int, user_ids: Sequence[int]) -> None:
+        """Снять claim с неотправленных (остановка посреди чанка) — их заберёт следующий запуск."""
+        if not user_ids:
+            return
+        await self.s.execute(
+            BroadcastDelivery.__table__.delete().where(
+                BroadcastDelivery.broadcast_id == broadcast_id,
+                BroadcastDelivery.user_id.in_(list(user_ids)),
+            )
+        )
+
+    async def record(self, broadcast_id: int, outcomes: Sequence[Dict[str, Any]]) -> None:
+        """Итоги чанка одним executemany UPDATE по первичному ключу: {user_id, status, error, sent_at}."""
+        if not outcomes:
+            return
+        await self.s.execute(
+            update(BroadcastDelivery),
+            [{"broadcast_id": broadcast_id, **o} for o in outcomes],
+        )
+
+    async def mark_users_blocked(self, user_ids: Sequence[int]) -> None:
+        if not user_ids:
+            return
+        await self.s.execute(update(User).where(User.id.in_(list(user_ids))).values(blocked=True))
+
+    async def checkpoint(self, broadcast_id: int, cursor_user_id: int, *, sent: int, failed: int, blocked: int) -> None:
+        await self.s.execute(
+            update(Broadcast)
+            .where(Broadcast.id == broadcast_id)
+            .values(
+                cursor_user_id=cursor_user_id,
+                sent=Broadcast.sent + sent,
+                failed=Broadcast.failed + failed,
+                blocked=Broadcast.blocked + blocked,
+            )
+        )
+
+    async def abandon_pending(self, broadcast_id: int) -> int:
+        """
+        pending, оставшиеся от упавшего процесса, -> unknown. Было ли сообщение
+        доставлено — неизвестно; повторять не будем (at-most-once).
+        """
+        res = await self.s.execute(
+            update(BroadcastDelivery)
+            .where(BroadcastDelivery.broadcast_id == broadcast_id, BroadcastDelivery.status == "pending")
+            .values(status="unknown")
+        )
+        return res.rowcount or 0
+
+    async def stats(self, broadcast_id: int) -> Dict[str, int]:
+        q = await self.s.execute(
+            select(BroadcastDelivery.status, func.count())
+            .where(BroadcastDelivery.broadcast_id == broadcast_id)
+            .group_by(BroadcastDelivery.status)
+        )
+        return {status: int(n) for status, n in q.all()}
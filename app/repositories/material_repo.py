@@ -1,9 +1,11 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from app.core.replica import read_only
 from app.models.material import Material
+from app.repositories.read_models import MaterialItem, rows_as, select_view
 
 class MaterialRepo:
     def __init__(self, s: AsyncSession): self.s = s
-    async def list(self) -> list[Material]:
-        q = await self.s.execute(select(Material).order_by(Material.created_at.desc()))
-        return list(q.scalars().all())
+    @read_only
+    async def list(self) -> list[MaterialItem]:
+        q = await self.s.execute(select_view(MaterialItem, Material).order_by(Material.created_at.desc()))
+        return rows_as(MaterialItem, q)
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import Dict, Iterable, Optional
 from decimal import Decimal
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
 
+from app.core.replica import read_only
 from app.models.payment import Payment
+from app.repositories.read_models import PaymentView, row_as, select_view
 from app.config import settings
 
 
@@ -23,6 +25,7 @@ class PaymentRepo:
         provider: str,
         provider_invoice_id: str,
         status: str = "pending",
+        idempotency_key: Optional[str] = None,
     ) -> Payment:
         p = Payment(
             user_id=user_id,
@@ -31,34 +34,36 @@ class PaymentRepo:
             plan=plan,
             provider=provider,
             provider_invoice_id=provider_invoice_id,
+            idempotency_key=idempotency_key,
             status=status,
         )
         self.s.add(p)
-        await self.s.commit()
-        await self.s.refresh(p)
+        await self.s.flush()
         return p
 
+    # свежий счёт мог ещё не доехать до реплики — промах перепроверяем на primary
+    @read_only(fallback_on_none=True)
     async def get_by_provider_invoice(
         self,
         provider: str,
         provider_invoice_id: str,
-    ) -> Optional[Payment]:
+    ) -> Optional[PaymentView]:
         res = await self.s.execute(
-            select(Payment).where(
+            select_view(PaymentView, Payment, skip=("tg_user_id",)).where(
                 Payment.provider == provider,
                 Payment.provider_invoice_id == provider_invoice_id,
             )
         )
-        return res.scalar_one_or_none()
+        return row_as(PaymentView, res.one_or_none())
 
     # Алиасы под разные ожидания сервисов
-    async def get_by_invoice_id(self, invoice_id: str) -> Optional[Payment]:
+    async def get_by_invoice_id(self, invoice_id: str) -> Optional[PaymentView]:
         return await self.get_by_provider_invoice(settings.PAYMENT_PROVIDER, invoice_id)
 
-    async def get_by_invoice(self, invoice_id: str) -> Optional[Payment]:
+    async def get_by_invoice(self, invoice_id: str) -> Optional[PaymentView]:
         return await self.get_by_invoice_id(invoice_id)
 
-    async def get_by_provider_invoice_id(self, invoice_id: str) -> Optional[Payment]:
+    async def get_by_provider_invoice_id(self, invoice_id: str) -> Optional[PaymentView]:
         return await self.get_by_invoice_id(invoice_id)
 
     async def set_paid(self, payment_id: int) -> None:
@@ -67,7 +72,6 @@ class PaymentRepo:
             .where(Payment.id == payment_id)
             .values(status="paid")
         )
-        await self.s.commit()
 
     # Алиасы под _repo_mark_paid в PaymentService
     async def mark_paid(self, payment_id: int) -> None:
@@ -79,7 +83,6 @@ class PaymentRepo:
             .where(Payment.id == payment_id)
             .values(status=status)
         )
-        await self.s.commit()
 
     async def update(self, payment_id: int, values: dict) -> None:
         await self.s.execute(
@@ -87,4 +90,45 @@ class PaymentRepo:
             .where(Payment.id == payment_id)
             .values(**values)
         )
-        await self.s.commit()
+
+    # ---- автопродление (app/services/renewal_service.py) ----
+
+    async def statuses_by_key(self, idempotency_keys: Iterable[str]) -> Dict[str, str]:
+        """idempotency_key -> status для уже существующих платежей из списка (один запрос)."""
+        keys = list(idempotency_keys)
+        if not keys:
+            return {}
+        res = await self.s.execute(
+            select(Payment.idempotency_key, Payment.status)
+            .where(Payment.idempotency_key.in_(keys))
+        )
+        return {row.idempotency_key: row.status for row in res}
+
+    async def get_for_update_by_invoice(self, provider_invoice_id: str) -> Optional[Payment]:
+        """Строка платежа по provider_invoice_id под FOR UPDATE (primary, без read-модели)."""
+        res = await self.s.execute(
+            select(Payment)
+            .where(Payment.provider_invoice_id == provider_invoice_id)
+            .with_for_update()
+        )
+        return res.scalar_one_or_none()
+
+    async def parent_invoices(self, user_ids: Iterable[int]) -> Dict[int, str]:
+        """
+        user_id -> InvId последнего оплаченного «материнского» платежа (числовой
+        provider_invoice_id, как его создаёт хендлер оплаты), одним запросом.
+        Сами автопродления (idempotency_key задан) материнскими не бывают.
+        """
+        ids = list(user_ids)
+        if not ids:
+            return {}
+        res = await self.s.execute(
+            select(Payment.user_id, Payment.provider_invoice_id)
+            .distinct(Payment.user_id)
+            .where(Payment.user_id.in_(ids))
+            .where(Payment.status == "paid")
+            .where(Payment.provider_invoice_id.regexp_match("^[0-9]+$"))
+            .where(Payment.idempotency_key.is_(None))
+            .order_by(Payment.user_id, Payment.id.desc())
+        )
+        return {row.user_id: row.provider_invoice_id for row in res}
@@ -0,0 +1,86 @@
+# app/repositories/read_models.py
+"""
+Лёгкие read-модели для горячих путей чтения.
+
+ORM-сущность — это identity map, InstanceState, история атрибутов и
+expire/refresh; для «прочитать и отдать дальше» всё это лишнее. Read-модель —
+frozen dataclass со __slots__, заполняется из Core select() только нужных
+колонок: select_view(View, Model) выбирает колонки по именам полей,
+rows_as(View, result) собирает объекты позиционно, без словарей.
+
+Read-модели не привязаны к сессии: их безопасно возвращать из @read_only
+методов (реплика) и держать после commit/close. Менять — только через репозиторий.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Iterable, List, Optional, Type, TypeVar
+
+from sqlalchemy import Select, select
+
+V = TypeVar("V")
+
+
+@dataclass(slots=True, frozen=True)
+class ExpiredAccess:
+    """Истёкший доступ в чат (revoke_expired_job)."""
+    id: int
+    tg_user_id: int
+    chat_id: int
+    access_expires_at: Optional[datetime]
+
+
+@dataclass(slots=True, frozen=True)
+class SubscriptionView:
+    """Подписка пользователя: то, что читают хендлеры, напоминания и энтайтлменты."""
+    id: Optional[int]
+    user_id: int
+    plan: str
+    status: str
+    is_trial: bool
+    auto_renew: bool
+    started_at: Optional[datetime]
+    expires_at: datetime
+
+
+@dataclass(slots=True, frozen=True)
+class MaterialItem:
+    """Строка каталога бесплатных материалов."""
+    id: int
+    title: str
+    description: Optional[str]
+    payload: Optional[str]
+
+
+@dataclass(slots=True, frozen=True)
+class PaymentView:
+    """Платёж для подтверждения оплаты; id=None — запись в БД не создана."""
+    id: Optional[int]
+    user_id: int
+    plan: str
+    amount: Decimal | int | float
+    currency: str
+    provider: str
+    provider_invoice_id: str
+    status: str
+    tg_user_id: Optional[int] = None
+
+
+def view_columns(view: type) -> List[str]:
+    return [f.name for f in fields(view)]
+
+
+def select_view(view: type, model: Any, *, skip: Iterable[str] = ()) -> Select:
+    """select() колонок модели с именами полей read-модели (в порядке полей)."""
+    skip = set(skip)
+    return select(*[getattr(model, name) for name in view_columns(view) if name not in skip])
+
+
+def rows_as(view: Type[V], rows: Iterable[Any]) -> List[V]:
+    return [view(*row) for row in rows]
+
+
+def row_as(view: Type[V], row: Any) -> Optional[V]:
+    return view(*row) if row is not None else None
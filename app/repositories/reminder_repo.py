@@ -1,7 +1,42 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
-from datetime import datetime, timezone
+from sqlalchemy import and_, delete, exists, insert, select, update
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence
 from app.models.reminder import Reminder
+from app.models.subscription import Subscription
+from app.models.user import User
+
+# опрос причин оттока после окончания подписки (app/services/churn_service.py)
+CHURN_KIND = "churn"
+# привязаны к дате окончания подписки; их расписание пересчитывается при продлении
+EXPIRY_KINDS = ("trial_end", "sub_end", CHURN_KIND)
+
+
+def expiry_schedule(
+    user_id: int,
+    *,
+    expires_at,
+    is_trial: bool,
+    hours_before: Iterable[int],
+    churn_after_hours: Optional[int] = None,
+    now=None,
+) -> List[Dict[str, Any]]:
+    """
+    Строки reminders для одной подписки: по одной на каждое hours_before, прошедшие
+    пропускаем; churn_after_hours — ещё опрос оттока через столько часов после окончания.
+    Продление пересчитывает расписание, так что опрос уходит только не продлившим.
+    """
+    now = now or datetime.now(timezone.utc)
+    kind = "trial_end" if is_trial else "sub_end"
+    rows = []
+    for h in sorted(set(hours_before), reverse=True):
+        due_at = expires_at - timedelta(hours=h)
+        if due_at > now:
+            rows.append({"user_id": user_id, "kind": kind, "due_at": due_at})
+    if churn_after_hours:
+        rows.append({"user_id": user_id, "kind": CHURN_KIND, "due_at": expires_at + timedelta(hours=churn_after_hours)})
+    return rows
+
 
 class ReminderRepo:
     def __init__(self, s: AsyncSession):
@@ -10,8 +45,7 @@ class ReminderRepo:
     async def create(self, user_id: int, kind: str, due_at) -> Reminder:
         r = Reminder(user_id=user_id, kind=kind, due_at=due_at)
         self.s.add(r)
-        await self.s.commit()
-        await self.s.refresh(r)
+        await self.s.flush()
         return r
 
     async def due(self, now):
@@ -20,9 +54,67 @@ class ReminderRepo:
         )
         return q.scalars().all()
 
+    async def claim_due(self, now, limit: int):
+        """
+        Забираем пачку просроченных напоминаний под FOR UPDATE SKIP LOCKED:
+        строки, уже взятые другим воркером, пропускаются, блокировки живут до
+        commit/rollback текущей транзакции. Возвращаем (id, user_id, kind, tg_id, subscribed);
+        subscribed — есть живая подписка (опрос оттока такому не шлём).
+        """
+        live = exists().where(and_(
+            Subscription.user_id == Reminder.user_id,
+            Subscription.status == "active",
+            Subscription.expires_at > now,
+        ))
+        q = await self.s.execute(
+            select(Reminder.id, Reminder.user_id, Reminder.kind, User.tg_id, live.label("subscribed"))
+            .outerjoin(User, User.id == Reminder.user_id)
+            .where(Reminder.sent_at.is_(None), Reminder.due_at <= now)
+            .order_by(Reminder.due_at)
+            .limit(limit)
+            .with_for_update(of=Reminder, skip_locked=True)
+        )
+        return q.all()
+
     async def mark_sent(self, rid: int):
         ts = datetime.now(timezone.utc)
         await self.s.execute(
             update(Reminder).where(Reminder.id == rid).values(sent_at=ts)
         )
-        await self.s.commit()
+
+    async def mark_sent_many(self, ids: Sequence[int]) -> None:
+        """Один UPDATE на пачку; commit — на вызывающем (он же снимает блокировки claim_due)."""
+        if not ids:
+            return
+        ts = datetime.now(timezone.utc)
+        await self.s.execute(
+            update(Reminder).where(Reminder.id.in_(list(ids))).values(sent_at=ts)
+        )
+
+    async def replace_pending(self, user_ids: Sequence[int], rows: List[Dict[str, Any]]) -> None:
+        """
+        Заменяет неотправленные expiry-напоминания пользователей: один DELETE
+        + один multi-row INSERT. Уже отправленные и напоминания других типов не трогаем.
+        Commit — на вызывающем (сервис / UnitOfWork).
+        """
+        if user_ids:
+            await self.s.execute(
+                delete(Reminder)
+                .where(Reminder.user_id.in_(list(user_ids)))
+                .where(Reminder.kind.in_(EXPIRY_KINDS))
+                .where(Reminder.sent_at.is_(None))
+            )
+        if rows:
+            await self.s.execute(insert(Reminder), rows)
+
+    async def schedule_expiry(self, sub, hours_before: Iterable[int], churn_after_hours: Optional[int] = None) -> int:
+        """Пересчитать расписание напоминаний (и опроса оттока) для активированной/продлённой подписки."""
+        rows = expiry_schedule(
+            sub.user_id,
+            expires_at=sub.expires_at,
+            is_trial=bool(sub.is_trial),
+            hours_before=hours_before,
+            churn_after_hours=churn_after_hours,
+        )
+        await self.replace_pending([sub.user_id], rows)
+        return len(rows)
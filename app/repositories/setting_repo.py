@@ -1,18 +1,38 @@
+import json
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.config import settings
+from app.core.replica import read_only
 from app.models.setting import Setting
 
+# ключ -> новое значение, применяется к in-process кэшу после commit (app/services/settings_cache.py)
+PENDING = "settings_pending"
+
 class SettingRepo:
     def __init__(self, s: AsyncSession): self.s = s
+    # горячие пути читают из памяти: app.services.settings_cache.settings_cache.get()
+    @read_only
     async def get(self, key: str) -> str | None:
-        q = await self.s.execute(select(Setting).where(Setting.key==key))
-        row = q.scalar_one_or_none()
-        return row.value if row else None
+        q = await self.s.execute(select(Setting.value).where(Setting.key==key))
+        return q.scalar_one_or_none()
+    async def all(self) -> dict[str, str]:
+        q = await self.s.execute(select(Setting.key, Setting.value))
+        return {k: v for k, v in q}
     async def set(self, key: str, value: str) -> None:
-        v = await self.s.execute(select(Setting).where(Setting.key==key))
-        row = v.scalar_one_or_none()
-        if row:
-            row.value = value
-        else:
-            self.s.add(Setting(key=key, value=value))
-        await self.s.commit()
+        """
+        Один upsert вместо SELECT + INSERT/UPDATE. На Postgres в той же транзакции
+        pg_notify: остальные процессы получат изменение ровно после commit
+        (при rollback — не получат).
+        """
+        dialect = self.s.bind.dialect.name if self.s.bind is not None else ""
+        ins = pg_insert(Setting) if dialect == "postgresql" else sqlite_insert(Setting)
+        await self.s.execute(
+            ins.values(key=key, value=value)
+            .on_conflict_do_update(index_elements=[Setting.key], set_={"value": value})
+        )
+        if dialect == "postgresql":
+            payload = json.dumps({"k": key, "v": value}, ensure_ascii=False)
+            await self.s.execute(select(func.pg_notify(settings.SETTINGS_NOTIFY_CHANNEL, payload)))
+        self.s.info.setdefault(PENDING, {})[key] = value
@@ -1,13 +1,15 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
-from typing import Optional
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import insert, select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.replica import read_only
 from app.models.subscription import Subscription
 from app.models.user import User
+from app.repositories.read_models import SubscriptionView, row_as, select_view
 
 
 def now_utc() -> datetime:
@@ -19,15 +21,15 @@ class SubscriptionRepo:
         self.s = s
         self.model = Subscription
 
-    async def current_for_user(self, user_id: int) -> Optional[Subscription]:
+    async def current_for_user(self, user_id: int) -> Optional[SubscriptionView]:
         q = await self.s.execute(
-            select(Subscription)
+            select_view(SubscriptionView, Subscription)
             .where(Subscription.user_id == user_id)
             .where(Subscription.status == "active")
             .order_by(Subscription.expires_at.desc())
             .limit(1)
         )
-        return q.scalar_one_or_none()
+        return row_as(SubscriptionView, q.first())
 
     async def create(
         self,
@@ -49,8 +51,7 @@ class SubscriptionRepo:
             auto_renew=auto_renew,
         )
         self.s.add(sub)
-        await self.s.commit()
-        await self.s.refresh(sub)
+        await self.s.flush()
         return sub
 
     async def create_or_extend(
@@ -61,27 +62,28 @@ class SubscriptionRepo:
         new_expires_at: datetime,
         is_trial: bool,
         auto_renew: bool,
-    ) -> Subscription:
-        cur = await self.current_for_user(user_id)
-        if cur and cur.expires_at > now_utc() and cur.status == "active":
-            cur.plan = plan
-            cur.started_at = now_utc()
-            cur.expires_at = new_expires_at
-            cur.is_trial = is_trial
-            cur.auto_renew = auto_renew
-            await self.s.commit()
-            await self.s.refresh(cur)
-            return cur
-
-        return await self.create(
-            user_id=user_id,
+    ) -> SubscriptionView:
+        """
+        Продлить активную подписку или завести новую. Без гидратации ORM:
+        UPDATE/INSERT ... RETURNING id, результат — SubscriptionView из записанных значений.
+        """
+        values = dict(
             plan=plan,
+            started_at=now_utc(),
             expires_at=new_expires_at,
-            status="active",
             is_trial=is_trial,
             auto_renew=auto_renew,
         )
 
+        cur = await self.current_for_user(user_id)
+        if cur and cur.expires_at > now_utc() and cur.status == "active":
+            stmt = update(Subscription).where(Subscription.id == cur.id).values(**values)
+        else:
+            stmt = insert(Subscription).values(user_id=user_id, status="active", **values)
+        sub_id = (await self.s.execute(stmt.returning(Subscription.id))).scalar_one()
+        return SubscriptionView(id=sub_id, user_id=user_id, status="active", **values)
+
+    @read_only
     async def has_active_by_tg(self, tg_user_id: int) -> bool:
         """
         Проверка активной подписки по Telegram ID.
@@ -95,3 +97,53 @@ class SubscriptionRepo:
             .limit(1)
         )
         return q.scalar_one_or_none() is not None
+
+    @read_only
+    async def get_active_by_tg(self, tg_user_id: int) -> Optional[Tuple[str, datetime]]:
+        """
+        (plan, expires_at) самой длинной активной подписки по Telegram ID, либо None.
+        Один запрос вместо has_active_by_tg + current_for_user.
+        """
+        q = await self.s.execute(
+            select(Subscription.plan, Subscription.expires_at)
+            .join(User, User.id == Subscription.user_id)
+            .where(User.tg_id == tg_user_id)
+            .where(Subscription.status == "active")
+            .where(Subscription.expires_at > now_utc())
+            .order_by(Subscription.expires_at.desc())
+            .limit(1)
+        )
+        row = q.first()
+        return (row.plan, row.expires_at) if row is not None else None
+
+    async def due_for_renewal(
+        self,
+        now: datetime,
+        *,
+        window_hours: int,
+        grace_hours: int,
+        limit: int,
+        after: Optional[Tuple[datetime, int]] = None,
+    ):
+        """
+        Пачка подписок с автопродлением, истекающих в окне (now - grace, now + window].
+        Keyset по (expires_at, id), идёт по индексу (auto_renew, expires_at).
+        """
+        q = (
+            select(
+                Subscription.id,
+                Subscription.user_id,
+                Subscription.plan,
+                Subscription.is_trial,
+                Subscription.expires_at,
+            )
+            .where(Subscription.auto_renew.is_(True))
+            .where(Subscription.expires_at <= now + timedelta(hours=window_hours))
+            .where(Subscription.expires_at > now - timedelta(hours=grace_hours))
+            .where(Subscription.status == "active")
+            .order_by(Subscription.expires_at, Subscription.id)
+            .limit(limit)
+        )
+        if after is not None:
+            q = q.where(tuple_(Subscription.expires_at, Subscription.id) > tuple_(*after))
+        return (await self.s.execute(q)).all()
@@ -1,5 +1,6 @@
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.replica import read_only
 from app.models.user import User
 
 
@@ -11,6 +12,11 @@ class UserRepository:
         q = await self.s.execute(select(User).where(User.tg_id == tg_id))
         return q.scalar_one_or_none()
 
+    @read_only(fallback_on_none=True)
+    async def id_by_tg_id(self, tg_id: int) -> int | None:
+        q = await self.s.execute(select(User.id).where(User.tg_id == tg_id))
+        return q.scalar_one_or_none()
+
     async def create_from_tg(self, tg_user) -> User:
         u = User(
             tg_id=tg_user.id,
@@ -19,8 +25,7 @@ class UserRepository:
             last_name=getattr(tg_user, "last_name", None),
         )
         self.s.add(u)
-        await self.s.commit()
-        await self.s.refresh(u)
+        await self.s.flush()
         return u
 
     async def get_or_create_by_tg_id(self, tg_id: int, **kwargs) -> User:
@@ -34,6 +39,10 @@ class UserRepository:
             last_name = None
         return await self.create_from_tg(TG())
 
+    async def set_blocked(self, tg_id: int, blocked: bool) -> None:
+        """users.blocked: заблокировавшие бота не попадают в рассылки (app/repositories/broadcast_repo.py)."""
+        await self.s.execute(update(User).where(User.tg_id == tg_id).values(blocked=blocked))
+
 
 UserRepo = UserRepository
 __all__ = ["UserRepository", "UserRepo"]
@@ -1,15 +1,29 @@
 # app/scheduler/jobs.py
 from __future__ import annotations
 
+import logging
 import os
-from typing import Set, Tuple
+from datetime import datetime, timedelta
+from typing import Optional, Set, Tuple
 
 from aiogram.client.bot import Bot
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.db import SessionLocal
+from app.repositories.reminder_repo import ReminderRepo
 from app.services.access_service import AccessService
+from app.services.broadcast_service import broadcaster
+from app.services.deadline_index import deadline_index
+from app.services.entitlements import entitlements
+from app.services.reminder_service import ReminderService
+from app.services.renewal_service import RenewalService
+from app.services.retention_service import RetentionService
+from app.pay.recurring import build_recurring_client
+from app.scheduler.locks import LeaderElector, leader_only
+
+logger = logging.getLogger(__name__)
 
 # Эти переменные нужны не для джобы самой по себе,
 # но часто удобно иметь их под рукой (логи/диагностика).
@@ -20,7 +34,9 @@ CONTENT_CHAT_ID = int(os.getenv("CONTENT_CHAT_ID", "0"))
 async def revoke_expired_job(bot: Bot) -> None:
     """
     Периодическая задача: находит просроченные доступы и выгоняет людей из чатов.
-    Идём по записям access_grants с access_expires_at < now.
+    Идём по записям access_grants с access_expires_at < now, но кикаем пару
+    (чат, пользователь), только если у неё нет более поздней живой выдачи
+    (продлил / оплатил заново) — как и цикл дедлайнов, через latest_expiry.
     """
     async with SessionLocal() as session:  # type: AsyncSession
         svc = AccessService(session, bot)
@@ -30,30 +46,141 @@ async def revoke_expired_job(bot: Bot) -> None:
             return
 
         # Не пинаем одного и того же юзера по одному чату много раз.
-        seen: Set[Tuple[int, int]] = set()
-        for g in expired:
-            key = (g.tg_user_id, g.chat_id)
-            if key in seen:
-                continue
-            seen.add(key)
+        pairs = list(dict.fromkeys((g.chat_id, g.tg_user_id) for g in expired))
+        now = datetime.utcnow()
+        latest = await svc.latest_expiry(pairs)
+        due = [p for p in pairs if not (latest.get(p) is not None and latest[p] > now)]
+        if not due:
+            return
 
+        # истёкшие подписки не должны доживать в кэше до своего TTL
+        entitlements.invalidate_many({user_id for _, user_id in due})
+
+        for chat_id, user_id in due:
             try:
-                await svc.revoke_access(chat_id=g.chat_id, user_id=g.tg_user_id)
+                await svc.revoke_access(chat_id=chat_id, user_id=user_id)
             except Exception:
-                # Тут можно логировать, если у тебя есть общий logger.
-                # Но падать не нужно: едем дальше.
-                pass
+                logger.exception("revoke failed chat=%s user=%s", chat_id, user_id)
+
+
+async def deadline_revoke_job(bot: Bot) -> None:
+    """
+    Отзыв доступа по индексу дедлайнов (Redis ZSET): забираем только наступившие
+    дедлайны, сверяем с БД (вдруг доступ уже продлён) и кикаем. Работает раз в
+    DEADLINE_POLL_S секунд, так что доступ снимается через секунды после истечения.
+    pop_due атомарен — цикл можно крутить на всех репликах.
+
+    pop_due уже удалил пачку из ZSET: если обработка упала посреди пачки,
+    необработанные дедлайны возвращаются в индекс через DEADLINE_RETRY_S.
+    """
+    while True:
+        now = datetime.utcnow()
+        due = await deadline_index.pop_due(now, settings.DEADLINE_BATCH)
+        if not due:
+            return
+
+        retry_at = now + timedelta(seconds=settings.DEADLINE_RETRY_S)
+        handled: Set[Tuple[int, int]] = set()
+        retry = []
+        revoked = set()
+        try:
+            async with SessionLocal() as session:  # type: AsyncSession
+                svc = AccessService(session, bot)
+                latest = await svc.latest_expiry(due)
+
+                for chat_id, user_id in due:
+                    exp = latest.get((chat_id, user_id))
+                    if exp is not None and exp > now:
+                        # продлили, а ZADD GT потерялся — ставим настоящий дедлайн
+                        await deadline_index.reschedule_at([(chat_id, user_id)], exp)
+                        handled.add((chat_id, user_id))
+                        continue
+                    try:
+                        await svc.revoke_access(chat_id=chat_id, user_id=user_id)
+                        revoked.add(user_id)
+                    except Exception:
+                        logger.exception("deadline revoke failed chat=%s user=%s", chat_id, user_id)
+                        retry.append((chat_id, user_id))
+                    handled.add((chat_id, user_id))
+        except Exception:
+            rest = [k for k in due if k not in handled]
+            logger.exception("deadlines: batch failed, %d deadlines back to index", len(rest))
+            await deadline_index.reschedule_at(rest + retry, retry_at)
+            entitlements.invalidate_many(revoked)
+            return
+
+        entitlements.invalidate_many(revoked)
+        if retry:
+            await deadline_index.reschedule_at(retry, retry_at)
+        logger.info("deadlines: due=%d revoked=%d retry=%d", len(due), len(revoked), len(retry))
+        if len(due) < settings.DEADLINE_BATCH:
+            return
+
+
+async def send_reminders_job(bot: Bot) -> None:
+    """
+    Рассылка просроченных напоминаний. Пачки забираются через FOR UPDATE SKIP LOCKED,
+    так что джоба может крутиться сразу в нескольких процессах.
+    """
+    async with SessionLocal() as session:  # type: AsyncSession
+        await ReminderService(session, ReminderRepo(session), bot).tick()
+
+
+async def renew_subscriptions_job() -> None:
+    """Автопродление: повторные списания по подпискам, истекающим в окне RENEW_WINDOW_HOURS."""
+    client = build_recurring_client()
+    try:
+        await RenewalService(client).run()
+    finally:
+        await client.close()
+
+
+async def retention_job() -> None:
+    """Ретеншн: устаревшие access_grants / брошенные платежи / старые согласия — в *_archive."""
+    await RetentionService().run()
+
+
+async def broadcast_job(bot: Bot) -> None:
+    """
+    Подхват рассылок в статусе running: запущенных из админки другой репликой,
+    прерванных рестартом или падением. Каждая идёт под своим job_lock — на всех
+    репликах безопасно, отправляет только одна.
+    """
+    await broadcaster.resume_running(bot)
 
 
-def setup_scheduler(scheduler: AsyncIOScheduler, bot: Bot) -> None:
+def setup_scheduler(scheduler: AsyncIOScheduler, bot: Bot, leader: Optional[LeaderElector] = None) -> None:
     """
     Регистрирует все периодические задачи.
     Вызывается один раз при старте приложения.
+
+    С leader (app/scheduler/locks.py) revoke/renew/retention выполняются только на одной реплике;
+    send_reminders_job (SKIP LOCKED), deadline_revoke_job (атомарный pop из ZSET)
+    и broadcast_job (job_lock на рассылку) и так делят работу и крутятся на всех.
     """
+    def single(job, job_id):
+        return leader_only(job, leader, job_id) if leader is not None else job
+
+    if deadline_index.enabled:
+        # дедлайны в Redis ZSET: O(наступивших) раз в несколько секунд вместо скана раз в 10 минут
+        scheduler.add_job(
+            deadline_revoke_job,
+            trigger="interval",
+            seconds=settings.DEADLINE_POLL_S,
+            kwargs={"bot": bot},
+            id="deadline_revoke_job",
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+            misfire_grace_time=30,
+        )
+
+    # С индексом скан остаётся редкой страховкой: гранты, выданные до появления
+    # индекса (без make rebuild-deadlines), и дедлайны, потерянные вместе с Redis.
     scheduler.add_job(
-        revoke_expired_job,
+        single(revoke_expired_job, "revoke_expired_job"),
         trigger="interval",
-        minutes=10,               # каждые 10 минут
+        minutes=settings.DEADLINE_BACKSTOP_MIN if deadline_index.enabled else 10,
         kwargs={"bot": bot},
         id="revoke_expired_job",
         replace_existing=True,
@@ -61,3 +188,51 @@ def setup_scheduler(scheduler: AsyncIOScheduler, bot: Bot) -> None:
         max_instances=1,
         misfire_grace_time=60,    # если проспали, даём минуту на отработку
     )
+
+    scheduler.add_job(
+        send_reminders_job,
+        trigger="interval",
+        seconds=settings.REMINDERS_INTERVAL_S,
+        kwargs={"bot": bot},
+        id="send_reminders_job",
+        replace_existing=True,
+        coalesce=True,
+        max_instances=1,
+        misfire_grace_time=60,
+    )
+
+    scheduler.add_job(
+        broadcast_job,
+        trigger="interval",
+        seconds=settings.BROADCAST_POLL_S,
+        kwargs={"bot": bot},
+        id="broadcast_job",
+        replace_existing=True,
+        coalesce=True,
+        max_instances=1,
+        misfire_grace_time=60,
+    )
+
+    if settings.RK_RECURRING_ENABLED:
+        scheduler.add_job(
+            single(renew_subscriptions_job, "renew_subscriptions_job"),
+            trigger="interval",
+            minutes=settings.RENEW_INTERVAL_MIN,
+            id="renew_subscriptions_job",
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+            misfire_grace_time=300,
+        )
+
+    scheduler.add_job(
+        single(retention_job, "retention_job"),
+        trigger="cron",
+        hour=settings.RETENTION_HOUR_UTC,
+        minute=0,
+        id="retention_job",
+        replace_existing=True,
+        coalesce=True,
+        max_instances=1,
+        misfire_grace_time=3600,
+    )
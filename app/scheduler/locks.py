@@ -0,0 +1,173 @@
+# app/scheduler/locks.py
+from __future__ import annotations
+
+import asyncio
+import functools
+import hashlib
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+
+def advisory_key(name: str) -> int:
+    """Стабильный signed int64 для pg_advisory_lock из имени (hash() в Python рандомизирован)."""
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "big", signed=True)
+
+
+def _is_pg(engine: AsyncEngine) -> bool:
+    return engine.dialect.name == "postgresql"
+
+
+class LeaderElector:
+    """
+    Выбор лидера среди реплик бота на session-level advisory lock Postgres.
+
+    Лидер держит pg_advisory_lock на отдельном соединении всё время жизни процесса
+    и раз в check_interval пингует его. Остальные реплики раз в check_interval
+    пробуют pg_try_advisory_lock. Если лидер умер, Postgres закрывает его соединение
+    и снимает блокировку — следующая реплика становится лидером на ближайшей проверке.
+
+    Не-Postgres БД (локальная разработка) — всегда лидер.
+    """
+
+    def __init__(self, engine: AsyncEngine, *, name: str = "scheduler-leader", check_interval: float = 15.0) -> None:
+        self.engine = engine
+        self.name = name
+        self.key = advisory_key(name)
+        self.check_interval = check_interval
+        self._conn: Optional[AsyncConnection] = None
+        self._leader = not _is_pg(engine)
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._leader
+
+    async def start(self) -> None:
+        if not _is_pg(self.engine) or self._task is not None:
+            return
+        await self._check()
+        self._task = asyncio.get_running_loop().create_task(self._run(), name=f"leader:{self.name}")
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        if self._conn is not None:
+            if self._leader:
+                try:
+                    await self._conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": self.key})
+                    await self._conn.commit()
+                except Exception:
+                    logger.exception("leader %s: unlock failed", self.name)
+            await self._drop_conn()
+        self._leader = False
+
+    async def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.check_interval)
+            except asyncio.TimeoutError:
+                await self._check()
+
+    async def _check(self) -> None:
+        try:
+            if self._conn is None:
+                self._conn = await self.engine.connect()
+            if self._leader:
+                await self._conn.execute(text("SELECT 1"))
+            else:
+                got = (await self._conn.execute(
+                    text("SELECT pg_try_advisory_lock(:k)"), {"k": self.key}
+                )).scalar()
+                if got:
+                    self._leader = True
+                    logger.info("leader %s: acquired, scheduler jobs run in this process", self.name)
+            # session-level lock переживает commit; не держим соединение idle in transaction
+            await self._conn.commit()
+        except Exception as e:
+            if self._leader:
+                logger.exception("leader %s: lost connection, stepping down", self.name)
+            else:
+                logger.warning("leader %s: check failed: %r", self.name, e)
+            self._leader = False
+            await self._drop_conn()
+
+    async def _drop_conn(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        try:
+            # invalidate, а не возврат в пул: физическое соединение закрывается
+            # и блокировка гарантированно не «переезжает» в чужую сессию
+            await conn.invalidate()
+            await conn.close()
+        except Exception:
+            pass
+
+
+@asynccontextmanager
+async def job_lock(engine: AsyncEngine, name: str) -> AsyncIterator[bool]:
+    """
+    Неблокирующая блокировка на время одного запуска джобы: True — взяли, False —
+    такой же запуск уже идёт в другом процессе. Страхует переходный момент смены лидера.
+    """
+    if not _is_pg(engine):
+        yield True
+        return
+    key = advisory_key(f"job:{name}")
+    async with engine.connect() as conn:
+        got = bool((await conn.execute(text("SELECT pg_try_advisory_lock(:k)"), {"k": key})).scalar())
+        await conn.commit()
+        try:
+            yield got
+        finally:
+            if got:
+                await _unlock_or_invalidate(conn, key, name)
+
+
+async def _unlock_or_invalidate(conn: AsyncConnection, key: int, name: str) -> None:
+    """
+    Снять session-level lock. Если unlock не прошёл (обрыв, отмена задачи при
+    остановке), соединение нельзя возвращать в пул с блокировкой — invalidate,
+    как в LeaderElector._drop_conn: Postgres снимет её вместе с сессией.
+    """
+    try:
+        await conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": key})
+        await conn.commit()
+    except BaseException as e:
+        if not isinstance(e, asyncio.CancelledError):
+            logger.warning("job lock %s: unlock failed, dropping connection: %r", name, e)
+        try:
+            await conn.invalidate()
+        except Exception:
+            pass
+        if not isinstance(e, Exception):
+            raise
+
+
+def leader_only(
+    job: Callable[..., Awaitable[None]],
+    elector: LeaderElector,
+    name: str,
+) -> Callable[..., Awaitable[None]]:
+    """Обёртка джобы планировщика: тик выполняется только на лидере и под job_lock."""
+
+    @functools.wraps(job)
+    async def wrapped(*args, **kwargs) -> None:
+        if not elector.is_leader:
+            return
+        async with job_lock(elector.engine, name) as got:
+            if not got:
+                logger.info("job %s: already running elsewhere, skip tick", name)
+                return
+            await job(*args, **kwargs)
+
+    return wrapped
@@ -0,0 +1,82 @@
+# app/scripts/backfill_reminders.py
+"""
+Разовое заполнение reminders для уже действующих подписок.
+
+Идём по активным подпискам пачками (keyset по user_id, одна — самая длинная —
+подписка на пользователя) и на каждую пачку делаем один DELETE неотправленных
+expiry-напоминаний + один multi-row INSERT нового расписания по REMINDERS_HOURS_BEFORE
+(и опроса оттока по CHURN_SURVEY_AFTER_H).
+Повторный запуск безопасен: расписание просто пересчитывается.
+
+Запуск:
+    python -m app.scripts.backfill_reminders --batch 1000
+    python -m app.scripts.backfill_reminders --dry-run
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.db import SessionLocal, engine
+from app.models.subscription import Subscription
+from app.repositories.reminder_repo import ReminderRepo, expiry_schedule
+from app.utils.dates import now_utc
+
+
+async def backfill(batch: int, dry_run: bool) -> None:
+    hours = settings.REMINDERS_HOURS_BEFORE
+    last_user_id = None
+    users = rows_total = 0
+    started = time.monotonic()
+
+    while True:
+        now = now_utc()
+        q = (
+            select(Subscription.user_id, Subscription.expires_at, Subscription.is_trial)
+            .distinct(Subscription.user_id)
+            .where(Subscription.status == "active")
+            .where(Subscription.expires_at > now)
+            .order_by(Subscription.user_id, Subscription.expires_at.desc())
+            .limit(batch)
+        )
+        if last_user_id is not None:
+            q = q.where(Subscription.user_id > last_user_id)
+
+        async with SessionLocal() as session:
+            subs = (await session.execute(q)).all()
+            if not subs:
+                break
+            rows = []
+            for sub in subs:
+                rows += expiry_schedule(
+                    sub.user_id, expires_at=sub.expires_at, is_trial=sub.is_trial, hours_before=hours,
+                    churn_after_hours=settings.CHURN_SURVEY_AFTER_H, now=now,
+                )
+            if not dry_run:
+                await ReminderRepo(session).replace_pending([s.user_id for s in subs], rows)
+                await session.commit()
+
+        last_user_id = subs[-1].user_id
+        users += len(subs)
+        rows_total += len(rows)
+        print(f"[backfill] users={users} reminders={rows_total} last_user_id={last_user_id}")
+
+    print(f"[backfill] done{' (dry-run)' if dry_run else ''}: users={users} reminders={rows_total} "
+          f"hours_before={hours} in {time.monotonic() - started:.1f}s")
+    await engine.dispose()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--batch", type=int, default=1000, help="подписок (пользователей) на транзакцию")
+    ap.add_argument("--dry-run", action="store_true", help="только посчитать, ничего не писать")
+    args = ap.parse_args()
+    asyncio.run(backfill(args.batch, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# app/scripts/explain_hot_queries.py
+"""
+EXPLAIN-проверка горячих запросов: каждый должен идти через индекс
+(Index Scan / Index Only Scan / Bitmap Index Scan по ожидаемому индексу).
+
+    python -m app.scripts.explain_hot_queries              # код выхода 1, если хоть один seq scan
+    python -m app.scripts.explain_hot_queries --real-costs # без enable_seqscan=off
+    python -m app.scripts.explain_hot_queries -v           # печатать планы
+
+По умолчанию внутри транзакции выставляется SET LOCAL enable_seqscan = off:
+на пустой/маленькой dev-базе планировщик честно выбирает seq scan, а проверить
+нужно, что индекс вообще применим к запросу. На проде с реальными объёмами
+запускать с --real-costs.
+
+Запросы повторяют выборки из кода (ссылка в имени); параметры берутся из
+существующей строки таблицы, если она есть.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.config import settings
+from app.db import SessionLocal, engine
+from app.models.access_grant import AccessGrant
+from app.models.payment import Payment
+from app.models.reminder import Reminder
+from app.models.subscription import Subscription
+from app.models.user import User
+from app.repositories.read_models import ExpiredAccess, PaymentView, SubscriptionView, select_view
+
+INDEX_NODES = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) <select> с сохранением bind-параметров."""
+
+    inherit_cache = False
+
+    def __init__(self, stmt) -> None:
+        self.stmt = stmt
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kw) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.stmt, **kw)
+
+
+def _walk(node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+
+async def _sample(session) -> Dict[str, Any]:
+    """Реальные значения для параметров, чтобы план строился как в проде."""
+    grant = (await session.execute(
+        select(AccessGrant.tg_user_id, AccessGrant.chat_id).limit(1)
+    )).first()
+    user = (await session.execute(select(User.id, User.tg_id).limit(1))).first()
+    invoice = (await session.execute(select(Payment.provider_invoice_id).limit(1))).scalar()
+    return {
+        "tg_user_id": grant.tg_user_id if grant else 0,
+        "chat_id": grant.chat_id if grant else 0,
+        "user_id": user.id if user else 0,
+        "tg_id": user.tg_id if user else 0,
+        "invoice": invoice or "0",
+    }
+
+
+def hot_queries(p: Dict[str, Any]) -> List[Tuple[str, Optional[str], Any]]:
+    """(откуда запрос, ожидаемый индекс или None — любой индекс таблицы, select)."""
+    now = datetime.now(timezone.utc)
+    naive_now = datetime.utcnow()  # access_grants хранит naive UTC
+    return [
+        (
+            "AccessService.get_unexpired_link",
+            "ix_access_grants_unused_link",
+            select(AccessGrant.invite_link, AccessGrant.invite_expires_at)
+            .where(
+                AccessGrant.tg_user_id == p["tg_user_id"],
+                AccessGrant.chat_id == p["chat_id"],
+                AccessGrant.used.is_(False),
+                AccessGrant.invite_expires_at.is_not(None),
+                AccessGrant.invite_expires_at > naive_now + timedelta(minutes=5),
+            )
+            .order_by(AccessGrant.invite_expires_at.desc())
+            .limit(1),
+        ),
+        (
+            "AccessService.get_expired_accesses",
+            "ix_access_grants_access_expires_at",
+            select_view(ExpiredAccess, AccessGrant)
+            .where(AccessGrant.access_expires_at.is_not(None))
+            .where(AccessGrant.access_expires_at < naive_now),
+        ),
+        (
+            "SubscriptionRepo.current_for_user",
+            "ix_subscriptions_user_status_expires",
+            select_view(SubscriptionView, Subscription)
+            .where(Subscription.user_id == p["user_id"])
+            .where(Subscription.status == "active")
+            .order_by(Subscription.expires_at.desc())
+            .limit(1),
+        ),
+        (
+            "SubscriptionRepo.get_active_by_tg",
+            "ix_subscriptions_user_status_expires",
+            select(Subscription.plan, Subscription.expires_at)
+            .join(User, User.id == Subscription.user_id)
+            .where(User.tg_id == p["tg_id"])
+            .where(Subscription.status == "active")
+            .where(Subscription.expires_at > now)
+            .order_by(Subscription.expires_at.desc())
+            .limit(1),
+        ),
+        (
+            # unique на provider_invoice_id; имя зависит от того, чем создавалась таблица
+            "PaymentRepo.get_by_provider_invoice",
+            None,
+            select_view(PaymentView, Payment, skip=("tg_user_id",)).where(
+                Payment.provider == settings.PAYMENT_PROVIDER,
+                Payment.provider_invoice_id == p["invoice"],
+            ),
+        ),
+        (
+            "ReminderRepo.due / claim_due",
+            "ix_reminders_pending_due_at",
+            select(Reminder.id)
+            .where(Reminder.sent_at.is_(None), Reminder.due_at <= now)
+            .order_by(Reminder.due_at)
+            .limit(settings.REMINDERS_BATCH_SIZE),
+        ),
+    ]
+
+
+def _check(plan: Dict[str, Any], expected: Optional[str]) -> Tuple[bool, List[str]]:
+    nodes = []
+    ok = False
+    for node in _walk(plan):
+        kind = node.get("Node Type", "?")
+        index = node.get("Index Name")
+        nodes.append(f"{kind}({index or node.get('Relation Name', '')})")
+        if kind in INDEX_NODES and (expected is None or index == expected):
+            ok = True
+    return ok, nodes
+
+
+async def run(real_costs: bool, verbose: bool) -> int:
+    failed = 0
+    async with SessionLocal() as session:
+        params = await _sample(session)
+        if not real_costs:
+            await session.execute(text("SET LOCAL enable_seqscan = off"))
+        for name, index, stmt in hot_queries(params):
+            plan = (await session.execute(Explain(stmt))).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            root = plan[0]["Plan"]
+            ok, nodes = _check(root, index)
+            failed += not ok
+            print(f"[{'ok' if ok else 'FAIL'}] {name}: want {index or 'any index'}; plan: {' -> '.join(nodes)}")
+            if verbose:
+                print(json.dumps(root, indent=2, ensure_ascii=False))
+        await session.rollback()
+    return failed
+
+
+async def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--real-costs", action="store_true", help="не выключать seq scan (прод-объёмы)")
+    ap.add_argument("-v", "--verbose", action="store_true", help="печатать JSON-планы")
+    args = ap.parse_args()
+    try:
+        failed = await run(args.real_costs, args.verbose)
+    finally:
+        await engine.dispose()
+    print(f"[explain] {'all hot queries use indexes' if not failed else f'{failed} without index'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
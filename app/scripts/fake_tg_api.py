@@ -0,0 +1,334 @@
+# app/scripts/fake_tg_api.py
+"""
+Локальная заглушка Telegram Bot API для нагрузочных прогонов бота без api.telegram.org.
+
+Реализует только то подмножество методов, которым реально пользуется бот
+(getMe, getUpdates, sendMessage, sendPhoto, createChatInviteLink, getChatMember,
+banChatMember, unbanChatMember, edit*, answerCallbackQuery ...), с задержкой
+и флуд-контролем «как у Telegram»: 429 + parameters.retry_after.
+
+Запуск:
+    uvicorn app.scripts.fake_tg_api:app --host 127.0.0.1 --port 8081
+
+Бот направляется сюда через TELEGRAM_API_BASE=http://127.0.0.1:8081.
+
+Настройки (env):
+    FAKE_TG_LATENCY_MS   — базовая задержка ответа (по умолчанию 30)
+    FAKE_TG_JITTER_MS    — случайная добавка к задержке (по умолчанию 20)
+    FAKE_TG_GLOBAL_RPS   — общий лимит запросов в секунду на токен (30)
+    FAKE_TG_CHAT_RPS     — лимит отправок в один чат в секунду (1)
+
+Служебные ручки:
+    POST /_inject/message   {"user_id": 1, "text": "/start"}
+    POST /_inject/callback  {"user_id": 1, "data": "check_payment"}
+    POST /_members          {"chat_id": -100, "user_id": 1, "status": "member"}
+    GET  /_stats            счётчики вызовов / 429
+    POST /_reset            сбросить состояние
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import math
+import os
+import random
+import secrets
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+LATENCY_MS = float(os.getenv("FAKE_TG_LATENCY_MS", "30"))
+JITTER_MS = float(os.getenv("FAKE_TG_JITTER_MS", "20"))
+GLOBAL_RPS = float(os.getenv("FAKE_TG_GLOBAL_RPS", "30"))
+CHAT_RPS = float(os.getenv("FAKE_TG_CHAT_RPS", "1"))
+
+# методы, которые Telegram лимитирует per-chat (отправка сообщений)
+SEND_METHODS = {"sendmessage", "sendphoto", "senddocument", "copymessage", "forwardmessage"}
+# «бесплатные» методы: не задерживаем и не лимитируем
+FREE_METHODS = {"getme", "getupdates", "deletewebhook", "setmycommands"}
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "FakeBot", "username": "fake_bot"}
+
+app = FastAPI(title="Fake Telegram Bot API")
+
+
+class _Bucket:
+    """Token bucket: rate токенов в секунду, ёмкость = max(1, rate)."""
+
+    __slots__ = ("rate", "capacity", "tokens", "ts")
+
+    def __init__(self, rate: float) -> None:
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self.tokens = self.capacity
+        self.ts = time.monotonic()
+
+    def take(self) -> float:
+        """0 — токен взят; иначе сколько секунд ждать до следующего."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.ts) * self.rate)
+        self.ts = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class _State:
+    def __init__(self) -> None:
+        self.update_ids = itertools.count(1)
+        self.message_ids = itertools.count(1)
+        self.updates: List[Dict[str, Any]] = []
+        self.new_update = asyncio.Event()
+        self.members: Dict[Tuple[int, int], str] = {}
+        self.global_buckets: Dict[str, _Bucket] = {}
+        self.chat_buckets: Dict[Tuple[str, int], _Bucket] = {}
+        self.calls: Counter[str] = Counter()
+        self.flood: Counter[str] = Counter()
+        self.latency_ms: Dict[str, List[float]] = defaultdict(list)
+
+
+state = _State()
+
+
+# ---------- helpers ----------
+
+def _ok(result: Any) -> JSONResponse:
+    return JSONResponse({"ok": True, "result": result})
+
+
+def _error(code: int, description: str, **parameters: Any) -> JSONResponse:
+    body: Dict[str, Any] = {"ok": False, "error_code": code, "description": description}
+    if parameters:
+        body["parameters"] = parameters
+    return JSONResponse(body, status_code=code)
+
+
+async def _read_params(request: Request) -> Dict[str, Any]:
+    """aiogram шлёт multipart/form-data, curl — JSON или query; поддерживаем всё."""
+    params: Dict[str, Any] = dict(request.query_params.items())
+    ctype = request.headers.get("content-type", "")
+    if ctype.startswith("application/json"):
+        try:
+            body = await request.json()
+            if isinstance(body, dict):
+                params.update(body)
+        except Exception:
+            pass
+    elif ctype:
+        form = await request.form()
+        for k, v in form.items():
+            params[k] = v if isinstance(v, str) else "<file>"
+    return params
+
+
+def _int(params: Dict[str, Any], key: str, default: int = 0) -> int:
+    try:
+        return int(params.get(key, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _chat(chat_id: int) -> Dict[str, Any]:
+    if chat_id < 0:
+        return {"id": chat_id, "type": "supergroup", "title": f"chat {chat_id}"}
+    return {"id": chat_id, "type": "private", "first_name": f"user{chat_id}"}
+
+
+def _user(user_id: int) -> Dict[str, Any]:
+    return {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"}
+
+
+def _message(chat_id: int, **extra: Any) -> Dict[str, Any]:
+    msg = {"message_id": next(state.message_ids), "date": int(time.time()), "chat": _chat(chat_id)}
+    msg.update(extra)
+    return msg
+
+
+def _throttle(token: str, method: str, params: Dict[str, Any]) -> float:
+    bucket = state.global_buckets.get(token)
+    if bucket is None:
+        bucket = state.global_buckets[token] = _Bucket(GLOBAL_RPS)
+    wait = bucket.take()
+    if wait:
+        return wait
+    if method in SEND_METHODS:
+        key = (token, _int(params, "chat_id"))
+        chat_bucket = state.chat_buckets.get(key)
+        if chat_bucket is None:
+            chat_bucket = state.chat_buckets[key] = _Bucket(CHAT_RPS)
+        return chat_bucket.take()
+    return 0.0
+
+
+def _push_update(payload: Dict[str, Any]) -> int:
+    update_id = next(state.update_ids)
+    state.updates.append({"update_id": update_id, **payload})
+    state.new_update.set()
+    return update_id
+
+
+# ---------- методы Bot API ----------
+
+async def _get_updates(params: Dict[str, Any]) -> JSONResponse:
+    offset = _int(params, "offset")
+    timeout = min(_int(params, "timeout"), 50)
+    limit = _int(params, "limit", 100) or 100
+
+    # Telegram забывает всё, что меньше offset
+    if offset:
+        state.updates = [u for u in state.updates if u["update_id"] >= offset]
+
+    if not state.updates and timeout:
+        state.new_update.clear()
+        try:
+            await asyncio.wait_for(state.new_update.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+    return _ok(state.updates[:limit])
+
+
+def _dispatch(method: str, p: Dict[str, Any]) -> JSONResponse:
+    if method == "getme":
+        return _ok(BOT_USER)
+    if method in {"deletewebhook", "setmycommands", "answercallbackquery", "unbanchatmember"}:
+        if method == "unbanchatmember":
+            key = (_int(p, "chat_id"), _int(p, "user_id"))
+            if state.members.get(key) == "kicked":
+                state.members[key] = "left"
+        return _ok(True)
+    if method == "sendmessage":
+        msg = _message(_int(p, "chat_id"), text=p.get("text", ""))
+        msg["from"] = BOT_USER
+        return _ok(msg)
+    if method == "sendphoto":
+        file_id = p.get("photo")
+        # загрузка файла приходит как "attach://<name>" + отдельная часть формы
+        if not isinstance(file_id, str) or file_id.startswith("attach://") or file_id == "<file>":
+            file_id = "AgAC" + secrets.token_urlsafe(24)
+        photo = [{"file_id": file_id, "file_unique_id": file_id[-12:], "width": 1280, "height": 720}]
+        return _ok(_message(_int(p, "chat_id"), photo=photo, caption=p.get("caption")))
+    if method in {"editmessagetext", "editmessagereplymarkup", "editmessagecaption"}:
+        return _ok(_message(_int(p, "chat_id") or 1, text=p.get("text") or ""))
+    if method == "createchatinvitelink":
+        link = {
+            "invite_link": f"https://t.me/+{secrets.token_urlsafe(12)}",
+            "creator": BOT_USER,
+            "creates_join_request": False,
+            "is_primary": False,
+            "is_revoked": False,
+        }
+        if p.get("expire_date"):
+            link["expire_date"] = _int(p, "expire_date")
+        if p.get("member_limit"):
+            link["member_limit"] = _int(p, "member_limit")
+        return _ok(link)
+    if method == "getchatmember":
+        chat_id, user_id = _int(p, "chat_id"), _int(p, "user_id")
+        status = state.members.get((chat_id, user_id), "left")
+        member: Dict[str, Any] = {"status": status, "user": _user(user_id)}
+        if status == "kicked":
+            member["until_date"] = 0
+        return _ok(member)
+    if method == "banchatmember":
+        state.members[(_int(p, "chat_id"), _int(p, "user_id"))] = "kicked"
+        return _ok(True)
+    return _error(404, f"Not Found: method {method} is not implemented in fake api")
+
+
+@app.api_route("/bot{token}/{method}", methods=["GET", "POST"])
+async def bot_api(token: str, method: str, request: Request):
+    method = method.lower()
+    params = await _read_params(request)
+    started = time.perf_counter()
+    state.calls[method] += 1
+
+    if method == "getupdates":
+        return await _get_updates(params)
+
+    if method not in FREE_METHODS:
+        wait = _throttle(token, method, params)
+        if wait:
+            state.flood[method] += 1
+            retry_after = max(1, math.ceil(wait))
+            return _error(429, f"Too Many Requests: retry after {retry_after}", retry_after=retry_after)
+        delay_ms = LATENCY_MS + random.random() * JITTER_MS
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+
+    response = _dispatch(method, params)
+    state.latency_ms[method].append((time.perf_counter() - started) * 1000)
+    return response
+
+
+# ---------- служебные ручки ----------
+
+@app.post("/_inject/message")
+async def inject_message(request: Request):
+    body = await request.json()
+    user_id = int(body["user_id"])
+    msg = _message(user_id, text=body.get("text", ""))
+    msg["from"] = _user(user_id)
+    if str(msg["text"]).startswith("/"):
+        cmd_len = len(str(msg["text"]).split()[0])
+        msg["entities"] = [{"type": "bot_command", "offset": 0, "length": cmd_len}]
+    return {"update_id": _push_update({"message": msg})}
+
+
+@app.post("/_inject/callback")
+async def inject_callback(request: Request):
+    body = await request.json()
+    user_id = int(body["user_id"])
+    msg = _message(user_id, text="button")
+    msg["from"] = BOT_USER
+    query = {
+        "id": secrets.token_hex(8),
+        "from": _user(user_id),
+        "chat_instance": str(user_id),
+        "message": msg,
+        "data": body.get("data", ""),
+    }
+    return {"update_id": _push_update({"callback_query": query})}
+
+
+@app.post("/_members")
+async def set_member(request: Request):
+    body = await request.json()
+    state.members[(int(body["chat_id"]), int(body["user_id"]))] = str(body.get("status", "member"))
+    return {"ok": True}
+
+
+@app.get("/_stats")
+async def stats():
+    def pct(values: List[float], q: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))], 2)
+
+    return {
+        "calls": dict(state.calls),
+        "flood_429": dict(state.flood),
+        "pending_updates": len(state.updates),
+        "latency_ms": {
+            m: {"p50": pct(v, 0.5), "p95": pct(v, 0.95), "n": len(v)}
+            for m, v in state.latency_ms.items()
+        },
+        "config": {
+            "latency_ms": LATENCY_MS,
+            "jitter_ms": JITTER_MS,
+            "global_rps": GLOBAL_RPS,
+            "chat_rps": CHAT_RPS,
+        },
+    }
+
+
+@app.post("/_reset")
+async def reset():
+    global state
+    state = _State()
+    return {"ok": True}
+
@@ -0,0 +1,82 @@
+# app/scripts/rebuild_deadlines.py
+"""
+Восстановление индекса дедлайнов доступа (Redis ZSET, app/services/deadline_index.py)
+из access_grants — после потери/очистки Redis.
+
+Идём по access_grants пачками (keyset по (chat_id, tg_user_id)), на пару берём
+самый поздний access_expires_at и добавляем ZADD GT — живые записи, появившиеся
+во время прогона, не откатываются. Давно истёкшие пары (старше --since-hours)
+пропускаем, чтобы не кикать заново тех, кто ушёл месяцы назад.
+
+Запуск:
+    python -m app.scripts.rebuild_deadlines
+    python -m app.scripts.rebuild_deadlines --since-hours 72 --batch 5000
+    python -m app.scripts.rebuild_deadlines --reset      # DEL ключа перед заполнением
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import BigInteger, func, literal, select, tuple_
+
+from app.config import settings
+from app.db import SessionLocal, engine
+from app.models.access_grant import AccessGrant
+from app.services.deadline_index import deadline_index
+
+
+async def rebuild(batch: int, since_hours: int, reset: bool) -> None:
+    if not deadline_index.enabled:
+        print("[rebuild] REDIS_DSN is not set, deadline index is disabled")
+        return
+    if reset:
+        await deadline_index.redis.delete(deadline_index.key)
+
+    cutoff = datetime.utcnow() - timedelta(hours=since_hours)
+    last = None
+    total = 0
+    started = time.monotonic()
+    latest = func.max(AccessGrant.access_expires_at)
+
+    while True:
+        q = (
+            select(AccessGrant.chat_id, AccessGrant.tg_user_id, latest)
+            .where(AccessGrant.access_expires_at.is_not(None))
+            .group_by(AccessGrant.chat_id, AccessGrant.tg_user_id)
+            .having(latest > cutoff)
+            .order_by(AccessGrant.chat_id, AccessGrant.tg_user_id)
+            .limit(batch)
+        )
+        if last is not None:
+            # chat_id канала (-100...) не влезает в INTEGER — типизируем явно
+            q = q.where(tuple_(AccessGrant.chat_id, AccessGrant.tg_user_id)
+                        > tuple_(*(literal(v, BigInteger()) for v in last)))
+        async with SessionLocal() as session:
+            rows = (await session.execute(q)).all()
+        if not rows:
+            break
+        total += await deadline_index.schedule_many(rows)
+        last = (rows[-1][0], rows[-1][1])
+        print(f"[rebuild] {total} deadlines, last={last}")
+
+    print(f"[rebuild] done: {total} deadlines in {time.monotonic() - started:.1f}s, "
+          f"zcard={await deadline_index.size()} key={settings.ACCESS_DEADLINES_KEY}")
+    await deadline_index.close()
+    await engine.dispose()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--batch", type=int, default=5000)
+    ap.add_argument("--since-hours", type=int, default=settings.GRACE_HOURS,
+                    help="пары, истёкшие раньше, в индекс не попадают")
+    ap.add_argument("--reset", action="store_true", help="очистить ключ перед заполнением")
+    args = ap.parse_args()
+    asyncio.run(rebuild(args.batch, args.since_hours, args.reset))
+
+
+if __name__ == "__main__":
+    main()
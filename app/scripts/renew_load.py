@@ -0,0 +1,118 @@
+# app/scripts/renew_load.py
+"""
+Нагрузочный прогон движка автопродления (app/services/renewal_service.py).
+
+--seed N создаёт N синтетических пользователей с подпиской auto_renew, истекающей
+внутри окна RENEW_WINDOW_HOURS, и оплаченным «материнским» платежом; затем делается
+один прогон RenewalService с выбранным клиентом и печатается статистика.
+
+    python -m app.scripts.renew_load --seed 5000 --concurrency 50                 # stub-клиент
+    RENEW_STUB_DECLINE_RATE=0.1 python -m app.scripts.renew_load --seed 5000
+    ROBOKASSA_RECURRING_ENDPOINT=http://127.0.0.1:8090/Merchant/Recurring \\
+        python -m app.scripts.renew_load --seed 1000 --client rk                  # через rk_simulator
+    python -m app.scripts.renew_load --cleanup
+
+Повторный прогон без --seed проверяет идемпотентность: уже продлённые подписки
+выпадают из окна, а оплаченные ключи renew:* пропускаются.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import timedelta
+
+from sqlalchemy import delete, insert, select
+
+from app.config import settings
+from app.db import SessionLocal, engine
+from app.models.payment import Payment
+from app.models.reminder import Reminder
+from app.models.subscription import Subscription
+from app.models.user import User
+from app.pay.recurring import build_recurring_client
+from app.services.renewal_service import RenewalService
+from app.utils.dates import now_utc
+
+# синтетические tg_id, чтобы не пересекаться с реальными пользователями
+TG_ID_BASE = 8_000_000_000
+
+
+async def seed(n: int) -> None:
+    now = now_utc()
+    offset = int(time.time())
+    async with SessionLocal() as session:
+        for start in range(0, n, 1000):
+            chunk = range(start, min(n, start + 1000))
+            user_ids = (await session.execute(
+                insert(User).returning(User.id),
+                [{"tg_id": TG_ID_BASE + offset * 10 + i} for i in chunk],
+            )).scalars().all()
+            await session.execute(insert(Subscription), [{
+                "user_id": uid,
+                "plan": "m1",
+                "started_at": now - timedelta(days=30),
+                "expires_at": now + timedelta(minutes=random.randint(1, settings.RENEW_WINDOW_HOURS * 60)),
+                "status": "active",
+                "is_trial": False,
+                "auto_renew": True,
+            } for uid in user_ids])
+            await session.execute(insert(Payment), [{
+                "user_id": uid,
+                "amount": 990,
+                "currency": settings.BASE_CURRENCY,
+                "plan": "m1",
+                "provider": settings.PAYMENT_PROVIDER,
+                "provider_invoice_id": str(offset * 100_000 + i),
+                "status": "paid",
+                "paid_at": now - timedelta(days=30),
+                "created_at": now - timedelta(days=30),
+            } for i, uid in zip(chunk, user_ids)])
+            await session.commit()
+    print(f"[seed] {n} subscriptions due within {settings.RENEW_WINDOW_HOURS}h")
+
+
+async def cleanup() -> None:
+    async with SessionLocal() as session:
+        ids = select(User.id).where(User.tg_id >= TG_ID_BASE).scalar_subquery()
+        for model in (Reminder, Payment, Subscription):
+            await session.execute(delete(model).where(model.user_id.in_(ids)))
+        res = await session.execute(delete(User).where(User.tg_id >= TG_ID_BASE))
+        await session.commit()
+    print(f"[cleanup] removed {res.rowcount} synthetic users")
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--seed", type=int, default=0, help="сколько подписок создать перед прогоном")
+    ap.add_argument("--client", default="stub", help="stub | rk")
+    ap.add_argument("--concurrency", type=int, default=settings.RENEW_CONCURRENCY)
+    ap.add_argument("--batch", type=int, default=settings.RENEW_BATCH_SIZE)
+    ap.add_argument("--max-per-run", type=int, default=settings.RENEW_MAX_PER_RUN)
+    ap.add_argument("--cleanup", action="store_true", help="удалить синтетических пользователей и выйти")
+    args = ap.parse_args()
+
+    if args.cleanup:
+        await cleanup()
+        await engine.dispose()
+        return
+    if args.seed:
+        await seed(args.seed)
+
+    client = build_recurring_client(args.client)
+    svc = RenewalService(client, concurrency=args.concurrency, batch_size=args.batch, max_per_run=args.max_per_run)
+    t0 = time.monotonic()
+    try:
+        stats = await svc.run()
+    finally:
+        await client.close()
+    wall = time.monotonic() - t0
+    charged = stats.get("charged", 0)
+    print(f"[run] client={args.client} concurrency={args.concurrency} wall={wall:.1f}s "
+          f"charged={charged} ({charged / wall if wall else 0:.0f}/s) stats={stats}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
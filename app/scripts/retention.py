@@ -0,0 +1,53 @@
+# app/scripts/retention.py
+"""
+Ручной запуск ретеншна (то же делает ежедневная retention_job).
+
+    python -m app.scripts.retention --dry-run                 # отчёт: сколько строк/байт уедет в архив
+    python -m app.scripts.retention                           # перенос по всем политикам
+    python -m app.scripts.retention --table payments --batch 500
+
+Политики и сроки — settings.RETENTION_*_DAYS.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from app.config import settings
+from app.db import engine
+from app.services.retention_service import RetentionService
+
+
+def _mb(n) -> str:
+    return f"{n / 1024 / 1024:.1f}MB" if n is not None else "-"
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--dry-run", action="store_true", help="только отчёт, ничего не переносить")
+    ap.add_argument("--table", action="append", help="ограничить таблицей (можно несколько раз)")
+    ap.add_argument("--batch", type=int, default=settings.RETENTION_BATCH_SIZE)
+    ap.add_argument("--max-batches", type=int, default=settings.RETENTION_MAX_BATCHES)
+    args = ap.parse_args()
+
+    svc = RetentionService(batch_size=args.batch, max_batches=args.max_batches)
+    try:
+        for row in await svc.report(args.table):
+            print(
+                f"[report] {row['table']}: older than {row['days']}d "
+                f"{row['eligible']}/{row['total']} rows ids={row['id_range']} "
+                f"~{_mb(row.get('eligible_bytes'))} of table {_mb(row.get('table_bytes'))}, "
+                f"archive {_mb(row.get('archive_bytes'))}"
+            )
+        if args.dry_run:
+            return
+        t0 = time.monotonic()
+        stats = await svc.run(args.table)
+        print(f"[run] archived {stats} in {time.monotonic() - t0:.1f}s")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,133 @@
+# app/scripts/rk_load.py
+"""
+Нагрузочный прогон оплат через симулятор Robokassa (app/scripts/rk_simulator.py).
+
+Каждый «чекаут» делает то же, что бот: создаёт счёт (PaymentService.create_invoice),
+строит ссылку build_payment_link и «открывает» её в симуляторе. Дальше ждём,
+пока подписка станет активной (--db), либо пока симулятор получит OK от ResultURL.
+
+Запуск (ROBOKASSA_ENDPOINT должен смотреть на симулятор):
+    ROBOKASSA_ENDPOINT=http://127.0.0.1:8090/Merchant/Index.aspx \\
+        python -m app.scripts.rk_load --flows 2000 --concurrency 200 --db
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.pay.robokassa import RK_ENDPOINT, build_payment_link
+
+# синтетические tg_id, чтобы не пересекаться с реальными пользователями
+TG_ID_BASE = 9_000_000_000
+
+
+async def _wait_access(tg_user_id: int, deadline: float, poll_s: float) -> bool:
+    from app.db import SessionLocal
+    from app.services.payment_service import PaymentService
+
+    while time.monotonic() < deadline:
+        async with SessionLocal() as session:
+            if await PaymentService(session).user_has_active_subscription(tg_user_id):
+                return True
+        await asyncio.sleep(poll_s)
+    return False
+
+
+async def _wait_ack(client: httpx.AsyncClient, sim_base: str, inv_id: int, deadline: float, poll_s: float) -> bool:
+    while time.monotonic() < deadline:
+        resp = await client.get(f"{sim_base}/_flows/{inv_id}")
+        if resp.status_code == 200 and resp.json().get("status") in {"delivered", "confirmed"}:
+            return True
+        await asyncio.sleep(poll_s)
+    return False
+
+
+async def _checkout(
+    n: int,
+    args: argparse.Namespace,
+    client: httpx.AsyncClient,
+    sim_base: str,
+) -> Optional[float]:
+    tg_user_id = TG_ID_BASE + args.offset + n
+    inv_id = args.offset + n + 1
+    started = time.monotonic()
+
+    if args.db:
+        from app.db import SessionLocal
+        from app.services.payment_service import PaymentService
+
+        async with SessionLocal() as session:
+            await PaymentService(session).create_invoice(
+                tg_user_id=tg_user_id, plan=args.plan, provider_invoice_id=str(inv_id)
+            )
+
+    url = build_payment_link(
+        amount_rub=float(args.amount),
+        inv_id=inv_id,
+        user_id=tg_user_id,
+        description=f"Подписка {args.plan}",
+        shp_fields={"Shp_plan": args.plan},
+    )
+    resp = await client.get(url)
+    if resp.status_code != 200:
+        return None
+
+    deadline = started + args.timeout
+    if args.db:
+        ok = await _wait_access(tg_user_id, deadline, args.poll)
+    else:
+        ok = await _wait_ack(client, sim_base, inv_id, deadline, args.poll)
+    return (time.monotonic() - started) * 1000 if ok else None
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--flows", type=int, default=100)
+    ap.add_argument("--concurrency", type=int, default=50)
+    ap.add_argument("--plan", default="m1")
+    ap.add_argument("--amount", type=float, default=990.0)
+    ap.add_argument("--offset", type=int, default=int(time.time()) % 1_000_000 * 1000,
+                    help="сдвиг InvId/tg_id, чтобы повторные прогоны не конфликтовали")
+    ap.add_argument("--timeout", type=float, default=60.0, help="сек на один чекаут")
+    ap.add_argument("--poll", type=float, default=0.2, help="интервал опроса, сек")
+    ap.add_argument("--db", action="store_true", help="создавать счета в БД и ждать активной подписки")
+    args = ap.parse_args()
+
+    parts = urlsplit(RK_ENDPOINT)
+    sim_base = f"{parts.scheme}://{parts.netloc}"
+    sem = asyncio.Semaphore(args.concurrency)
+    results: List[Optional[float]] = []
+
+    async with httpx.AsyncClient(timeout=30, limits=httpx.Limits(max_connections=args.concurrency)) as client:
+        async def one(n: int) -> None:
+            async with sem:
+                try:
+                    results.append(await _checkout(n, args, client, sim_base))
+                except Exception as e:
+                    print(f"[flow {n}] error: {e!r}")
+                    results.append(None)
+
+        t0 = time.monotonic()
+        await asyncio.gather(*(one(n) for n in range(args.flows)))
+        wall = time.monotonic() - t0
+
+        stats = (await client.get(f"{sim_base}/_stats")).json()
+
+    ok = sorted(r for r in results if r is not None)
+    print(f"flows={args.flows} ok={len(ok)} failed={args.flows - len(ok)} wall={wall:.1f}s "
+          f"throughput={args.flows / wall:.1f}/s")
+    if ok:
+        p95 = ok[min(len(ok) - 1, int(len(ok) * 0.95))]
+        print(f"time_to_{'access' if args.db else 'ack'}_ms: "
+              f"p50={statistics.median(ok):.0f} p95={p95:.0f} max={ok[-1]:.0f}")
+    print("simulator:", stats)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
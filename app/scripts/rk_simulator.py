@@ -0,0 +1,260 @@
+# app/scripts/rk_simulator.py
+"""
+Локальный симулятор Robokassa.
+
+Принимает ссылки, которые строит app/pay/robokassa.py:build_payment_link,
+проверяет подпись Password1 и через настраиваемую задержку шлёт ResultURL
+с подписью Password2 (ровно в том формате, что проверяет /robokassa/result),
+с ретраями, пока не получит "OK<InvId>".
+
+Запуск:
+    uvicorn app.scripts.rk_simulator:app --host 127.0.0.1 --port 8090
+
+Бот/веб направляются сюда через
+    ROBOKASSA_ENDPOINT=http://127.0.0.1:8090/Merchant/Index.aspx
+    ROBOKASSA_RECURRING_ENDPOINT=http://127.0.0.1:8090/Merchant/Recurring   # автопродление
+
+Повторные списания (/Merchant/Recurring) проверяют подпись
+MerchantLogin:OutSum:InvoiceID:Password1, отвечают "OK<InvoiceID>" и затем так же
+шлют ResultURL — его берём из RK_SIM_RESULT_URL (в настоящей кассе он задан в магазине).
+
+Настройки (env):
+    RK_SIM_DELAY_MS        — задержка «оплаты» до первого ResultURL (500)
+    RK_SIM_JITTER_MS       — случайная добавка к задержке (500)
+    RK_SIM_DECLINE_RATE    — доля отказов банка: ResultURL не шлём (0.0)
+    RK_SIM_DROP_RATE       — доля «потерянных» попыток доставки ResultURL (0.0)
+    RK_SIM_MAX_RETRIES     — сколько раз повторять ResultURL (5)
+    RK_SIM_RETRY_BASE_MS   — база экспоненциального бэкоффа ретраев (500)
+    RK_SIM_RESULT_URL      — переопределить ResultURL из ссылки (например, http://app-web:8080/robokassa/result)
+    RK_SIM_CONFIRM_URL     — после OK дёрнуть фейковое подтверждение бота
+                             (например, http://app-web:8080/payments/webhook), т.к. /robokassa/result
+                             сам подписку не активирует
+
+Служебные ручки:
+    GET  /_stats           — счётчики и p50/p95 от открытия ссылки до OK
+    GET  /_flows/{inv_id}  — таймлайн одного платежа
+    POST /_reset
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from app.config import settings
+from app.web.robokassa_routes import _sig_parts
+
+log = logging.getLogger("rk_simulator")
+
+DELAY_MS = float(os.getenv("RK_SIM_DELAY_MS", "500"))
+JITTER_MS = float(os.getenv("RK_SIM_JITTER_MS", "500"))
+DECLINE_RATE = float(os.getenv("RK_SIM_DECLINE_RATE", "0"))
+DROP_RATE = float(os.getenv("RK_SIM_DROP_RATE", "0"))
+MAX_RETRIES = int(os.getenv("RK_SIM_MAX_RETRIES", "5"))
+RETRY_BASE_MS = float(os.getenv("RK_SIM_RETRY_BASE_MS", "500"))
+RESULT_URL = os.getenv("RK_SIM_RESULT_URL", "")
+CONFIRM_URL = os.getenv("RK_SIM_CONFIRM_URL", "")
+
+app = FastAPI(title="Robokassa simulator")
+
+
+@dataclass
+class Flow:
+    inv_id: str
+    out_sum: str
+    opened_at: float
+    status: str = "pending"  # pending | declined | delivered | confirmed | failed
+    attempts: int = 0
+    delivered_at: Optional[float] = None
+    confirmed_at: Optional[float] = None
+    errors: List[str] = field(default_factory=list)
+
+
+flows: Dict[str, Flow] = {}
+_tasks: set[asyncio.Task] = set()
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _credentials() -> tuple[str, str, str]:
+    login = getattr(settings, "ROBOKASSA_LOGIN", "") or ""
+    p1 = getattr(settings, "ROBOKASSA_PASSWORD1", "") or ""
+    p2 = getattr(settings, "ROBOKASSA_PASSWORD2", "") or ""
+    return login, p1, p2
+
+
+def _sig_p1(login: str, out_sum: str, inv_id: str, p1: str, shp: Dict[str, str]) -> str:
+    """MerchantLogin:OutSum:InvId:Password1[:Shp_key=value ...] — как в build_payment_link."""
+    base = f"{login}:{out_sum}:{inv_id}:{p1}"
+    for k in sorted(shp):
+        base += f":{k}={shp[k]}"
+    return hashlib.sha256(base.encode()).hexdigest()
+
+
+def _http() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(timeout=10, limits=httpx.Limits(max_connections=200))
+    return _client
+
+
+async def _deliver(flow: Flow, result_url: str, shp: Dict[str, str]) -> None:
+    """Ждём «оплату», затем шлём ResultURL с ретраями до OK<InvId>."""
+    await asyncio.sleep((DELAY_MS + random.random() * JITTER_MS) / 1000)
+
+    if random.random() < DECLINE_RATE:
+        flow.status = "declined"
+        return
+
+    login, _, p2 = _credentials()
+    sig, _, _ = _sig_parts(login, flow.out_sum, flow.inv_id, p2, shp)
+    payload = {"OutSum": flow.out_sum, "InvId": flow.inv_id, "SignatureValue": sig, **shp}
+    expected = f"OK{flow.inv_id}"
+
+    for attempt in range(MAX_RETRIES + 1):
+        flow.attempts += 1
+        try:
+            if random.random() < DROP_RATE:
+                raise httpx.ConnectError("simulated drop")
+            resp = await _http().post(result_url, data=payload)
+            if resp.status_code == 200 and resp.text.strip() == expected:
+                flow.status = "delivered"
+                flow.delivered_at = time.monotonic()
+                break
+            flow.errors.append(f"{resp.status_code}: {resp.text[:80]}")
+        except httpx.HTTPError as e:
+            flow.errors.append(repr(e))
+        await asyncio.sleep(RETRY_BASE_MS * (2 ** attempt) / 1000)
+    else:
+        flow.status = "failed"
+        log.warning("rk_sim_result_failed inv_id=%s attempts=%s", flow.inv_id, flow.attempts)
+        return
+
+    if CONFIRM_URL:
+        try:
+            resp = await _http().post(
+                CONFIRM_URL,
+                json={"provider": "robokassa", "invoice_id": flow.inv_id, "status": "paid"},
+            )
+            if resp.status_code == 200:
+                flow.status = "confirmed"
+                flow.confirmed_at = time.monotonic()
+            else:
+                flow.errors.append(f"confirm {resp.status_code}")
+        except httpx.HTTPError as e:
+            flow.errors.append(f"confirm {e!r}")
+
+
+@app.api_route("/Merchant/Index.aspx", methods=["GET", "POST"])
+async def merchant_index(request: Request):
+    params = dict(request.query_params.items())
+    if request.method == "POST":
+        params.update({k: str(v) for k, v in (await request.form()).items()})
+
+    login, p1, _ = _credentials()
+    out_sum = params.get("OutSum", "")
+    inv_id = params.get("InvId", "")
+    shp = {k: v for k, v in params.items() if k.startswith("Shp_")}
+
+    if params.get("MerchantLogin", "") != login:
+        return PlainTextResponse("bad MerchantLogin", status_code=400)
+    sig_in = params.get("SignatureValue", "").lower()
+    if sig_in != _sig_p1(login, out_sum, inv_id, p1, shp):
+        return PlainTextResponse("bad signature (Password1)", status_code=400)
+    if inv_id in flows:
+        return JSONResponse({"ok": True, "InvId": inv_id, "duplicate": True})
+
+    result_url = RESULT_URL or params.get("ResultURL", "")
+    if not result_url:
+        return PlainTextResponse("no ResultURL", status_code=400)
+
+    flow = flows[inv_id] = Flow(inv_id=inv_id, out_sum=out_sum, opened_at=time.monotonic())
+    task = asyncio.create_task(_deliver(flow, result_url, shp))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return JSONResponse({"ok": True, "InvId": inv_id, "recurring": params.get("Recurring") == "true"})
+
+
+@app.post("/Merchant/Recurring")
+async def merchant_recurring(request: Request):
+    params = {k: str(v) for k, v in (await request.form()).items()}
+    login, p1, _ = _credentials()
+    out_sum = params.get("OutSum", "")
+    inv_id = params.get("InvoiceID", "")
+
+    if params.get("MerchantLogin", "") != login:
+        return PlainTextResponse("bad MerchantLogin", status_code=400)
+    if not params.get("PreviousInvoiceID"):
+        return PlainTextResponse("no PreviousInvoiceID", status_code=400)
+    if params.get("SignatureValue", "").lower() != _sig_p1(login, out_sum, inv_id, p1, {}):
+        return PlainTextResponse("bad signature (Password1)", status_code=400)
+    if inv_id in flows:
+        return PlainTextResponse(f"OK{inv_id}")
+    if not RESULT_URL:
+        return PlainTextResponse("RK_SIM_RESULT_URL is not set", status_code=400)
+
+    flow = flows[inv_id] = Flow(inv_id=inv_id, out_sum=out_sum, opened_at=time.monotonic())
+    task = asyncio.create_task(_deliver(flow, RESULT_URL, {}))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return PlainTextResponse(f"OK{inv_id}")
+
+
+def _pct(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))], 1)
+
+
+@app.get("/_stats")
+async def stats():
+    by_status: Dict[str, int] = {}
+    to_ok_ms: List[float] = []
+    to_confirm_ms: List[float] = []
+    for f in flows.values():
+        by_status[f.status] = by_status.get(f.status, 0) + 1
+        if f.delivered_at:
+            to_ok_ms.append((f.delivered_at - f.opened_at) * 1000)
+        if f.confirmed_at:
+            to_confirm_ms.append((f.confirmed_at - f.opened_at) * 1000)
+    return {
+        "flows": len(flows),
+        "in_flight": len(_tasks),
+        "by_status": by_status,
+        "attempts": sum(f.attempts for f in flows.values()),
+        "open_to_ok_ms": {"p50": _pct(to_ok_ms, 0.5), "p95": _pct(to_ok_ms, 0.95), "n": len(to_ok_ms)},
+        "open_to_confirm_ms": {
+            "p50": _pct(to_confirm_ms, 0.5), "p95": _pct(to_confirm_ms, 0.95), "n": len(to_confirm_ms),
+        },
+    }
+
+
+@app.get("/_flows/{inv_id}")
+async def flow_info(inv_id: str):
+    flow = flows.get(inv_id)
+    if flow is None:
+        return JSONResponse({"ok": False, "error": "not_found"}, status_code=404)
+    return asdict(flow)
+
+
+@app.post("/_reset")
+async def reset():
+    flows.clear()
+    return {"ok": True}
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    for task in list(_tasks):
+        task.cancel()
+    if _client is not None:
+        await _client.aclose()
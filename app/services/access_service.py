@@ -1,8 +1,10 @@
 # app/services/access_service.py
 from __future__ import annotations
 
-from datetime import datetime, timedelta
-from typing import Optional
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 from aiogram.client.bot import Bot
 class _TG_EXC_BASE(Exception): ...
@@ -15,10 +17,16 @@ except Exception:  # на всякий случай, чтобы не падат
 
 from aiogram.types import ChatInviteLink, ChatMember
 
-from sqlalchemy import insert, update, select, delete
+from sqlalchemy import func, insert, update, select, delete, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.replica import read_only
+from app.core.uow import commit_unless_uow
 from app.models.access_grant import AccessGrant
+from app.repositories.read_models import ExpiredAccess, rows_as, select_view
+from app.services.deadline_index import deadline_index
+
+logger = logging.getLogger(__name__)
 
 
 class AccessService:
@@ -31,12 +39,77 @@ class AccessService:
       - отзывает доступ (кик) по истечению
     """
 
-    def __init__(self, session: AsyncSession, bot: Bot):
+    def __init__(self, session: AsyncSession, bot: Bot, *, autocommit: bool = True):
+        """
+        autocommit=False или сессия из UnitOfWork — транзакцией владеет вызывающий:
+        методы только flush-ат, commit делает он один раз.
+        """
         self.s = session
         self.bot = bot
+        self.autocommit = autocommit
+
+    async def _commit(self) -> None:
+        if self.autocommit:
+            await commit_unless_uow(self.s)
+        else:
+            await self.s.flush()
 
     # ---------- выдача инвайтов ----------
 
+    async def create_links(
+        self,
+        tg_user_id: int,
+        chat_ids: Sequence[int],
+        ttl_minutes: int = 60,
+        access_days: Optional[int] = None,
+    ) -> Dict[int, str]:
+        """
+        Одноразовые ссылки сразу в несколько чатов: инвайты создаются в Telegram
+        параллельно, выдачи пишутся одним multi-row INSERT и одним commit.
+        Возвращает {chat_id: invite_link}.
+        """
+        chat_ids = list(dict.fromkeys(chat_ids))
+        if not chat_ids:
+            return {}
+        now = datetime.utcnow()
+        expire_at = now + timedelta(minutes=ttl_minutes)
+        access_expires_at = now + timedelta(days=access_days) if access_days else None
+
+        links: List[ChatInviteLink] = await asyncio.gather(*(
+            self.bot.create_chat_invite_link(
+                chat_id=chat_id,
+                expire_date=expire_at,
+                member_limit=1,
+                creates_join_request=False,
+            )
+            for chat_id in chat_ids
+        ))
+
+        rows = [
+            dict(
+                tg_user_id=tg_user_id,
+                chat_id=chat_id,
+                invite_link=link.invite_link,
+                invite_expires_at=expire_at,
+                used=False,
+                access_expires_at=access_expires_at,
+                created_at=now,
+                updated_at=now,
+            )
+            for chat_id, link in zip(chat_ids, links)
+        ]
+        await self.s.execute(insert(AccessGrant), rows)
+        await self._commit()
+
+        if access_expires_at is not None:
+            try:
+                await deadline_index.schedule_many((chat_id, tg_user_id, access_expires_at) for chat_id in chat_ids)
+            except Exception:
+                # индекс восстанавливается app/scripts/rebuild_deadlines.py
+                logger.exception("deadline index: schedule failed user=%s chats=%s", tg_user_id, chat_ids)
+
+        return {chat_id: link.invite_link for chat_id, link in zip(chat_ids, links)}
+
     async def create_one_time_link(
         self,
         tg_user_id: int,
@@ -48,32 +121,8 @@ class AccessService:
         Создаёт одноразовую ссылку в конкретный чат/канал и фиксирует её в БД.
         access_days: если задано, запишем срок действия доступа (для автокика)
         """
-        expire_at = datetime.utcnow() + timedelta(minutes=ttl_minutes)
-        link: ChatInviteLink = await self.bot.create_chat_invite_link(
-            chat_id=chat_id,
-            expire_date=expire_at,
-            member_limit=1,
-            creates_join_request=False,
-        )
-
-        values = dict(
-            tg_user_id=tg_user_id,
-            chat_id=chat_id,
-            invite_link=link.invite_link,
-            invite_expires_at=expire_at,
-            used=False,
-            access_expires_at=(
-                datetime.utcnow() + timedelta(days=access_days)
-                if access_days
-                else None
-            ),
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow(),
-        )
-        await self.s.execute(insert(AccessGrant).values(**values))
-        await self.s.commit()
-
-        return link.invite_link
+        links = await self.create_links(tg_user_id, [chat_id], ttl_minutes=ttl_minutes, access_days=access_days)
+        return links[chat_id]
 
     async def grant_both_links(
         self,
@@ -85,24 +134,19 @@ class AccessService:
     ) -> tuple[str, str]:
         """
         Удобная обёртка: сразу выдаёт 2 ссылки (канал + группа),
-        обе записывает в БД.
+        обе записывает в БД одним INSERT.
         """
-        ch = await self.create_one_time_link(
-            tg_user_id=tg_user_id,
-            chat_id=channel_id,
-            ttl_minutes=ttl_minutes,
-            access_days=access_days,
-        )
-        gr = await self.create_one_time_link(
-            tg_user_id=tg_user_id,
-            chat_id=group_id,
+        links = await self.create_links(
+            tg_user_id,
+            [channel_id, group_id],
             ttl_minutes=ttl_minutes,
             access_days=access_days,
         )
-        return ch, gr
+        return links[channel_id], links[group_id]
 
     # ---------- поиск свежей неиспользованной ссылки (реюз) ----------
 
+    @read_only
     async def get_unexpired_link(
         self,
         tg_user_id: int,
@@ -145,7 +189,7 @@ class AccessService:
             )
             .values(used=True, updated_at=datetime.utcnow())
         )
-        await self.s.commit()
+        await self._commit()
 
     # ---------- проверки членства ----------
 
@@ -156,6 +200,34 @@ class AccessService:
         except TelegramBadRequest:
             return False
 
+    async def extend_access(self, tg_user_id: int, chat_ids: Sequence[int], access_expires_at: datetime) -> List[int]:
+        """
+        Продление без нового инвайта (автопродление): последняя выдача пользователя
+        в каждом чате получает новый access_expires_at. Только flush/commit по
+        autocommit — в индекс дедлайнов кладёт вызывающий после своего commit.
+        Возвращает чаты, где выдача нашлась.
+        """
+        chat_ids = [c for c in dict.fromkeys(chat_ids) if c]
+        if not chat_ids:
+            return []
+        if access_expires_at.tzinfo is not None:
+            # access_grants хранит naive UTC
+            access_expires_at = access_expires_at.astimezone(timezone.utc).replace(tzinfo=None)
+        latest = (
+            select(func.max(AccessGrant.id))
+            .where(AccessGrant.tg_user_id == tg_user_id, AccessGrant.chat_id.in_(chat_ids))
+            .group_by(AccessGrant.chat_id)
+        )
+        res = await self.s.execute(
+            update(AccessGrant)
+            .where(AccessGrant.id.in_(latest))
+            .values(access_expires_at=access_expires_at, updated_at=datetime.utcnow())
+            .returning(AccessGrant.chat_id)
+        )
+        extended = list(res.scalars())
+        await self._commit()
+        return extended
+
     # ---------- отзыв доступа (кик) ----------
 
     async def revoke_access(self, chat_id: int, user_id: int) -> bool:
@@ -173,18 +245,35 @@ class AccessService:
 
     # ---------- выборки для фоновых задач ----------
 
-    async def get_expired_accesses(self) -> list[AccessGrant]:
+    async def get_expired_accesses(self) -> list[ExpiredAccess]:
         """
-        Все записи, у которых access_expires_at прошёл.
+        Все записи, у которых access_expires_at прошёл (только нужные для кика колонки).
         """
         now = datetime.utcnow()
         q = (
-            select(AccessGrant)
+            select_view(ExpiredAccess, AccessGrant)
             .where(AccessGrant.access_expires_at.is_not(None))
             .where(AccessGrant.access_expires_at < now)
         )
         res = await self.s.execute(q)
-        return list(res.scalars())
+        return rows_as(ExpiredAccess, res)
+
+    async def latest_expiry(self, pairs: Iterable[Tuple[int, int]]) -> Dict[Tuple[int, int], datetime]:
+        """
+        (chat_id, tg_user_id) -> самый поздний access_expires_at, одним запросом.
+        Нужен циклу дедлайнов: не кикать того, кто уже продлил доступ.
+        """
+        pairs = list(pairs)
+        if not pairs:
+            return {}
+        q = (
+            select(AccessGrant.chat_id, AccessGrant.tg_user_id, func.max(AccessGrant.access_expires_at))
+            .where(tuple_(AccessGrant.chat_id, AccessGrant.tg_user_id).in_(pairs))
+            .where(AccessGrant.access_expires_at.is_not(None))
+            .group_by(AccessGrant.chat_id, AccessGrant.tg_user_id)
+        )
+        res = await self.s.execute(q)
+        return {(chat_id, user_id): exp for chat_id, user_id, exp in res}
 
     async def purge_by_user(self, tg_user_id: int) -> int:
         """
@@ -194,5 +283,5 @@ class AccessService:
         res = await self.s.execute(
             delete(AccessGrant).where(AccessGrant.tg_user_id == tg_user_id)
         )
-        await self.s.commit()
+        await self._commit()
         return res.rowcount or 0
@@ -1,2 +1,41 @@
-# Placeholder for admin logic extensions
-class AdminService: ...
+# app/services/admin_service.py
+from __future__ import annotations
+
+from typing import Dict, Optional, Tuple
+
+from app.models.broadcast import Broadcast
+from app.repositories.broadcast_repo import BroadcastRepo
+from app.utils.dates import now_utc
+
+
+class AdminService:
+    """
+    Операции админки в транзакции апдейта (коммитит UnitOfWork). Рассылки здесь
+    только меняют статус; отправляет их app.services.broadcast_service.broadcaster.
+    """
+
+    def __init__(self, session) -> None:
+        self.s = session
+        self.broadcasts = BroadcastRepo(session)
+
+    async def create_broadcast(self, text: str, audience: str, created_by: Optional[int]) -> Tuple[Broadcast, int]:
+        """Черновик + текущий размер аудитории. ValueError — неизвестный сегмент."""
+        b = await self.broadcasts.create(text, audience, created_by)
+        return b, await self.broadcasts.audience_size(audience)
+
+    async def start_broadcast(self, broadcast_id: int) -> bool:
+        return await self.broadcasts.start(broadcast_id)
+
+    async def pause_broadcast(self, broadcast_id: int) -> bool:
+        return await self.broadcasts.set_status(broadcast_id, "paused", only_from=("running",))
+
+    async def cancel_broadcast(self, broadcast_id: int) -> bool:
+        return await self.broadcasts.set_status(
+            broadcast_id, "cancelled", only_from=("draft", "running", "paused"), finished_at=now_utc()
+        )
+
+    async def broadcast_report(self, broadcast_id: int) -> Tuple[Optional[Broadcast], Dict[str, int]]:
+        b = await self.broadcasts.get(broadcast_id)
+        if b is None:
+            return None, {}
+        return b, await self.broadcasts.stats(broadcast_id)
@@ -0,0 +1,134 @@
+# app/services/age_verify_store.py
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from redis.asyncio import Redis
+
+from app.config import settings
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Атомарный toggle согласия: HGET -> инвертируем -> HSET + продлеваем TTL ключа
+_TOGGLE_LUA = """
+local cur = redis.call('HGET', KEYS[1], ARGV[1])
+local new = '1'
+if cur == '1' then new = '0' end
+redis.call('HSET', KEYS[1], ARGV[1], new)
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return new
+"""
+
+
+class AgeVerifyStore:
+    """
+    Состояние U18-верификации и чекбокса согласия:
+      - age:verified:<uid>      — пользователь прошёл проверку (TTL AGE_VERIFIED_TTL_DAYS)
+      - age:pending:<token>     — заявка на модерации (TTL AGE_PENDING_TTL_HOURS),
+                                  забирается атомарно (GETDEL), чтобы approve/reject сработал ровно раз
+      - consent:<uid>           — hash plan -> "0"/"1" (TTL CONSENT_TTL_MINUTES)
+
+    Перед Redis стоит небольшой in-process кэш положительных «verified».
+    Без REDIS_DSN работает целиком в памяти процесса (dev).
+    """
+
+    def __init__(
+        self,
+        redis: Optional[Redis],
+        *,
+        verified_ttl_s: int,
+        pending_ttl_s: int,
+        consent_ttl_s: int,
+        cache_size: int = 10_000,
+        cache_ttl_s: float = 300.0,
+    ) -> None:
+        self.redis = redis
+        self.verified_ttl_s = verified_ttl_s
+        self.pending_ttl_s = pending_ttl_s
+        self.consent_ttl_s = consent_ttl_s
+        self._verified_cache = TTLCache(cache_size, cache_ttl_s)
+        # dev-фолбэк без Redis: те же TTL, но только в этом процессе
+        self._local = TTLCache(cache_size * 10, consent_ttl_s)
+        self._toggle = redis.register_script(_TOGGLE_LUA) if redis is not None else None
+
+    @classmethod
+    def from_settings(cls) -> "AgeVerifyStore":
+        redis = Redis.from_url(settings.REDIS_DSN) if settings.REDIS_DSN else None
+        if redis is None:
+            logger.warning("REDIS_DSN is not set: age verification state is process-local")
+        return cls(
+            redis,
+            verified_ttl_s=settings.AGE_VERIFIED_TTL_DAYS * 86400,
+            pending_ttl_s=settings.AGE_PENDING_TTL_HOURS * 3600,
+            consent_ttl_s=settings.CONSENT_TTL_MINUTES * 60,
+        )
+
+    async def close(self) -> None:
+        if self.redis is not None:
+            await self.redis.aclose()
+
+    # ---------- verified ----------
+
+    async def is_verified(self, user_id: int) -> bool:
+        if self._verified_cache.get(user_id):
+            return True
+        if self.redis is None:
+            return bool(self._local.get(("verified", user_id)))
+        ok = bool(await self.redis.exists(f"age:verified:{user_id}"))
+        if ok:
+            self._verified_cache.set(user_id, True)
+        return ok
+
+    async def mark_verified(self, user_id: int) -> None:
+        if self.redis is None:
+            self._local.set(("verified", user_id), True, ttl=self.verified_ttl_s)
+        else:
+            await self.redis.set(f"age:verified:{user_id}", "1", ex=self.verified_ttl_s)
+        self._verified_cache.set(user_id, True)
+
+    # ---------- заявки на модерацию ----------
+
+    async def put_pending(self, token: str, *, user_id: int, file_id: str) -> None:
+        info = {"user_id": user_id, "file_id": file_id}
+        if self.redis is None:
+            self._local.set(("pending", token), info, ttl=self.pending_ttl_s)
+            return
+        await self.redis.set(f"age:pending:{token}", json.dumps(info), ex=self.pending_ttl_s)
+
+    async def claim_pending(self, token: str) -> Optional[Dict[str, Any]]:
+        """Забрать заявку ровно один раз (между всеми процессами). None — уже обработана/устарела."""
+        if self.redis is None:
+            return self._local.pop(("pending", token))
+        raw = await self.redis.getdel(f"age:pending:{token}")
+        return json.loads(raw) if raw else None
+
+    # ---------- согласие ----------
+
+    async def get_consent(self, user_id: int, plan: str) -> bool:
+        if self.redis is None:
+            return bool(self._local.get(("consent", user_id, plan)))
+        return (await self.redis.hget(f"consent:{user_id}", plan)) == b"1"
+
+    async def set_consent(self, user_id: int, plan: str, agreed: bool) -> None:
+        if self.redis is None:
+            self._local.set(("consent", user_id, plan), agreed)
+            return
+        key = f"consent:{user_id}"
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, plan, "1" if agreed else "0")
+            pipe.expire(key, self.consent_ttl_s)
+            await pipe.execute()
+
+    async def toggle_consent(self, user_id: int, plan: str) -> bool:
+        if self.redis is None:
+            agreed = not self._local.get(("consent", user_id, plan))
+            self._local.set(("consent", user_id, plan), agreed)
+            return agreed
+        new = await self._toggle(keys=[f"consent:{user_id}"], args=[plan, self.consent_ttl_s])
+        return new in (b"1", "1")
+
+
+age_store = AgeVerifyStore.from_settings()
@@ -0,0 +1,160 @@
+# app/services/batch_writer.py
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import DateTime, Table, insert
+
+from app.config import settings
+from app.db import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class BatchWriter:
+    """
+    Буферизованная запись строк в одну таблицу вне пути обработки апдейта.
+
+    submit() только кладёт dict в память; фоновая задача пишет буфер одним
+    multi-row INSERT + одним commit, когда набралось max_batch строк или
+    прошло flush_interval секунд. Если БД недоступна — батч дописывается в
+    JSONL-файл (spill) и досылается при следующем успешном flush/старте.
+    """
+
+    def __init__(
+        self,
+        table: Table,
+        *,
+        name: str,
+        max_batch: int = 200,
+        flush_interval: float = 1.0,
+        spool_dir: Optional[str] = None,
+        session_factory=SessionLocal,
+    ) -> None:
+        self.table = table
+        self.name = name
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.session_factory = session_factory
+        self.spill_path = Path(spool_dir or settings.SPOOL_DIR) / f"{name}.jsonl"
+        self._dt_columns = {c.name for c in table.columns if isinstance(c.type, DateTime)}
+        self._buf: List[Dict[str, Any]] = []
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self._stopping = False
+
+    # ---------- публичный API ----------
+
+    def submit(self, row: Dict[str, Any]) -> None:
+        """Неблокирующая постановка строки в очередь записи."""
+        self._buf.append(row)
+        if self._task is None and not self._stopping:
+            self.start()
+        if len(self._buf) >= self.max_batch:
+            self._wake.set()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.get_running_loop().create_task(self._run(), name=f"batch-writer:{self.name}")
+
+    async def stop(self) -> None:
+        """Останавливаем фон и дописываем всё, что осталось в буфере."""
+        self._stopping = True
+        if self._task is not None:
+            # не cancel(): задача может быть посреди INSERT с уже снятым буфером
+            self._wake.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def flush(self) -> int:
+        async with self._lock:
+            rows, self._buf = self._buf, []
+            if not rows:
+                return 0
+            try:
+                await self._insert(rows)
+            except Exception:
+                logger.exception("%s: flush of %d rows failed, spilling to %s", self.name, len(rows), self.spill_path)
+                self._spill(rows)
+                return 0
+            await self._replay_spill()
+            return len(rows)
+
+    # ---------- внутренности ----------
+
+    async def _run(self) -> None:
+        await self._replay_spill()
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("%s: flush loop error", self.name)
+
+    async def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        async with self.session_factory() as session:
+            await session.execute(insert(self.table), rows)
+            await session.commit()
+
+    def _spill(self, rows: List[Dict[str, Any]]) -> None:
+        try:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.spill_path.open("a", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(row, default=_json_default, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception:
+            logger.exception("%s: spill failed, %d rows lost", self.name, len(rows))
+
+    async def _replay_spill(self) -> None:
+        if not self.spill_path.exists():
+            return
+        replaying = self.spill_path.with_suffix(".replaying")
+        try:
+            # переименование атомарно: новые spill-и пойдут в свежий файл
+            if not replaying.exists():
+                self.spill_path.rename(replaying)
+            lines = [line for line in replaying.read_text(encoding="utf-8").splitlines() if line]
+        except Exception:
+            logger.exception("%s: cannot read spill %s", self.name, replaying)
+            return
+
+        done = 0
+        try:
+            for i in range(0, len(lines), self.max_batch):
+                chunk = lines[i:i + self.max_batch]
+                await self._insert([self._decode(line) for line in chunk])
+                done += len(chunk)
+            replaying.unlink()
+            logger.info("%s: replayed %d spilled rows", self.name, done)
+        except Exception:
+            logger.exception("%s: spill replay failed after %d rows, will retry later", self.name, done)
+            # оставляем только недосланный хвост, чтобы не задвоить уже вставленное
+            replaying.write_text("".join(f"{line}\n" for line in lines[done:]), encoding="utf-8")
+
+    def _decode(self, line: str) -> Dict[str, Any]:
+        row = json.loads(line)
+        for col in self._dt_columns:
+            if isinstance(row.get(col), str):
+                row[col] = datetime.fromisoformat(row[col])
+        return row
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
@@ -0,0 +1,197 @@
+# app/services/broadcast_service.py
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import settings
+from app.core.rate_limit import RateLimiter, bulk_send_limiter
+from app.db import SessionLocal, engine
+from app.repositories.broadcast_repo import BroadcastRepo
+from app.scheduler.locks import job_lock
+from app.utils.dates import now_utc
+
+logger = logging.getLogger(__name__)
+
+_MAX_ATTEMPTS = 3
+
+
+class Broadcaster:
+    """
+    Движок рассылок. Одна рассылка — одна задача процесса под job_lock
+    (на Postgres — advisory lock: вторая реплика её не возьмёт).
+
+    Аудитория идёт чанками по BROADCAST_CHUNK (keyset по users.id), на чанк:
+      1. claim — строки broadcast_deliveries в статусе pending, commit;
+      2. отправка: BROADCAST_CONCURRENCY параллельно, темп — общий bulk_send_limiter;
+      3. итоги одним executemany UPDATE, users.blocked для заблокировавших,
+         чекпойнт (cursor_user_id + счётчики), commit.
+    Между чанками транзакция не держится. После падения pending-строки
+    становятся unknown и не повторяются: дублей нет ценой возможного недоноса
+    не более одного чанка.
+    """
+
+    def __init__(
+        self,
+        *,
+        engine: AsyncEngine = engine,
+        session_factory=SessionLocal,
+        limiter: RateLimiter = bulk_send_limiter,
+        concurrency: int,
+        chunk: int,
+    ) -> None:
+        self.engine = engine
+        self.session_factory = session_factory
+        self.limiter = limiter
+        self.concurrency = concurrency
+        self.chunk = chunk
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._stop = asyncio.Event()
+
+    @classmethod
+    def from_settings(cls) -> "Broadcaster":
+        return cls(
+            concurrency=settings.BROADCAST_CONCURRENCY,
+            chunk=settings.BROADCAST_CHUNK,
+        )
+
+    # ---------- управление задачами ----------
+
+    def kick(self, bot: Bot, broadcast_id: int) -> bool:
+        """Запустить рассылку в фоне, если в этом процессе она ещё не идёт."""
+        if self._stop.is_set():
+            return False
+        task = self._tasks.get(broadcast_id)
+        if task is not None and not task.done():
+            return False
+        task = asyncio.get_running_loop().create_task(self._guarded(bot, broadcast_id), name=f"broadcast:{broadcast_id}")
+        self._tasks[broadcast_id] = task
+        task.add_done_callback(lambda t: self._tasks.pop(broadcast_id, None) if self._tasks.get(broadcast_id) is t else None)
+        return True
+
+    async def resume_running(self, bot: Bot) -> None:
+        """Джоба планировщика: подхватить running-рассылки (старт из админки, рестарт, падение)."""
+        async with self.session_factory() as session:
+            ids = await BroadcastRepo(session).running_ids()
+        for bid in ids:
+            self.kick(bot, bid)
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """Остановка процесса: текущие чанки дописывают итоги, неотправленное возвращается в очередь."""
+        self._stop.set()
+        tasks = list(self._tasks.values())
+        if not tasks:
+            return
+        _done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for t in pending:
+            t.cancel()
+
+    async def _guarded(self, bot: Bot, broadcast_id: int) -> None:
+        try:
+            await self.run(bot, broadcast_id)
+        except Exception:
+            # следующий тик broadcast_job поднимет её снова с чекпойнта
+            logger.exception("broadcast %s: run failed", broadcast_id)
+
+    # ---------- прогон ----------
+
+    async def run(self, bot: Bot, broadcast_id: int) -> None:
+        async with job_lock(self.engine, f"broadcast:{broadcast_id}") as got:
+            if not got:
+                return
+            async with self.session_factory() as session:
+                repo = BroadcastRepo(session)
+                lost = await repo.abandon_pending(broadcast_id)
+                await session.commit()
+                if lost:
+                    logger.warning("broadcast %s: %d deliveries from a crashed run marked unknown", broadcast_id, lost)
+                while not self._stop.is_set():
+                    b = await repo.get(broadcast_id)
+                    if b is None or b.status != "running":
+                        break
+                    text = b.text
+                    chunk = await repo.next_chunk(b, self.chunk)
+                    if not chunk:
+                        await repo.set_status(broadcast_id, "done", only_from=("running",), finished_at=now_utc())
+                        await session.commit()
+                        logger.info("broadcast %s: done", broadcast_id)
+                        break
+                    await repo.claim(broadcast_id, [uid for uid, _ in chunk])
+                    await session.commit()
+
+                    results = await self._send_chunk(bot, text, chunk)
+                    await self._save_chunk(repo, broadcast_id, chunk, results)
+                    await session.commit()
+
+    async def _send_chunk(
+        self, bot: Bot, text: str, chunk: Sequence[Tuple[int, int]]
+    ) -> List[Optional[Tuple[str, Optional[str]]]]:
+        """Итог на каждого получателя чанка: (status, error) или None — не отправляли (остановка)."""
+        sem = asyncio.Semaphore(self.concurrency)
+
+        async def one(tg_id: int) -> Optional[Tuple[str, Optional[str]]]:
+            async with sem:
+                if self._stop.is_set():
+                    return None
+                return await self._send_one(bot, tg_id, text)
+
+        return list(await asyncio.gather(*(one(tg_id) for _, tg_id in chunk)))
+
+    async def _send_one(self, bot: Bot, tg_id: int, text: str) -> Tuple[str, Optional[str]]:
+        for attempt in range(1, _MAX_ATTEMPTS + 1):
+            await self.limiter.wait()
+            try:
+                await bot.send_message(tg_id, text)
+                return "sent", None
+            except TelegramRetryAfter as e:
+                self.limiter.pause(e.retry_after)
+                if attempt == _MAX_ATTEMPTS:
+                    return "failed", f"retry after {e.retry_after}s"
+            except TelegramForbiddenError as e:
+                return "blocked", str(e)[:255]
+            except TelegramBadRequest as e:
+                return "failed", str(e)[:255]
+            except Exception as e:
+                logger.warning("broadcast: send to %s failed: %r", tg_id, e)
+                return "failed", repr(e)[:255]
+        return "failed", None
+
+    async def _save_chunk(
+        self,
+        repo: BroadcastRepo,
+        broadcast_id: int,
+        chunk: Sequence[Tuple[int, int]],
+        results: Sequence[Optional[Tuple[str, Optional[str]]]],
+    ) -> None:
+        ts = now_utc()
+        outcomes, unsent, blocked_ids = [], [], []
+        counts = {"sent": 0, "failed": 0, "blocked": 0}
+        for (uid, _), res in zip(chunk, results):
+            if res is None:
+                unsent.append(uid)
+                continue
+            status, error = res
+            counts[status] += 1
+            if status == "blocked":
+                blocked_ids.append(uid)
+            outcomes.append({
+                "user_id": uid,
+                "status": status,
+                "error": error,
+                "sent_at": ts if status == "sent" else None,
+            })
+        await repo.record(broadcast_id, outcomes)
+        await repo.mark_users_blocked(blocked_ids)
+        await repo.release(broadcast_id, unsent)
+        # чекпойнт не перепрыгивает возвращённых в очередь
+        cursor = (min(unsent) - 1) if unsent else chunk[-1][0]
+        await repo.checkpoint(broadcast_id, cursor, **counts)
+
+
+broadcaster = Broadcaster.from_settings()
+
@@ -1,5 +1,60 @@
+# app/services/churn_service.py
+from __future__ import annotations
+
+from typing import Optional
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
 from app.repositories.churn_repo import ChurnRepo
+from app.services.screen_cache import Screen, cached_screen
+from app.services.writers import churn_writer
+from app.utils.dates import now_utc
+
+CB_PREFIX = "churn:"
+
+# reason_code (String(16)) -> подпись кнопки
+REASONS = {
+    "price": "Дорого",
+    "no_time": "Нет времени",
+    "content": "Не подошёл контент",
+    "tech": "Технические проблемы",
+    "other": "Другое",
+}
+
+SURVEY_TEXT = (
+    "Подписка закончилась — жаль, что ты не продлил(а). "
+    "Подскажи одним нажатием, что пошло не так? Это поможет нам стать лучше."
+)
+THANKS_TEXT = "Спасибо за ответ! Если захочешь вернуться — кнопка «Продлить» всегда в меню."
+
+
+@cached_screen
+def survey_screen() -> Screen:
+    rows = [[InlineKeyboardButton(text=label, callback_data=f"{CB_PREFIX}{code}")] for code, label in REASONS.items()]
+    rows.append([InlineKeyboardButton(text="Продлить", callback_data="open_tariffs")])
+    return Screen(SURVEY_TEXT, InlineKeyboardMarkup(inline_keyboard=rows))
+
+
 class ChurnService:
-    def __init__(self, repo: ChurnRepo): self.repo = repo
+    """
+    Опрос оттока. Рассылается диспетчером напоминаний (kind=churn), ответы
+    (кнопки опроса) копятся в churn_writer и уходят в churn_reasons одним
+    multi-row INSERT — клик не ждёт commit.
+    """
+
+    def __init__(self, repo: Optional[ChurnRepo] = None): self.repo = repo
+
+    def submit(self, user_id: int, code: str, text: str | None = None) -> bool:
+        if code not in REASONS:
+            return False
+        churn_writer.submit({
+            "user_id": user_id,
+            "reason_code": code,
+            "reason_text": text,
+            "created_at": now_utc(),
+        })
+        return True
+
     async def save(self, user_id: int, code: str, text: str | None):
+        # синхронная запись одной строки (скрипты/админка); в хендлерах — submit()
         return await self.repo.save(user_id, code, text)
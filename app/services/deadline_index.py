@@ -0,0 +1,115 @@
+# app/services/deadline_index.py
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Tuple
+
+from redis.asyncio import Redis
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Атомарно забрать до ARGV[2] участников со score <= ARGV[1]: несколько реплик
+# могут крутить цикл одновременно, каждый дедлайн достанется ровно одной
+_POP_DUE_LUA = """
+local items = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #items > 0 then
+    redis.call('ZREM', KEYS[1], unpack(items))
+end
+return items
+"""
+
+
+def _score(dt: datetime) -> float:
+    # access_grants хранит naive UTC (datetime.utcnow())
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _member(chat_id: int, user_id: int) -> str:
+    return f"{chat_id}:{user_id}"
+
+
+def _parse(member) -> Tuple[int, int]:
+    if isinstance(member, bytes):
+        member = member.decode()
+    chat_id, user_id = member.rsplit(":", 1)
+    return int(chat_id), int(user_id)
+
+
+class DeadlineIndex:
+    """
+    Индекс дедлайнов доступа: Redis ZSET, участник "<chat_id>:<tg_user_id>",
+    score = access_expires_at (unix time).
+
+      - schedule() — ZADD GT: продление только двигает дедлайн вперёд;
+      - pop_due() — Lua ZRANGEBYSCORE + ZREM: стоимость пропорциональна числу
+        наступивших дедлайнов, а не размеру access_grants;
+      - потеря Redis лечится app/scripts/rebuild_deadlines.py.
+
+    Без REDIS_DSN индекс выключен (enabled=False), работает старый скан access_grants.
+    """
+
+    def __init__(self, redis: Optional[Redis], *, key: str) -> None:
+        self.redis = redis
+        self.key = key
+        self._pop = redis.register_script(_POP_DUE_LUA) if redis is not None else None
+
+    @classmethod
+    def from_settings(cls) -> "DeadlineIndex":
+        redis = Redis.from_url(settings.REDIS_DSN) if settings.REDIS_DSN else None
+        return cls(redis, key=settings.ACCESS_DEADLINES_KEY)
+
+    @property
+    def enabled(self) -> bool:
+        return self.redis is not None
+
+    async def close(self) -> None:
+        if self.redis is not None:
+            await self.redis.aclose()
+
+    async def schedule(self, chat_id: int, user_id: int, expires_at: datetime) -> None:
+        if self.redis is None:
+            return
+        await self.redis.zadd(self.key, {_member(chat_id, user_id): _score(expires_at)}, gt=True)
+
+    async def schedule_many(self, items: Iterable[Tuple[int, int, datetime]], *, chunk: int = 1000) -> int:
+        if self.redis is None:
+            return 0
+        n = 0
+        mapping = {}
+        for chat_id, user_id, expires_at in items:
+            mapping[_member(chat_id, user_id)] = _score(expires_at)
+            if len(mapping) >= chunk:
+                n += len(mapping)
+                await self.redis.zadd(self.key, mapping, gt=True)
+                mapping = {}
+        if mapping:
+            n += len(mapping)
+            await self.redis.zadd(self.key, mapping, gt=True)
+        return n
+
+    async def reschedule_at(self, items: Iterable[Tuple[int, int]], when: datetime) -> None:
+        """Вернуть в индекс с конкретным временем (ретрай/уточнённый дедлайн), без GT."""
+        if self.redis is None:
+            return
+        mapping = {_member(c, u): _score(when) for c, u in items}
+        if mapping:
+            await self.redis.zadd(self.key, mapping)
+
+    async def pop_due(self, now: datetime, limit: int) -> List[Tuple[int, int]]:
+        if self._pop is None:
+            return []
+        items = await self._pop(keys=[self.key], args=[_score(now), limit])
+        return [_parse(m) for m in items]
+
+    async def size(self) -> int:
+        if self.redis is None:
+            return 0
+        return int(await self.redis.zcard(self.key))
+
+
+deadline_index = DeadlineIndex.from_settings()
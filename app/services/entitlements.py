@@ -0,0 +1,87 @@
+# app/services/entitlements.py
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable, Iterable, NamedTuple, Optional
+
+from app.config import settings
+from app.utils.dates import now_utc
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class Entitlement(NamedTuple):
+    active: bool
+    plan: Optional[str] = None
+    expires_at: Optional[datetime] = None
+
+
+NO_ENTITLEMENT = Entitlement(False)
+
+
+class EntitlementCache:
+    """
+    In-process кэш «есть ли у tg_id активная подписка» -> Entitlement(active, plan, expires_at).
+
+    - положительная запись живёт min(ENTITLEMENT_TTL_S, expires_at - now):
+      подписка сама «выпадает» из кэша в момент истечения, без запроса в БД;
+    - отрицательная — ENTITLEMENT_NEGATIVE_TTL_S (секунды): оплату подтверждает
+      веб-процесс, и его invalidate() до кэша бота не долетает — короткий TTL
+      ограничивает, сколько пользователь может видеть «ещё не оплачено»;
+    - confirm_payment и revoke_expired_job зовут invalidate() для своих tg_id.
+    """
+
+    def __init__(self, *, maxsize: int, ttl_s: float, negative_ttl_s: float) -> None:
+        self.ttl_s = ttl_s
+        self.negative_ttl_s = negative_ttl_s
+        self._cache = TTLCache(maxsize, ttl_s)
+
+    @classmethod
+    def from_settings(cls) -> "EntitlementCache":
+        return cls(
+            maxsize=settings.ENTITLEMENT_CACHE_SIZE,
+            ttl_s=settings.ENTITLEMENT_TTL_S,
+            negative_ttl_s=settings.ENTITLEMENT_NEGATIVE_TTL_S,
+        )
+
+    def peek(self, tg_user_id: int) -> Optional[Entitlement]:
+        ent = self._cache.get(tg_user_id)
+        if ent is not None and ent.active and ent.expires_at is not None and ent.expires_at <= now_utc():
+            # подстраховка от расхождения monotonic и wall clock
+            self._cache.pop(tg_user_id)
+            return None
+        return ent
+
+    def put(self, tg_user_id: int, ent: Entitlement) -> None:
+        if not ent.active:
+            self._cache.set(tg_user_id, ent, ttl=self.negative_ttl_s)
+            return
+        ttl = self.ttl_s
+        if ent.expires_at is not None:
+            ttl = min(ttl, (ent.expires_at - now_utc()).total_seconds())
+        if ttl > 0:
+            self._cache.set(tg_user_id, ent, ttl=ttl)
+
+    async def get(
+        self,
+        tg_user_id: int,
+        loader: Callable[[int], Awaitable[Entitlement]],
+    ) -> Entitlement:
+        ent = self.peek(tg_user_id)
+        if ent is not None:
+            return ent
+        ent = await loader(tg_user_id)
+        self.put(tg_user_id, ent)
+        return ent
+
+    def invalidate(self, tg_user_id: int) -> None:
+        self._cache.pop(tg_user_id)
+
+    def invalidate_many(self, tg_user_ids: Iterable[int]) -> None:
+        for uid in tg_user_ids:
+            self._cache.pop(uid)
+
+
+entitlements = EntitlementCache.from_settings()
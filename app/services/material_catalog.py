@@ -0,0 +1,191 @@
+# app/services/material_catalog.py
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from html import escape
+from typing import Awaitable, Callable, List, NamedTuple, Optional, Sequence
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.material import Material
+from app.repositories.read_models import MaterialItem
+from app.utils.texts import TEXTS
+
+logger = logging.getLogger(__name__)
+
+CB_PREFIX = "mat:"
+CB_NOOP = "mat:noop"
+
+_DIRTY = "materials_dirty"
+
+
+class CatalogPage(NamedTuple):
+    text: str
+    kb: Optional[InlineKeyboardMarkup]
+    index: int
+    total: int
+
+
+class CatalogSnapshot(NamedTuple):
+    version: int
+    built_at: float
+    pages: List[CatalogPage]
+    items: int
+
+
+def _item_line(x: MaterialItem, limit: int) -> str:
+    title = escape(x.title or "")
+    payload = (x.payload or "").strip()
+    if payload.startswith(("http://", "https://")):
+        title = f"<a href=\"{escape(payload, quote=True)}\">{title}</a>"
+    line = f"• <b>{title}</b>"
+    if x.description:
+        # режем описание до экранирования — разметку не ломаем
+        room = max(limit - len(line) - 3, 0)
+        desc = x.description if len(x.description) <= room else x.description[: max(room - 1, 0)] + "…"
+        line += f" — {escape(desc)}"
+    return line
+
+
+def _page_kb(index: int, total: int) -> Optional[InlineKeyboardMarkup]:
+    if total <= 1:
+        return None
+    row = []
+    if index > 0:
+        row.append(InlineKeyboardButton(text="◀️", callback_data=f"{CB_PREFIX}{index - 1}"))
+    row.append(InlineKeyboardButton(text=f"{index + 1}/{total}", callback_data=CB_NOOP))
+    if index < total - 1:
+        row.append(InlineKeyboardButton(text="▶️", callback_data=f"{CB_PREFIX}{index + 1}"))
+    return InlineKeyboardMarkup(inline_keyboard=[row])
+
+
+def render_pages(items: Sequence[MaterialItem], *, page_size: int, max_chars: int) -> List[CatalogPage]:
+    """
+    Режем каталог на страницы: не больше page_size позиций и max_chars символов
+    (лимит сообщения Telegram — 4096, с запасом под заголовок и разметку).
+    """
+    header = TEXTS["materials_title"]
+    if not items:
+        return [CatalogPage("Пока пусто. Скоро добавим.", None, 0, 1)]
+
+    chunks: List[List[str]] = [[]]
+    size = len(header)
+    for x in items:
+        line = _item_line(x, max_chars - len(header) - 2)
+        cur = chunks[-1]
+        if cur and (len(cur) >= page_size or size + 1 + len(line) > max_chars):
+            chunks.append([])
+            cur = chunks[-1]
+            size = len(header)
+        cur.append(line)
+        size += 1 + len(line)
+
+    total = len(chunks)
+    return [
+        CatalogPage("\n".join([header, *lines]), _page_kb(i, total), i, total)
+        for i, lines in enumerate(chunks)
+    ]
+
+
+class MaterialCatalog:
+    """
+    In-process кэш каталога бесплатных материалов: все страницы (текст + инлайн-
+    клавиатура) рендерятся один раз на версию каталога, листание — без БД.
+
+    - версия растёт в invalidate(); ORM-запись в materials (insert/update/delete,
+      в т.ч. bulk) после commit инвалидирует кэш сама — см. слушатели ниже;
+    - изменения из другого процесса (веб, скрипты, руками в БД) подхватываются
+      через MATERIALS_CACHE_TTL_S;
+    - пересборка под asyncio.Lock: на холодном кэше в БД идёт один запрос, а не
+      по запросу на каждый одновременный апдейт.
+    """
+
+    def __init__(self, *, page_size: int, max_chars: int, ttl_s: float) -> None:
+        self.page_size = max(1, page_size)
+        self.max_chars = max_chars
+        self.ttl_s = ttl_s
+        self._version = 0
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "MaterialCatalog":
+        return cls(
+            page_size=settings.MATERIALS_PAGE_SIZE,
+            max_chars=settings.MATERIALS_PAGE_MAX_CHARS,
+            ttl_s=settings.MATERIALS_CACHE_TTL_S,
+        )
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def invalidate(self) -> None:
+        self._version += 1
+
+    def _fresh(self, snap: Optional[CatalogSnapshot]) -> bool:
+        if snap is None or snap.version != self._version:
+            return False
+        return not self.ttl_s or time.monotonic() - snap.built_at < self.ttl_s
+
+    async def snapshot(self, loader: Callable[[], Awaitable[Sequence[MaterialItem]]]) -> CatalogSnapshot:
+        snap = self._snapshot
+        if self._fresh(snap):
+            return snap
+        async with self._lock:
+            snap = self._snapshot
+            if self._fresh(snap):
+                return snap
+            version = self._version
+            items = await loader()
+            snap = CatalogSnapshot(
+                version=version,
+                built_at=time.monotonic(),
+                pages=render_pages(items, page_size=self.page_size, max_chars=self.max_chars),
+                items=len(items),
+            )
+            # invalidate() во время загрузки: снапшот отдаём, но не кэшируем как свежий
+            self._snapshot = snap
+            logger.info("materials catalog rebuilt: v=%s items=%s pages=%s", version, snap.items, len(snap.pages))
+            return snap
+
+    async def page(self, index: int, loader: Callable[[], Awaitable[Sequence[MaterialItem]]]) -> CatalogPage:
+        pages = (await self.snapshot(loader)).pages
+        # каталог мог сжаться, пока у пользователя висела старая клавиатура
+        return pages[min(max(index, 0), len(pages) - 1)]
+
+
+catalog = MaterialCatalog.from_settings()
+
+
+# ---------- инвалидация по ORM-записи в materials ----------
+
+@event.listens_for(Session, "after_flush")
+def _mark_materials_flush(session: Session, flush_context) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Material):
+            session.info[_DIRTY] = True
+            return
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_materials_dml(state) -> None:
+    if (state.is_insert or state.is_update or state.is_delete) and state.bind_mapper is not None \
+            and state.bind_mapper.class_ is Material:
+        state.session.info[_DIRTY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    if session.info.pop(_DIRTY, False):
+        catalog.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_on_rollback(session: Session) -> None:
+    session.info.pop(_DIRTY, None)
@@ -1,4 +1,7 @@
 from app.repositories.material_repo import MaterialRepo
+from app.services.material_catalog import CatalogPage, catalog
 class MaterialService:
     def __init__(self, repo: MaterialRepo): self.repo = repo
     async def list(self): return await self.repo.list()
+    # страница каталога из кэша; в БД — только при пересборке
+    async def page(self, index: int = 0) -> CatalogPage: return await catalog.page(index, self.repo.list)
@@ -0,0 +1,164 @@
+# app/services/media_registry.py
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, Message
+
+from app.config import settings
+from app.core.uow import UnitOfWork
+from app.repositories.setting_repo import SettingRepo
+from app.services.settings_cache import settings_cache
+
+logger = logging.getLogger(__name__)
+
+# ключ в таблице settings: media:<sha1 содержимого> -> file_id (String(64) хватает)
+_KEY_PREFIX = "media:"
+
+# kind -> метод Bot и как достать file_id из отправленного сообщения
+_SENDERS = {
+    "photo": ("send_photo", lambda m: m.photo[-1].file_id),
+    "document": ("send_document", lambda m: m.document.file_id),
+    "video": ("send_video", lambda m: m.video.file_id),
+    "animation": ("send_animation", lambda m: m.animation.file_id),
+}
+
+
+class _Asset(NamedTuple):
+    mtime_ns: int
+    size: int
+    sha: Optional[str]
+    checked_at: float
+
+
+def _sha1(path: Path) -> str:
+    h = hashlib.sha1()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class MediaRegistry:
+    """
+    Локальные медиа (баннер /start и т.п.) заливаются в Telegram один раз.
+
+    - file_id хранится в таблице settings под ключом media:<sha1 файла>: читается
+      из settings_cache (без БД), а SettingRepo.set разносит новый file_id по всем
+      процессам через NOTIFY;
+    - файл не читается на каждую отправку: stat() — не чаще раза в MEDIA_RECHECK_S,
+      хеш пересчитывается, только если поменялись mtime/размер. Новый файл —
+      новый хеш — новая заливка, без ручной чистки;
+    - протухший file_id (другой бот, удалённый файл) -> TelegramBadRequest ->
+      заливаем заново;
+    - заливка одного хеша — под asyncio.Lock: холодный кэш и сотня /start
+      дают одну загрузку, остальные ждут и получают file_id.
+    """
+
+    def __init__(self, *, recheck_s: float) -> None:
+        self.recheck_s = recheck_s
+        self._assets: Dict[Path, _Asset] = {}
+        # file_id, которые ещё не удалось сохранить в БД, — хотя бы этот процесс не перезаливает
+        self._local: Dict[str, str] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    @classmethod
+    def from_settings(cls) -> "MediaRegistry":
+        return cls(recheck_s=settings.MEDIA_RECHECK_S)
+
+    # ---------- файл -> хеш ----------
+
+    async def _content_sha(self, path: Path) -> Optional[str]:
+        now = time.monotonic()
+        asset = self._assets.get(path)
+        if asset is not None and now - asset.checked_at < self.recheck_s:
+            return asset.sha
+        try:
+            st = path.stat()
+        except OSError:
+            self._assets[path] = _Asset(0, 0, None, now)
+            return None
+        if asset is not None and asset.sha and (asset.mtime_ns, asset.size) == (st.st_mtime_ns, st.st_size):
+            self._assets[path] = asset._replace(checked_at=now)
+            return asset.sha
+        sha = await asyncio.to_thread(_sha1, path)
+        self._assets[path] = _Asset(st.st_mtime_ns, st.st_size, sha, now)
+        return sha
+
+    async def available(self, path: Path) -> bool:
+        return await self._content_sha(path) is not None
+
+    # ---------- sha -> file_id ----------
+
+    def _file_id(self, key: str) -> Optional[str]:
+        return settings_cache.get(key) or self._local.get(key)
+
+    async def _remember(self, key: str, file_id: str) -> None:
+        self._local[key] = file_id
+        try:
+            async with UnitOfWork() as session:
+                await SettingRepo(session).set(key, file_id)
+        except Exception:
+            logger.exception("media: failed to persist file_id for %s", key)
+
+    async def _forget(self, key: str, file_id: str) -> None:
+        if self._local.get(key) == file_id:
+            self._local.pop(key, None)
+        if settings_cache.get(key) == file_id:
+            settings_cache.apply({key: ""})
+
+    # ---------- отправка ----------
+
+    async def send(
+        self,
+        bot: Bot,
+        chat_id: int,
+        path: Path,
+        *,
+        kind: str = "photo",
+        **kwargs: Any,
+    ) -> Optional[Message]:
+        """
+        Отправить локальный файл по file_id (или залить и запомнить file_id).
+        None — файла нет: вызывающий показывает запасной вариант без медиа.
+        """
+        method_name, extract = _SENDERS[kind]
+        method = getattr(bot, method_name)
+        sha = await self._content_sha(path)
+        if sha is None:
+            return None
+        key = f"{_KEY_PREFIX}{sha}"
+
+        file_id = self._file_id(key)
+        if file_id:
+            try:
+                return await method(chat_id, file_id, **kwargs)
+            except TelegramBadRequest as e:
+                logger.warning("media: cached file_id for %s rejected (%s), re-uploading", path.name, e)
+                await self._forget(key, file_id)
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # пока ждали, файл мог залить соседний апдейт
+            file_id = self._file_id(key)
+            if file_id:
+                return await method(chat_id, file_id, **kwargs)
+            msg = await method(chat_id, FSInputFile(path), **kwargs)
+            try:
+                file_id = extract(msg)
+            except (AttributeError, IndexError, TypeError):
+                logger.warning("media: no file_id in response for %s", path.name)
+                return msg
+            await self._remember(key, file_id)
+            logger.info("media: uploaded %s (%s) -> file_id cached", path.name, sha[:12])
+            return msg
+
+
+media_registry = MediaRegistry.from_settings()
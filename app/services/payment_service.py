@@ -3,7 +3,6 @@ from __future__ import annotations
 
 import inspect
 import logging
-from types import SimpleNamespace
 from typing import Tuple, Any, Optional
 from uuid import uuid4
 
@@ -11,6 +10,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import PendingRollbackError
 
 from app.config import settings
+from app.core.uow import commit_unless_uow
+from app.repositories.read_models import PaymentView, SubscriptionView
+from app.services.entitlements import NO_ENTITLEMENT, Entitlement, entitlements
 
 logger = logging.getLogger(__name__)
 
@@ -88,7 +90,7 @@ class PaymentService:
 
             u = User(id=int(tg_user_id), tg_id=int(tg_user_id))
             self.session.add(u)
-            await self.session.commit()
+            await self.session.flush()
             return int(u.id)
 
         except PendingRollbackError:
@@ -100,7 +102,7 @@ class PaymentService:
                     return int(existing.id)
                 u = User(id=int(tg_user_id), tg_id=int(tg_user_id))
                 self.session.add(u)
-                await self.session.commit()
+                await self.session.flush()
                 return int(u.id)
             except Exception:
                 logger.exception("ensure_user retry failed")
@@ -201,19 +203,20 @@ class PaymentService:
             status="pending",
         )
 
-        if payment is None:
-            payment = {
-                "id": None,
-                "user_id": user_id,
-                "tg_user_id": tg_user_id,
-                "plan": plan,
-                "amount": amount,
-                "currency": settings.BASE_CURRENCY,
-                "provider": settings.PAYMENT_PROVIDER,
-                "provider_invoice_id": invoice_id,
-                "invoice_id": invoice_id,
-                "status": "pending",
-            }
+        if payment is not None:
+            await commit_unless_uow(self.session)
+        else:
+            payment = PaymentView(
+                id=None,
+                user_id=user_id,
+                tg_user_id=tg_user_id,
+                plan=plan,
+                amount=amount,
+                currency=settings.BASE_CURRENCY,
+                provider=settings.PAYMENT_PROVIDER,
+                provider_invoice_id=invoice_id,
+                status="pending",
+            )
 
         logger.info(
             "payment created: tg_id=%s plan=%s amount=%s invoice_id=%s",
@@ -232,7 +235,7 @@ class PaymentService:
                 return obj.get(name, default)
             return getattr(obj, name, default)
 
-        tg_user_id = g(payment, "tg_user_id", g(payment, "user_id"))
+        tg_user_id = g(payment, "tg_user_id") or g(payment, "user_id")
         plan = g(payment, "plan") or "m1"
         if tg_user_id is None:
             raise RuntimeError("У платежа нет user_id")
@@ -245,11 +248,15 @@ class PaymentService:
             from datetime import timedelta
             from app.utils.dates import now_utc
             expires = now_utc() + timedelta(days=self._days_for_plan(plan))
-            return SimpleNamespace(
+            await commit_unless_uow(self.session)
+            return SubscriptionView(
+                id=None,
                 user_id=user_id,
                 plan=plan,
                 status="active",
                 is_trial=(plan == "trial3_10"),
+                auto_renew=settings.AUTO_RENEW_DEFAULT,
+                started_at=None,
                 expires_at=expires,
             )
 
@@ -268,19 +275,57 @@ class PaymentService:
                 "confirm_payment: invoice=%s -> subscription updated user=%s plan=%s",
                 invoice_id, user_id, plan,
             )
-            return sub
         except Exception as e:
             logger.exception("confirm_payment: subscription update failed: %s", e)
             raise RuntimeError("Не удалось обновить подписку") from e
 
+        await self._schedule_reminders(sub)
+        # paid + подписка + напоминания — одна транзакция
+        await commit_unless_uow(self.session)
+        entitlements.invalidate(int(tg_user_id))
+        return sub
+
+    async def _schedule_reminders(self, sub: Any) -> None:
+        """
+        Расписание напоминаний об окончании — сбой здесь не должен ронять оплату:
+        пишем в SAVEPOINT, при ошибке откатывается только он.
+        """
+        try:
+            from app.repositories.reminder_repo import ReminderRepo
+            async with self.session.begin_nested():
+                await ReminderRepo(self.session).schedule_expiry(
+                    sub, settings.REMINDERS_HOURS_BEFORE, churn_after_hours=settings.CHURN_SURVEY_AFTER_H,
+                )
+        except Exception:
+            logger.exception("reminders schedule failed for user=%s", getattr(sub, "user_id", None))
+
+    async def _load_entitlement(self, tg_user_id: int) -> Entitlement:
+        if self.subs_repo is None:
+            return NO_ENTITLEMENT
+        row = await self.subs_repo.get_active_by_tg(tg_user_id)
+        if row is None:
+            return NO_ENTITLEMENT
+        plan, expires_at = row
+        return Entitlement(True, plan, expires_at)
+
+    async def get_entitlement(self, tg_user_id: int) -> Entitlement:
+        """
+        active/plan/expires_at одним поиском; повторные проверки отдаются из
+        in-process кэша (app/services/entitlements.py) без запроса в БД.
+        """
+        try:
+            return await entitlements.get(tg_user_id, self._load_entitlement)
+        except Exception:
+            logger.exception("get_entitlement failed for tg_id=%s", tg_user_id)
+            return NO_ENTITLEMENT
+
+    async def get_active_subscription(self, tg_user_id: int) -> Optional[Entitlement]:
+        ent = await self.get_entitlement(tg_user_id)
+        return ent if ent.active else None
+
     async def user_has_active_subscription(self, tg_user_id: int) -> bool:
         """
         Проверяем активную подписку. Если репозитория нет — возвращаем False,
         а подтверждение делает /robokassa/result.
         """
-        if self.subs_repo and hasattr(self.subs_repo, "has_active_by_tg"):
-            try:
-                return bool(await self.subs_repo.has_active_by_tg(tg_user_id))
-            except Exception:
-                logger.exception("subs_repo.has_active_by_tg failed")
-        return False
+        return (await self.get_entitlement(tg_user_id)).active
@@ -1,17 +1,121 @@
+import asyncio
 import logging
-from sqlalchemy.exc import PendingRollbackError
+from typing import Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from app.config import settings
+from app.core.rate_limit import RateLimiter, bulk_send_limiter
+from app.repositories.reminder_repo import CHURN_KIND
+from app.services.churn_service import survey_screen
 from app.utils.dates import now_utc
+from app.utils.texts import TEXTS
 
 logger = logging.getLogger(__name__)
 
+
+def _renew_kb() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="Продлить", callback_data="open_tariffs")],
+    ])
+
+
 class ReminderService:
-    def __init__(self, session, repo):
+    """
+    Диспетчер напоминаний. Каждая пачка — отдельная транзакция:
+    claim_due (FOR UPDATE SKIP LOCKED) -> отправка с ограниченной параллельностью
+    -> один UPDATE sent_at на пачку -> commit (снимает блокировки).
+    Несколько воркеров/процессов делят очередь без двойных отправок.
+    Темп отправки — общий с рассылками bulk_send_limiter: волна истечений
+    (напоминания + опросы оттока) не упирается в лимиты Telegram.
+    """
+
+    def __init__(
+        self,
+        session,
+        repo,
+        bot: Optional[Bot] = None,
+        *,
+        batch_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        max_batches: Optional[int] = None,
+        limiter: RateLimiter = bulk_send_limiter,
+    ):
         self.s = session
         self.repo = repo
+        self.bot = bot
+        self.batch_size = batch_size or settings.REMINDERS_BATCH_SIZE
+        self.concurrency = concurrency or settings.REMINDERS_CONCURRENCY
+        self.max_batches = max_batches or settings.REMINDERS_MAX_BATCHES_PER_TICK
+        self.limiter = limiter
+
+    async def tick(self) -> int:
+        """Периодическая задача: забираем просроченные напоминания пачками и рассылаем их."""
+        total = 0
+        for _ in range(self.max_batches):
+            claimed, sent = await self._run_batch()
+            total += sent
+            # неполная пачка — очередь выбрана; ни одной отправки — дальше те же строки
+            if claimed < self.batch_size or not sent:
+                break
+        if total:
+            logger.info("reminders: sent %d", total)
+        return total
+
+    async def _run_batch(self) -> Tuple[int, int]:
+        """Одна пачка в одной транзакции. Возвращает (забрано, закрыто)."""
+        try:
+            rows = await self.repo.claim_due(now_utc(), self.batch_size)
+            if not rows:
+                await self.s.rollback()
+                return 0, 0
+
+            sem = asyncio.Semaphore(self.concurrency)
+
+            async def one(row) -> Optional[int]:
+                async with sem:
+                    return row.id if await self._process(row) else None
+
+            done = [rid for rid in await asyncio.gather(*(one(r) for r in rows)) if rid is not None]
+            await self.repo.mark_sent_many(done)
+            await self.s.commit()
+        except Exception:
+            await self.s.rollback()
+            raise
+        return len(rows), len(done)
 
-    async def tick(self) -> None:
-        """Периодическая задача: ищем просроченные напоминания и рассылаем их."""
-        now = now_utc()
-        due = await self.repo.due(now)
-        for item in due:
-            await self._process(item)
\ No newline at end of file
+    async def _process(self, row) -> bool:
+        """
+        Отправляет одно напоминание. True — запись можно закрыть (отправлено или
+        адресат недостижим навсегда), False — оставить до следующего тика.
+        """
+        if row.tg_id is None:
+            logger.warning("reminder %s: user not found, dropping", row.id)
+            return True
+        if self.bot is None:
+            return False
+        if row.kind == CHURN_KIND:
+            if row.subscribed:
+                # продлил другим путём, а расписание не пересчиталось — не спрашиваем
+                return True
+            text, kb = survey_screen()
+        else:
+            text, kb = TEXTS.get(f"reminder_{row.kind}", TEXTS["reminder"]), _renew_kb()
+        for attempt in (1, 2):
+            await self.limiter.wait()
+            try:
+                await self.bot.send_message(row.tg_id, text, reply_markup=kb)
+                return True
+            except TelegramRetryAfter as e:
+                self.limiter.pause(e.retry_after)
+                if attempt == 2:
+                    return False
+            except (TelegramForbiddenError, TelegramBadRequest) as e:
+                logger.info("reminder %s: tg_id=%s unreachable: %s", row.id, row.tg_id, e)
+                return True
+            except Exception:
+                logger.exception("reminder %s: send failed, will retry", row.id)
+                return False
+        return False
@@ -0,0 +1,261 @@
+# app/services/renewal_service.py
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections import Counter
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from app.config import settings
+from app.db import SessionLocal
+from app.models.subscription import Subscription
+from app.models.user import User
+from app.pay.recurring import ChargeResult, RecurringClient
+from app.repositories.payment_repo import PaymentRepo
+from app.repositories.reminder_repo import ReminderRepo
+from app.repositories.subscription_repo import SubscriptionRepo
+from app.services.access_service import AccessService
+from app.services.deadline_index import deadline_index
+from app.services.entitlements import entitlements
+from app.services.payment_service import PaymentService
+from app.utils.dates import now_utc
+
+logger = logging.getLogger(__name__)
+
+RENEW_PREFIX = "renew:"
+
+CONTENT_CHANNEL_ID = int(os.getenv("CONTENT_CHANNEL_ID", "0"))
+CONTENT_CHAT_ID = int(os.getenv("CONTENT_CHAT_ID", "0"))
+
+# InvId автопродлений — свой диапазон выше 2^32: обычные счета берут случайный
+# 32-битный InvId (handlers/pay.py, age_verify.py) и с payments.id пересекаются
+RENEW_INVOICE_BASE = 2 ** 32
+
+
+def renew_key(sub_id: int, expires_at, attempt: int) -> str:
+    """
+    Ключ идемпотентности = payments.idempotency_key (unique):
+    одна попытка N на один период подписки, сколько бы воркеров/прогонов ни было.
+    """
+    return f"{RENEW_PREFIX}{sub_id}:{int(expires_at.timestamp())}:{attempt}"
+
+
+def renewal_invoice_id(payment_id: int) -> int:
+    """InvoiceID повторного списания; хранится числом в payments.provider_invoice_id."""
+    return RENEW_INVOICE_BASE + payment_id
+
+
+class RenewalService:
+    """
+    Движок автопродления. Прогон:
+      1) пачка подписок auto_renew, истекающих в окне RENEW_WINDOW_HOURS (+ GRACE_HOURS назад);
+      2) одним запросом — уже сделанные попытки (по ключам renew:<sub>:<expires>:<n>)
+         и «материнские» InvId для Recurring;
+      3) на каждую подписку: pending-платёж с ключом (unique -> второй воркер отвалится
+         на IntegrityError), списание через client с семафором RENEW_CONCURRENCY,
+         запись результата;
+      4) бюджеты: не больше RENEW_MAX_PER_RUN списаний и RENEW_TIME_BUDGET_S секунд.
+
+    Итог Robokassa приходит асинхронно на /robokassa/result -> apply_paid(InvId),
+    платёж ищется по provider_invoice_id = renewal_invoice_id(payments.id).
+    """
+
+    def __init__(
+        self,
+        client: RecurringClient,
+        *,
+        session_factory=SessionLocal,
+        window_hours: Optional[int] = None,
+        grace_hours: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        max_per_run: Optional[int] = None,
+        time_budget_s: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+    ) -> None:
+        self.client = client
+        self.session_factory = session_factory
+        self.window_hours = window_hours or settings.RENEW_WINDOW_HOURS
+        self.grace_hours = grace_hours if grace_hours is not None else settings.GRACE_HOURS
+        self.batch_size = batch_size or settings.RENEW_BATCH_SIZE
+        self.concurrency = concurrency or settings.RENEW_CONCURRENCY
+        self.max_per_run = max_per_run or settings.RENEW_MAX_PER_RUN
+        self.time_budget_s = time_budget_s or settings.RENEW_TIME_BUDGET_S
+        self.max_attempts = max_attempts or settings.RENEW_MAX_ATTEMPTS
+
+    # ---------- прогон ----------
+
+    async def run(self) -> Dict[str, int]:
+        stats: Counter = Counter()
+        deadline = time.monotonic() + self.time_budget_s
+        sem = asyncio.Semaphore(self.concurrency)
+        cursor = None
+
+        while stats["charged"] < self.max_per_run and time.monotonic() < deadline:
+            async with self.session_factory() as session:
+                rows = await SubscriptionRepo(session).due_for_renewal(
+                    now_utc(),
+                    window_hours=self.window_hours,
+                    grace_hours=self.grace_hours,
+                    limit=self.batch_size,
+                    after=cursor,
+                )
+                if not rows:
+                    break
+                cursor = (rows[-1].expires_at, rows[-1].id)
+                payments = PaymentRepo(session)
+                done = await payments.statuses_by_key(
+                    renew_key(r.id, r.expires_at, n) for r in rows for n in range(1, self.max_attempts + 1)
+                )
+                parents = await payments.parent_invoices({r.user_id for r in rows}) if self.client.requires_parent else {}
+
+            jobs = []
+            for row in rows:
+                attempt = self._next_attempt(row, done)
+                if attempt is None:
+                    stats["skipped"] += 1
+                    continue
+                if self.client.requires_parent and row.user_id not in parents:
+                    stats["no_parent"] += 1
+                    continue
+                if stats["charged"] + len(jobs) >= self.max_per_run:
+                    break
+                jobs.append(self._renew_one(sem, row, attempt, parents.get(row.user_id), deadline))
+
+            for outcome in await asyncio.gather(*jobs):
+                stats[outcome] += 1
+                if outcome in ("paid", "pending", "failed"):
+                    stats["charged"] += 1
+
+        if stats:
+            logger.info("renewals: %s", dict(stats))
+        return dict(stats)
+
+    def _next_attempt(self, row: Any, done: Dict[str, str]) -> Optional[int]:
+        """Номер следующей попытки для периода или None (уже оплачено/в процессе/попытки кончились)."""
+        for n in range(1, self.max_attempts + 1):
+            status = done.get(renew_key(row.id, row.expires_at, n))
+            if status is None:
+                return n
+            if status != "failed":
+                return None
+        return None
+
+    async def _renew_one(self, sem: asyncio.Semaphore, row: Any, attempt: int, parent: Optional[str], deadline: float) -> str:
+        async with sem:
+            if time.monotonic() >= deadline:
+                return "budget"
+            plan = settings.AUTO_RENEW_PLAN if row.is_trial else row.plan
+            key = renew_key(row.id, row.expires_at, attempt)
+
+            async with self.session_factory() as session:
+                amount = PaymentService(session)._price_for_plan(plan)
+                try:
+                    # InvId зависит от payments.id: до flush provider_invoice_id
+                    # временно держит ключ (он тоже уникален), в той же транзакции
+                    payment = await PaymentRepo(session).create(
+                        user_id=row.user_id,
+                        amount=amount,
+                        currency=settings.BASE_CURRENCY,
+                        plan=plan,
+                        provider=settings.PAYMENT_PROVIDER,
+                        provider_invoice_id=key,
+                        idempotency_key=key,
+                        status="pending",
+                    )
+                    payment.provider_invoice_id = str(renewal_invoice_id(payment.id))
+                    await session.commit()
+                except IntegrityError:
+                    # тот же ключ уже занят другим воркером/прогоном
+                    await session.rollback()
+                    return "duplicate"
+                payment_id = payment.id
+                inv_id = renewal_invoice_id(payment_id)
+
+            try:
+                result = await self.client.charge(
+                    invoice_id=inv_id,
+                    parent_invoice_id=parent,
+                    amount_rub=float(amount),
+                    description=f"Продление подписки {plan}",
+                )
+            except Exception as e:
+                # исход неизвестен: оставляем pending, чтобы не списать второй раз
+                logger.warning("renew sub=%s payment=%s: charge error %r", row.id, payment_id, e)
+                return "error"
+
+            await self._record(payment_id, inv_id, result)
+            return result.status
+
+    async def _record(self, payment_id: int, inv_id: int, result: ChargeResult) -> None:
+        async with self.session_factory() as session:
+            if result.status == "paid":
+                await self.apply_paid(session, inv_id)
+            elif result.status == "failed":
+                logger.info("renew payment=%s failed: %s", payment_id, result.detail)
+                await PaymentRepo(session).set_status(payment_id, "failed")
+                await session.commit()
+
+    # ---------- применение успешного списания ----------
+
+    @staticmethod
+    async def apply_paid(session, inv_id: int) -> bool:
+        """
+        Отмечает платёж автопродления (InvId = provider_invoice_id) оплаченным и
+        продлевает подписку от max(expires_at, now) вместе с доступом в канал/чат
+        (access_grants + индекс дедлайнов), иначе цикл дедлайнов кикнул бы
+        продлившегося по старому сроку. Идемпотентно: строка платежа берётся
+        FOR UPDATE, повторный вызов для paid ничего не делает.
+        False — это не платёж автопродления.
+        """
+        payment = await PaymentRepo(session).get_for_update_by_invoice(str(inv_id))
+        if payment is None or not (payment.idempotency_key or "").startswith(RENEW_PREFIX):
+            await session.rollback()
+            return False
+        payment_id = payment.id
+        if payment.status == "paid":
+            await session.rollback()
+            return True
+
+        sub_id = int(payment.idempotency_key[len(RENEW_PREFIX):].split(":", 1)[0])
+        sub = await session.get(Subscription, sub_id, with_for_update=True)
+        now = now_utc()
+        payment.status = "paid"
+        payment.paid_at = now
+        user = None
+        extended: List[int] = []
+        if sub is not None:
+            days = PaymentService(session)._days_for_plan(payment.plan)
+            sub.expires_at = max(sub.expires_at, now) + timedelta(days=days)
+            sub.plan = payment.plan
+            sub.is_trial = False
+            sub.status = "active"
+            try:
+                async with session.begin_nested():
+                    await ReminderRepo(session).schedule_expiry(
+                        sub, settings.REMINDERS_HOURS_BEFORE, churn_after_hours=settings.CHURN_SURVEY_AFTER_H,
+                    )
+            except Exception:
+                logger.exception("reminders schedule failed for sub=%s", sub_id)
+            user = await session.get(User, sub.user_id)
+            if user is not None:
+                access = AccessService(session, None, autocommit=False)
+                extended = await access.extend_access(user.tg_id, (CONTENT_CHANNEL_ID, CONTENT_CHAT_ID), sub.expires_at)
+        # платёж, подписка, доступ и напоминания — одной транзакцией
+        await session.commit()
+
+        if user is not None:
+            entitlements.invalidate(int(user.tg_id))
+            if extended:
+                try:
+                    await deadline_index.schedule_many((chat_id, user.tg_id, sub.expires_at) for chat_id in extended)
+                except Exception:
+                    # дедлайн в индексе старый: цикл сверится с БД и переставит его
+                    logger.exception("deadline index: schedule failed user=%s chats=%s", user.tg_id, extended)
+        logger.info("renew payment=%s paid -> sub=%s extended", payment_id, sub_id)
+        return True
@@ -0,0 +1,177 @@
+# app/services/retention_service.py
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import Table, delete, func, insert, literal_column, select, text
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.config import settings
+from app.db import SessionLocal
+from app.models.access_grant import AccessGrant
+from app.models.archive import ARCHIVES
+from app.models.consent_log import ConsentLog
+from app.models.payment import Payment
+from app.utils.dates import now_utc
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionPolicy(NamedTuple):
+    table: Table
+    archive: Table
+    days: int
+    # условие «строка устарела» для заданной отсечки
+    expired: Callable[[datetime], ColumnElement]
+    # колонки таблицы — naive UTC (access_grants пишется datetime.utcnow())
+    naive: bool = False
+
+
+def _access_grants_expired(cutoff: datetime) -> ColumnElement:
+    t = AccessGrant.__table__
+    # доступ истёк (и давно отозван) или, если его нет, истекла ссылка
+    return func.coalesce(t.c.access_expires_at, t.c.invite_expires_at, t.c.created_at) < cutoff
+
+
+def _payments_expired(cutoff: datetime) -> ColumnElement:
+    t = Payment.__table__
+    # брошенные счета и неуспешные списания; paid — бухгалтерия и parent InvId автопродления
+    return t.c.status.in_(("pending", "failed")) & (t.c.created_at < cutoff)
+
+
+def _consent_logs_expired(cutoff: datetime) -> ColumnElement:
+    return ConsentLog.__table__.c.created_at < cutoff
+
+
+def build_policies() -> List[RetentionPolicy]:
+    """Политики из settings.RETENTION_*_DAYS; 0 — политика выключена."""
+    candidates = [
+        (AccessGrant.__table__, settings.RETENTION_ACCESS_GRANTS_DAYS, _access_grants_expired, True),
+        (Payment.__table__, settings.RETENTION_PAYMENTS_DAYS, _payments_expired, False),
+        (ConsentLog.__table__, settings.RETENTION_CONSENT_LOGS_DAYS, _consent_logs_expired, False),
+    ]
+    return [
+        RetentionPolicy(table, ARCHIVES[table.name], days, expired, naive)
+        for table, days, expired, naive in candidates
+        if days > 0
+    ]
+
+
+class RetentionService:
+    """
+    Ретеншн горячих таблиц: строки старше политики переезжают в <таблица>_archive.
+
+    Каждый батч — одна транзакция и один запрос:
+        WITH moved AS (DELETE FROM t WHERE id IN (
+            SELECT id FROM t WHERE <устарело> AND id > :after ORDER BY id LIMIT :n
+            FOR UPDATE SKIP LOCKED) RETURNING *)
+        INSERT INTO t_archive SELECT * FROM moved
+    Keyset по id: батч не перечитывает уже пройденное, SKIP LOCKED не ждёт строк,
+    которые прямо сейчас обновляет бот. Между батчами — пауза, чтобы не давить
+    на WAL и реплику. report() — dry-run: сколько строк и байт уедет.
+    """
+
+    def __init__(
+        self,
+        *,
+        session_factory=SessionLocal,
+        policies: Optional[List[RetentionPolicy]] = None,
+        batch_size: Optional[int] = None,
+        max_batches: Optional[int] = None,
+        pause_s: Optional[float] = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.policies = policies if policies is not None else build_policies()
+        self.batch_size = batch_size or settings.RETENTION_BATCH_SIZE
+        self.max_batches = max_batches or settings.RETENTION_MAX_BATCHES
+        self.pause_s = pause_s if pause_s is not None else settings.RETENTION_PAUSE_MS / 1000
+
+    def _select(self, tables: Optional[Iterable[str]]) -> List[RetentionPolicy]:
+        if not tables:
+            return list(self.policies)
+        wanted = set(tables)
+        return [p for p in self.policies if p.table.name in wanted]
+
+    @staticmethod
+    def _cutoff(policy: RetentionPolicy, now: datetime) -> datetime:
+        cutoff = now - timedelta(days=policy.days)
+        return cutoff.replace(tzinfo=None) if policy.naive else cutoff
+
+    # ---------- dry-run ----------
+
+    async def report(self, tables: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        now = now_utc()
+        out = []
+        async with self.session_factory() as session:
+            is_pg = session.bind.dialect.name == "postgresql"
+            for policy in self._select(tables):
+                t = policy.table
+                cond = policy.expired(self._cutoff(policy, now))
+                row = {"table": t.name, "days": policy.days}
+                q = select(func.count(), func.min(t.c.id), func.max(t.c.id)).where(cond)
+                if is_pg:
+                    q = q.add_columns(func.coalesce(func.sum(func.pg_column_size(literal_column(t.name))), 0))
+                res = (await session.execute(q)).one()
+                row["eligible"] = int(res[0])
+                row["id_range"] = (res[1], res[2])
+                row["total"] = int((await session.execute(select(func.count()).select_from(t))).scalar())
+                if is_pg:
+                    row["eligible_bytes"] = int(res[3])
+                    sizes = (await session.execute(
+                        text("SELECT pg_total_relation_size(:t), pg_total_relation_size(:a)"),
+                        {"t": t.name, "a": policy.archive.name},
+                    )).one()
+                    row["table_bytes"], row["archive_bytes"] = int(sizes[0]), int(sizes[1])
+                out.append(row)
+        return out
+
+    # ---------- перенос ----------
+
+    async def run(self, tables: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        now = now_utc()
+        stats: Dict[str, int] = {}
+        for policy in self._select(tables):
+            moved = await self._archive_table(policy, self._cutoff(policy, now))
+            stats[policy.table.name] = moved
+        if any(stats.values()):
+            logger.info("retention: archived %s", stats)
+        return stats
+
+    async def _archive_table(self, policy: RetentionPolicy, cutoff: datetime) -> int:
+        total = 0
+        after = 0
+        for _ in range(self.max_batches):
+            async with self.session_factory() as session:
+                moved, last_id = await self._move_batch(session, policy, cutoff, after)
+                await session.commit()
+            total += moved
+            # неполный батч — всё устаревшее (кроме залоченного сейчас) уже перенесено
+            if last_id is None or moved < self.batch_size:
+                break
+            after = last_id
+            if self.pause_s:
+                await asyncio.sleep(self.pause_s)
+        return total
+
+    async def _move_batch(self, session, policy: RetentionPolicy, cutoff: datetime, after: int) -> Tuple[int, Optional[int]]:
+        src, dst = policy.table, policy.archive
+        ids = (
+            select(src.c.id)
+            .where(policy.expired(cutoff))
+            .where(src.c.id > after)
+            .order_by(src.c.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        moved = delete(src).where(src.c.id.in_(ids)).returning(*src.c).cte("moved")
+        names = [c.name for c in src.c]
+        stmt = (
+            insert(dst)
+            .from_select(names, select(*[moved.c[n] for n in names]))
+            .returning(dst.c.id)
+        )
+        moved_ids = (await session.execute(stmt)).scalars().all()
+        return len(moved_ids), (max(moved_ids) if moved_ids else None)
@@ -0,0 +1,86 @@
+# app/services/screen_cache.py
+from __future__ import annotations
+
+import functools
+import logging
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Tuple, TypeVar
+
+from aiogram.types import InlineKeyboardMarkup
+
+from app.config import settings
+from app.core.tg_session import PreparedMarkup
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., "Screen"])
+
+
+class Screen(NamedTuple):
+    text: str
+    kb: Optional[InlineKeyboardMarkup] = None
+
+
+def _catalog_signature() -> Tuple[Any, ...]:
+    # всё, из чего собираются тексты и кнопки тарифов; поменялось — экраны пересобираются
+    return (
+        settings.PLAN_PRICES_RUB,
+        getattr(settings, "TRIAL_PRICE", None),
+        getattr(settings, "OFFERTA_URL", None),
+        getattr(settings, "PRIVACY_URL", None),
+        getattr(settings, "SUPPORT_URL", None),
+    )
+
+
+class ScreenCache:
+    """
+    Готовые экраны (текст + неизменяемая клавиатура с уже сериализованным JSON)
+    по ключу (экран, аргументы): тарифы, согласие (plan, agreed), карточка, U18.
+
+    Экран собирается при первом запросе и дальше отдаётся как есть. Кэш целиком
+    сбрасывается, когда меняется каталог планов (цены / ссылки в settings) или
+    по invalidate().
+    """
+
+    def __init__(self, signature: Callable[[], Tuple[Any, ...]] = _catalog_signature, *, maxsize: int = 512) -> None:
+        self._signature_fn = signature
+        # plan в аргументах приходит из callback_data — мусорные значения не должны раздувать кэш
+        self.maxsize = maxsize
+        self._signature: Optional[Tuple[Any, ...]] = None
+        self._screens: Dict[Hashable, Screen] = {}
+
+    def invalidate(self) -> None:
+        self._screens = {}
+        self._signature = None
+
+    def get(self, key: Hashable, build: Callable[[], Screen]) -> Screen:
+        sig = self._signature_fn()
+        if sig != self._signature:
+            if self._signature is not None:
+                logger.info("screen cache: plan catalog changed, %d screens dropped", len(self._screens))
+            self._screens = {}
+            self._signature = sig
+        screen = self._screens.get(key)
+        if screen is None:
+            text, kb = build()
+            screen = Screen(text, PreparedMarkup.freeze(kb) if kb is not None else None)
+            if len(self._screens) < self.maxsize:
+                self._screens[key] = screen
+        return screen
+
+    def __len__(self) -> int:
+        return len(self._screens)
+
+
+screens = ScreenCache()
+
+
+def cached_screen(fn: F) -> F:
+    """Экран-билдер с хешируемыми аргументами -> один готовый Screen на набор аргументов."""
+
+    name = f"{fn.__module__}.{fn.__qualname__}"
+
+    @functools.wraps(fn)
+    def wrapper(*args: Hashable) -> Screen:
+        return screens.get((name, args), lambda: fn(*args))
+
+    return wrapper  # type: ignore[return-value]
@@ -0,0 +1,180 @@
+# app/services/settings_cache.py
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db import SessionLocal, engine
+from app.repositories.setting_repo import PENDING, SettingRepo
+
+logger = logging.getLogger(__name__)
+
+_TRUE = {"1", "true", "yes", "on", "да"}
+
+
+class SettingsCache:
+    """
+    Вся таблица settings в памяти процесса: цены, тексты, фичефлаги читаются в
+    горячих путях синхронно и без БД.
+
+    - start() грузит таблицу целиком и (на Postgres) слушает канал
+      SETTINGS_NOTIFY_CHANNEL на отдельном соединении. SettingRepo.set шлёт
+      pg_notify в своей транзакции — все процессы (бот, веб) видят изменение
+      сразу после commit;
+    - свой процесс применяет изменения после commit сессии, не дожидаясь NOTIFY
+      (и на SQLite, где NOTIFY нет);
+    - после реконнекта слушателя и раз в SETTINGS_RELOAD_S таблица
+      перечитывается целиком: NOTIFY, пришедший в момент разрыва, теряется.
+    Слушатель держит одно соединение пула всё время жизни процесса.
+    """
+
+    def __init__(
+        self,
+        *,
+        engine: AsyncEngine = engine,
+        session_factory=SessionLocal,
+        channel: str,
+        reload_s: float,
+    ) -> None:
+        self.engine = engine
+        self.session_factory = session_factory
+        self.channel = channel
+        self.reload_s = reload_s
+        self._values: Dict[str, str] = {}
+        self.loaded = False
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_settings(cls) -> "SettingsCache":
+        return cls(channel=settings.SETTINGS_NOTIFY_CHANNEL, reload_s=settings.SETTINGS_RELOAD_S)
+
+    # ---------- чтение ----------
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        return self._values.get(key, default)
+
+    def get_int(self, key: str, default: int = 0) -> int:
+        try:
+            return int(self._values[key])
+        except (KeyError, ValueError):
+            return default
+
+    def get_bool(self, key: str, default: bool = False) -> bool:
+        raw = self._values.get(key)
+        return default if raw is None else raw.strip().lower() in _TRUE
+
+    def apply(self, changes: Dict[str, str]) -> None:
+        self._values.update(changes)
+
+    # ---------- загрузка ----------
+
+    async def reload(self) -> int:
+        async with self.session_factory() as session:
+            values = await SettingRepo(session).all()
+        # подмена целиком: читатели не видят полузагруженную таблицу
+        self._values = values
+        self.loaded = True
+        return len(values)
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._stop.clear()
+        try:
+            n = await self.reload()
+            logger.info("settings cache: %s keys loaded", n)
+        except Exception:
+            # процесс стартует и без кэша: get() вернёт default, слушатель догрузит
+            logger.exception("settings cache: initial load failed")
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="settings-cache")
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        backoff = 1.0
+        while not self._stop.is_set():
+            if self.engine.dialect.name != "postgresql":
+                # без LISTEN/NOTIFY (SQLite в разработке) — только периодическая перезагрузка
+                await self._sleep(self.reload_s or None)
+                if not self._stop.is_set():
+                    await self._safe_reload()
+                continue
+            try:
+                async with self.engine.connect() as conn:
+                    lost = await self._listen(conn)
+                    backoff = 1.0
+                    while not self._stop.is_set() and not lost.is_set():
+                        await self._wait_any(lost, self.reload_s or None)
+                        if not lost.is_set() and not self._stop.is_set():
+                            await self._safe_reload()
+                    if lost.is_set():
+                        await conn.invalidate()
+            except Exception as e:
+                logger.warning("settings cache: listener failed: %r, retry in %.0fs", e, backoff)
+                await self._sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    async def _listen(self, conn: AsyncConnection) -> asyncio.Event:
+        raw = (await conn.get_raw_connection()).driver_connection
+        lost = asyncio.Event()
+        await raw.add_listener(self.channel, self._on_notify)
+        raw.add_termination_listener(lambda _c: lost.set())
+        # всё, что поменялось, пока слушателя не было
+        await self._safe_reload()
+        return lost
+
+    def _on_notify(self, _conn, _pid, _channel, payload: str) -> None:
+        try:
+            data = json.loads(payload)
+            self._values[data["k"]] = data["v"]
+        except Exception:
+            logger.warning("settings cache: bad notify payload %r", payload[:200])
+
+    async def _safe_reload(self) -> None:
+        try:
+            await self.reload()
+        except Exception as e:
+            logger.warning("settings cache: reload failed: %r", e)
+
+    async def _wait_any(self, other: asyncio.Event, timeout: Optional[float]) -> None:
+        waiters = [asyncio.ensure_future(self._stop.wait()), asyncio.ensure_future(other.wait())]
+        try:
+            await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for w in waiters:
+                w.cancel()
+
+    async def _sleep(self, timeout: Optional[float]) -> None:
+        try:
+            await asyncio.wait_for(self._stop.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+settings_cache = SettingsCache.from_settings()
+
+
+# ---------- свой процесс: изменения SettingRepo.set видны сразу после commit ----------
+
+@event.listens_for(Session, "after_commit")
+def _apply_on_commit(session: Session) -> None:
+    pending = session.info.pop(PENDING, None)
+    if pending:
+        settings_cache.apply(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_on_rollback(session: Session) -> None:
+    session.info.pop(PENDING, None)
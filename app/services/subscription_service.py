@@ -1,5 +1,8 @@
 # app/services/subscription_service.py
 from datetime import timedelta
+from app.config import settings
+from app.core.uow import commit_unless_uow
+from app.repositories.reminder_repo import ReminderRepo
 from app.repositories.subscription_repo import SubscriptionRepo
 from app.utils.dates import now_utc
 
@@ -24,10 +27,16 @@ class SubscriptionService:
         is_trial = (plan == "trial3_10")
         new_expires_at = now + timedelta(days=add_days)
 
-        return await self.subs.create_or_extend(
+        sub = await self.subs.create_or_extend(
             user_id=user_id,
             plan=plan,
             new_expires_at=new_expires_at,
             is_trial=is_trial,
             auto_renew=auto_renew,
         )
+        # напоминания об окончании: старые неотправленные заменяются новым расписанием
+        await ReminderRepo(self.subs.s).schedule_expiry(
+            sub, settings.REMINDERS_HOURS_BEFORE, churn_after_hours=settings.CHURN_SURVEY_AFTER_H,
+        )
+        await commit_unless_uow(self.subs.s)
+        return sub
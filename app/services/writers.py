@@ -0,0 +1,12 @@
+# app/services/writers.py
+# Фоновые батч-писатели (см. batch_writer.py). Стартуют лениво на первом submit(),
+# останавливаются (с дозаписью буфера) в app/main.py при shutdown.
+from app.models.churn_reason import ChurnReason
+from app.models.consent_log import ConsentLog
+from app.services.batch_writer import BatchWriter
+
+consent_writer = BatchWriter(ConsentLog.__table__, name="consent_logs", max_batch=200, flush_interval=1.0)
+# ответы на опрос оттока: волна истечений даёт волну кликов — пишем пачками
+churn_writer = BatchWriter(ChurnReason.__table__, name="churn_reasons", max_batch=500, flush_interval=2.0)
+
+ALL_WRITERS = (consent_writer, churn_writer)
@@ -7,5 +7,7 @@ TEXTS = {
     "payment_created": "Счет создан. Нажми Оплатить, чтобы продолжить.",
     "payment_success": "Оплата получена! Доступ выдан.",
     "reminder": "Подписка заканчивается. Продлить?",
+    "reminder_trial_end": "Пробный период скоро закончится. Продлить подписку?",
+    "reminder_sub_end": "Подписка скоро закончится. Продлить?",
     "expired": "Доступ временно закрыт. Нажми Продлить, чтобы вернуться.",
 }
@@ -5,6 +5,8 @@ from typing import Callable
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
 
+from app.core import db_stats
+
 log = logging.getLogger("http")
 
 SAFE_HEADERS = {"content-type", "user-agent", "x-request-id", "x-real-ip", "x-forwarded-for"}
@@ -37,18 +39,19 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         # Прокидываем request-id дальше
         request.state.request_id = rid
 
-        try:
-            response: Response = await call_next(request)
-            elapsed = (time.perf_counter() - start) * 1000
-            log.info("http_response", extra={
-                "rid": rid, "status": response.status_code, "ms": round(elapsed,2),
-                "path": path
-            })
-            response.headers["x-request-id"] = rid
-            return response
-        except Exception as e:
-            elapsed = (time.perf_counter() - start) * 1000
-            log.exception("http_error", extra={
-                "rid": rid, "path": path, "ms": round(elapsed,2)
-            })
-            raise
+        with db_stats.track(f"{method} {path}") as stats:
+            try:
+                response: Response = await call_next(request)
+                elapsed = (time.perf_counter() - start) * 1000
+                log.info("http_response", extra={
+                    "rid": rid, "status": response.status_code, "ms": round(elapsed,2),
+                    "path": path, **stats.as_log_extra()
+                })
+                response.headers["x-request-id"] = rid
+                return response
+            except Exception as e:
+                elapsed = (time.perf_counter() - start) * 1000
+                log.exception("http_error", extra={
+                    "rid": rid, "path": path, "ms": round(elapsed,2), **stats.as_log_extra()
+                })
+                raise
@@ -117,6 +117,19 @@ async def rk_result(request: Request):
         )
         return Response(debug_text, status_code=400, media_type="text/plain; charset=utf-8")
 
+    # итог повторного списания (InvId автопродлений — 2^32 + payments.id, renewal_invoice_id)
+    if inv_id.isdigit():
+        from app.db import SessionLocal
+        from app.services.renewal_service import RenewalService
+        try:
+            async with SessionLocal() as session:
+                if await RenewalService.apply_paid(session, int(inv_id)):
+                    log.info("rk_result_renewal rid=%s inv_id=%s", rid, inv_id)
+        except Exception:
+            log.exception("rk_result_renewal_failed rid=%s inv_id=%s", rid, inv_id)
+            # не отвечаем OK — Robokassa повторит ResultURL
+            return Response("renewal apply failed", status_code=500, media_type="text/plain")
+
     log.info("rk_result_ok rid=%s inv_id=%s", rid, inv_id)
     return Response(f"OK{inv_id}", media_type="text/plain")
 
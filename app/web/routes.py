@@ -2,11 +2,10 @@
 from __future__ import annotations
 
 import sys
-from fastapi import APIRouter, Depends, Form, Request
+from fastapi import APIRouter, Form, Request
 from fastapi.responses import HTMLResponse, JSONResponse
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_session
+from app.core.uow import UnitOfWork
 from app.services.payment_service import PaymentService
 
 # для диагностики пути модуля
@@ -50,23 +49,21 @@ async def fake_pay_page(invoice_id: str):
     )
 
 
+# Транзакция на запрос — UnitOfWork в теле ручки, а не yield-депенденси:
+# выход из yield-депенденси FastAPI выполняет уже после отправки ответа,
+# и упавший commit превратился бы в 200 для провайдера.
+
 # Подтверждение «фейковой оплаты» с формы выше
 @router.post("/payments/fake/confirm", response_class=HTMLResponse)
-async def fake_confirm(
-    invoice_id: str = Form(...),
-    session: AsyncSession = Depends(get_session),
-):
-    svc = PaymentService(session)
-    await svc.confirm_payment(invoice_id)
+async def fake_confirm(invoice_id: str = Form(...)):
+    async with UnitOfWork() as session:
+        await PaymentService(session).confirm_payment(invoice_id)
     return HTMLResponse("<h3>Оплата прошла. Подписка активирована/продлена.</h3>")
 
 
 # Унифицированный вебхук-приёмник (на будущее/отладку)
 @router.post("/payments/webhook")
-async def payments_webhook(
-    req: Request,
-    session: AsyncSession = Depends(get_session),
-):
+async def payments_webhook(req: Request):
     # Пытаемся прочитать JSON, если не получилось — пустой dict
     try:
         data = await req.json()
@@ -80,8 +77,8 @@ async def payments_webhook(
     status = str(data.get("status", "")).lower()
 
     if provider in {"fake", "robokassa"} and status == "paid" and invoice_id:
-        svc = PaymentService(session)
-        await svc.confirm_payment(str(invoice_id))
+        async with UnitOfWork() as session:
+            await PaymentService(session).confirm_payment(str(invoice_id))
         return JSONResponse({"ok": True})
 
     return JSONResponse({"ok": True})
@@ -12,6 +12,8 @@ from fastapi.responses import JSONResponse
 import uvicorn
 
 from app.config import settings
+from app.core.replica import replica
+from app.services.settings_cache import settings_cache
 from app.utils.logging import setup_json_logging
 from app.web.middleware_logging import LoggingMiddleware
 from app.web.errors import unhandled_exception_handler
@@ -42,6 +44,7 @@ def _safe(attr: str, default=""):
 @app.on_event("startup")
 async def on_startup():
     setup_json_logging()
+    await settings_cache.start()
 
     host = socket.gethostname()
     try:
@@ -70,6 +73,12 @@ async def on_startup():
     )
 
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    await settings_cache.stop()
+    await replica.close()
+
+
 @app.exception_handler(Exception)
 async def _unhandled(request, exc):
     return await unhandled_exception_handler(request, exc)
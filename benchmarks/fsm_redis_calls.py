@@ -0,0 +1,233 @@
+# benchmarks/fsm_redis_calls.py
+"""
+Сколько round trip-ов в Redis стоит один апдейт: RedisStorage vs CachedRedisStorage.
+
+Апдейты прогоняются через настоящий aiogram Dispatcher (FSMContextMiddleware +
+StateFilter), хендлеры повторяют U18-сценарий из app/handlers/age_verify.py:
+вход в AgeCheck.waiting_photo, текст вместо фото, фото (state.clear()), дальше
+обычные сообщения, которые проходят мимо фильтра AgeCheck.waiting_photo.
+
+Два порядка апдейтов:
+  burst       — все апдейты пользователя подряд, внутри l1_ttl: лучший случай для L1;
+  interleaved — пользователи вперемешку (round-robin), между апдейтами одного
+                пользователя --gap секунд виртуального времени (по умолчанию
+                больше l1_ttl): живой чат, где почти каждый апдейт — промах L1.
+Виртуальные часы подменяют time.monotonic в app.core.fsm_storage, реального
+ожидания нет.
+
+Запуск:
+    python benchmarks/fsm_redis_calls.py --users 500 --messages 10
+    python benchmarks/fsm_redis_calls.py --gap 1.0          # ответы быстрее l1_ttl
+    REDIS_DSN=redis://localhost:6379/15 python benchmarks/fsm_redis_calls.py   # на живом Redis
+
+Без REDIS_DSN используется in-memory заглушка, которая считает те же round trip-ы.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from aiogram import Bot, Dispatcher, F, Router  # noqa: E402
+from aiogram.filters import Command  # noqa: E402
+from aiogram.fsm.context import FSMContext  # noqa: E402
+from aiogram.fsm.state import State, StatesGroup  # noqa: E402
+from aiogram.fsm.storage.redis import RedisStorage  # noqa: E402
+from aiogram.types import Chat, Message, PhotoSize, Update, User  # noqa: E402
+from redis.asyncio import Redis  # noqa: E402
+from redis.asyncio.client import Pipeline  # noqa: E402
+
+import app.core.fsm_storage as fsm_storage  # noqa: E402
+from app.core.fsm_storage import CachedRedisStorage  # noqa: E402
+
+
+class AgeCheck(StatesGroup):
+    waiting_photo = State()
+
+
+# ---------- счётчики round trip-ов ----------
+
+class CountingPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True) -> List[Any]:
+        self.counter["calls"] += 1
+        return await super().execute(raise_on_error)
+
+
+class CountingRedis(Redis):
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.counter = {"calls": 0}
+
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        self.counter["calls"] += 1
+        return await super().execute_command(*args, **options)
+
+    def pipeline(self, transaction: bool = True, shard_hint: Any = None) -> Pipeline:
+        pipe = CountingPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+        pipe.counter = self.counter
+        return pipe
+
+
+class MemoryRedis:
+    """Минимум команд, нужных RedisStorage; каждый вызов — один round trip."""
+
+    def __init__(self) -> None:
+        self.kv: Dict[str, Any] = {}
+        self.counter = {"calls": 0}
+
+    async def get(self, key: str) -> Any:
+        self.counter["calls"] += 1
+        return self.kv.get(key)
+
+    async def set(self, key: str, value: Any, ex: Any = None) -> None:
+        self.counter["calls"] += 1
+        self.kv[key] = value.encode() if isinstance(value, str) else value
+
+    async def delete(self, *keys: str) -> None:
+        self.counter["calls"] += 1
+        for k in keys:
+            self.kv.pop(k, None)
+
+    def pipeline(self, transaction: bool = True) -> "MemoryPipeline":
+        return MemoryPipeline(self)
+
+    async def aclose(self, close_connection_pool: bool = True) -> None:
+        pass
+
+
+class MemoryPipeline:
+    def __init__(self, redis: MemoryRedis) -> None:
+        self.redis = redis
+        self.ops: List[Any] = []
+
+    async def __aenter__(self) -> "MemoryPipeline":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        pass
+
+    def get(self, key: str) -> None:
+        self.ops.append(("get", key))
+
+    async def execute(self) -> List[Any]:
+        self.redis.counter["calls"] += 1
+        return [self.redis.kv.get(key) for _, key in self.ops]
+
+
+# ---------- сценарий ----------
+
+def build_router() -> Router:
+    router = Router()
+
+    @router.message(Command("u18"))
+    async def u18(msg: Message, state: FSMContext) -> None:
+        await state.set_state(AgeCheck.waiting_photo)
+
+    @router.message(AgeCheck.waiting_photo, F.photo)
+    async def got_photo(msg: Message, state: FSMContext) -> None:
+        await state.clear()
+
+    @router.message(AgeCheck.waiting_photo)
+    async def need_photo(msg: Message, state: FSMContext) -> None:
+        pass
+
+    @router.message()
+    async def other(msg: Message) -> None:
+        pass
+
+    return router
+
+
+def make_updates(users: int, messages: int, *, interleaved: bool) -> List[Update]:
+    """Апдейты по пользователям подряд (burst) или по кругу: 1-й апдейт каждого, 2-й каждого, ..."""
+    per_user: List[List[Dict[str, Any]]] = []
+    for uid in range(1, users + 1):
+        user = User(id=uid, is_bot=False, first_name="u")
+        chat = Chat(id=uid, type="private")
+        script: List[Dict[str, Any]] = [{"text": "/u18"}, {"text": "не фото"},
+                                        {"photo": [PhotoSize(file_id="f", file_unique_id="f", width=1, height=1)]}]
+        script += [{"text": f"msg {i}"} for i in range(messages)]
+        per_user.append([{"chat": chat, "from_user": user, **extra} for extra in script])
+
+    if interleaved:
+        ordered = [step[i] for i in range(len(per_user[0])) for step in per_user]
+    else:
+        ordered = [fields for script in per_user for fields in script]
+    now = datetime.now()
+    return [
+        Update(update_id=n, message=Message(message_id=n, date=now, **fields))
+        for n, fields in enumerate(ordered, 1)
+    ]
+
+
+class VirtualClock:
+    """Подменяет time.monotonic в fsm_storage: TTL L1 истекает без реального sleep."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self._saved = fsm_storage.time
+
+    def __enter__(self) -> "VirtualClock":
+        fsm_storage.time = SimpleNamespace(monotonic=lambda: self.now)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        fsm_storage.time = self._saved
+
+
+async def run(storage_name: str, scenario: str, args: argparse.Namespace) -> None:
+    dsn = os.getenv("REDIS_DSN")
+    redis: Any = CountingRedis.from_url(dsn) if dsn else MemoryRedis()
+    if storage_name == "redis":
+        storage = RedisStorage(redis)
+    else:
+        storage = CachedRedisStorage(redis, l1_ttl=args.l1_ttl, state_ttl=86400, data_ttl=86400)
+
+    dp = Dispatcher(storage=storage)
+    dp.include_router(build_router())
+    bot = Bot("42:TEST")
+    interleaved = scenario == "interleaved"
+    updates = make_updates(args.users, args.messages, interleaved=interleaved)
+    # по кругу: между апдейтами одного пользователя проходит ровно --gap
+    step = args.gap / args.users if interleaved else 0.0
+
+    if dsn:
+        await redis.flushdb()
+        redis.counter["calls"] = 0
+    started = time.perf_counter()
+    with VirtualClock() as clock:
+        for upd in updates:
+            await dp.feed_update(bot, upd)
+            clock.now += step
+    elapsed = time.perf_counter() - started
+
+    calls = redis.counter["calls"]
+    print(f"{scenario:>11} {storage_name:>7}: updates={len(updates)} redis_round_trips={calls} "
+          f"per_update={calls / len(updates):.2f} wall={elapsed:.2f}s")
+    await bot.session.close()
+    await storage.close()
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=500)
+    ap.add_argument("--messages", type=int, default=10, help="обычных сообщений на пользователя после U18-сценария")
+    ap.add_argument("--l1-ttl", type=float, default=2.0)
+    ap.add_argument("--gap", type=float, default=5.0,
+                    help="interleaved: секунд между апдейтами одного пользователя (виртуальное время)")
+    args = ap.parse_args()
+    for scenario in ("burst", "interleaved"):
+        for name in ("redis", "cached"):
+            await run(name, scenario, args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
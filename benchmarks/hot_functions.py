@@ -0,0 +1,434 @@
+# benchmarks/hot_functions.py
+"""
+Микробенчмарки горячих функций с сохранённым baseline.
+
+Что меряется (время одного вызова):
+    sig_parts.*          app/web/robokassa_routes._sig_parts
+    payment_link         app/pay/robokassa.build_payment_link
+    price.*              все копии разбора PLAN_PRICES_RUB: handlers/pay._price_for_plan,
+                         PaymentService._price_for_plan, keyboards/payments._price_map,
+                         handlers/age_verify.price_u18
+    invoice_re.*         app/middlewares/logging._extract_invoice_from_event (INVOICE_RE)
+    safe_get.*           app/middlewares/logging._safe_get
+    read_payload.*       app/web/robokassa_routes._read_payload на form / JSON / query
+    kb.*, screen.*       клавиатуры и тексты app/handlers/pay.py, в т.ч. готовые экраны
+    create_invoice       PaymentService.create_invoice на SQLite-файле во временной папке
+                         воркера (удаляется по его завершении)
+
+Всё работает офлайн: сеть, Postgres и Redis не нужны (SQLite через aiosqlite из
+extras dev: pip install -e .[dev]), окружение фиксируется ниже, чтобы цифры были
+сравнимы между прогонами. Схема как у pyperf: калибровка числа
+вызовов на прогон (не короче --min-time), --runs прогонов в каждом из --processes
+свежих процессов; с baseline сравнивается лучший прогон (min), медиана и разброс — для глаз.
+Кейсы, вышедшие за порог, перемеряются в --recheck новых процессах (замеры
+добавляются к уже снятым): единичный выброс соседа по VM гейт не роняет.
+
+Запуск:
+    python benchmarks/hot_functions.py                 # сравнить с benchmarks/baselines/hot_functions.json
+    python benchmarks/hot_functions.py -k price        # только кейсы с "price" в имени
+    python benchmarks/hot_functions.py --save          # перезаписать baseline (после осознанного изменения)
+    python benchmarks/hot_functions.py --threshold 0.1     # строже, на выделенной машине
+    python benchmarks/hot_functions.py --recheck 0         # без перемера кейсов за порогом
+
+Код выхода 1 — есть кейс медленнее baseline больше чем на --threshold и после
+перемера. Baseline годится только для машины, где он снят: на новой машине
+(в т.ч. в CI) сначала --save на исходном дереве, потом сравнение. Если baseline
+снят в другом окружении (Python, CPU), скрипт предупреждает и не падает.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+BASELINE = ROOT / "benchmarks" / "baselines" / "hot_functions.json"
+
+# фиксированное окружение: app.config читает его при импорте. Глобальный engine
+# app.db в кейсах не используется — create_invoice идёт в свой файл (_worker)
+_ENV = {
+    "BOT_TOKEN": "1:bench",
+    "DATABASE_URL": "sqlite+aiosqlite://",
+    "REDIS_DSN": "",
+    "REPLICA_DATABASE_URL": "",
+    "CONTENT_CHANNEL_ID": "-1001",
+    "CONTENT_CHAT_ID": "-1002",
+    "PLAN_PRICES_RUB": "m1:990,m3:2690,m6:4990",
+    "TRIAL_PRICE": "10",
+    "PUBLIC_BASE_URL": "https://bench.example.com",
+    "ROBOKASSA_LOGIN": "bench-shop",
+    "ROBOKASSA_PASSWORD1": "p1-bench",
+    "ROBOKASSA_PASSWORD2": "p2-bench",
+    "ROBOKASSA_TEST": "1",
+    "PAYMENT_PROVIDER": "robokassa",
+    "SQL_ECHO": "0",
+    "DB_SLOW_QUERY_MS": "0",
+    "LOG_LEVEL": "WARNING",
+}
+os.environ.update(_ENV)
+
+import logging  # noqa: E402
+
+logging.disable(logging.WARNING)
+
+from aiogram.types import CallbackQuery, Chat, Message, User  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+import app.models  # noqa: E402,F401
+from app.handlers import age_verify, pay  # noqa: E402
+from app.keyboards import payments as payment_kbs  # noqa: E402
+from app.middlewares.logging import _extract_invoice_from_event, _safe_get  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.pay.robokassa import build_payment_link  # noqa: E402
+from app.services.payment_service import PaymentService  # noqa: E402
+from app.web.robokassa_routes import _read_payload, _sig_parts  # noqa: E402
+
+
+class Case(NamedTuple):
+    name: str
+    fn: Callable[[], Any]
+    is_async: bool = False
+    min_time: float = 0.0  # своя длительность прогона (запросы к БД шумнее чистого CPU)
+
+
+# ---------- входные данные ----------
+
+_INVOICE = "3f2b9c1e8a7d4b6f9e0c1a2b3c4d5e6f"
+_NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+_USER = User(id=123456789, is_bot=False, first_name="Bench")
+_CHAT = Chat(id=123456789, type="private")
+_MSG_INVOICE = Message(message_id=1, date=_NOW, chat=_CHAT, from_user=_USER, text=f"/fake_paid {_INVOICE}")
+_MSG_PLAIN = Message(message_id=2, date=_NOW, chat=_CHAT, from_user=_USER, text="Бесплатные материалы")
+_CALLBACK = CallbackQuery(
+    id="1", from_user=_USER, chat_instance="ci", data=f"check:{_INVOICE}",
+    message=_MSG_PLAIN,
+)
+_SHP = {"Shp_user": "123456789", "Shp_plan": "m3", "Shp_src": "bot"}
+_RK_FIELDS = {"OutSum": "2690.00", "InvId": "100500", "SignatureValue": "0" * 64, **_SHP}
+
+
+def _request(method: str, *, body: bytes = b"", content_type: str = "", query: str = "") -> Callable[[], Request]:
+    """Фабрика свежего starlette Request (тело читается один раз) — как его видит роут."""
+    headers = [(b"host", b"bench")]
+    if content_type:
+        headers += [(b"content-type", content_type.encode()), (b"content-length", str(len(body)).encode())]
+    scope = {
+        "type": "http", "method": method, "path": "/robokassa/result", "raw_path": b"/robokassa/result",
+        "query_string": query.encode(), "headers": headers, "http_version": "1.1",
+        "scheme": "https", "server": ("bench", 443), "client": ("127.0.0.1", 1), "root_path": "",
+    }
+
+    def make() -> Request:
+        sent = False
+
+        async def receive() -> Dict[str, Any]:
+            nonlocal sent
+            if sent:
+                return {"type": "http.disconnect"}
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        return Request(scope, receive)
+
+    return make
+
+
+_FORM_BODY = "&".join(f"{k}={v}" for k, v in _RK_FIELDS.items()).encode()
+_JSON_BODY = json.dumps(_RK_FIELDS).encode()
+_req_form = _request("POST", body=_FORM_BODY, content_type="application/x-www-form-urlencoded")
+_req_json = _request("POST", body=_JSON_BODY, content_type="application/json")
+_req_query = _request("GET", query=_FORM_BODY.decode())
+
+
+# ---------- create_invoice на in-process БД ----------
+
+class _InvoiceBench:
+    def __init__(self, url: str) -> None:
+        self.engine = create_async_engine(url)
+        self.sf = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.n = 0
+
+    async def setup(self) -> None:
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        # пользователи уже есть: меряем горячий путь (счёт существующему юзеру)
+        for tg in range(1000, 1100):
+            async with self.sf() as s:
+                await PaymentService(s).create_invoice(tg, "m1")
+
+    async def __call__(self) -> None:
+        self.n += 1
+        async with self.sf() as s:
+            await PaymentService(s).create_invoice(1000 + self.n % 100, "m3")
+
+
+def _cases(invoice_bench: _InvoiceBench) -> List[Case]:
+    svc = PaymentService(None)
+    return [
+        Case("sig_parts.no_shp", lambda: _sig_parts("bench-shop", "990.00", "100500", "p2-bench", {})),
+        Case("sig_parts.shp3", lambda: _sig_parts("bench-shop", "990.00", "100500", "p2-bench", _SHP)),
+        Case("payment_link", lambda: build_payment_link(
+            amount_rub=2690.0, inv_id=100500, user_id=123456789,
+            description="Подписка на 3 месяца", shp_fields={"Shp_plan": "m3"},
+        )),
+        Case("price.pay_handler", lambda: pay._price_for_plan("m3")),
+        Case("price.pay_handler_trial", lambda: pay._price_for_plan("trial3_10")),
+        Case("price.payment_service", lambda: svc._price_for_plan("m3")),
+        Case("price.keyboards_map", payment_kbs._price_map),
+        Case("price.age_verify_u18", lambda: age_verify.price_u18("m3_u18")),
+        Case("invoice_re.message_hit", lambda: _extract_invoice_from_event(_MSG_INVOICE)),
+        Case("invoice_re.callback_hit", lambda: _extract_invoice_from_event(_CALLBACK)),
+        Case("invoice_re.miss", lambda: _extract_invoice_from_event(_MSG_PLAIN)),
+        Case("safe_get.direct", lambda: _safe_get(_MSG_PLAIN, "from_user.id")),
+        Case("safe_get.nested", lambda: _safe_get(_CALLBACK, "message.chat.id")),
+        Case("safe_get.miss", lambda: _safe_get(_CALLBACK, "message.reply_to_message.from_user.id", "-")),
+        Case("read_payload.form", lambda: _read_payload(_req_form()), True),
+        Case("read_payload.json", lambda: _read_payload(_req_json()), True),
+        Case("read_payload.query", lambda: _read_payload(_req_query()), True),
+        Case("kb.tariffs", pay.tariffs_kb),
+        Case("kb.consent", lambda: pay.consent_kb("m3", True)),
+        Case("kb.pay", lambda: pay.pay_kb("https://auth.robokassa.ru/Merchant/Index.aspx?InvId=100500")),
+        Case("kb.card_text", lambda: pay.card_text("m3")),
+        Case("kb.payments_plans", payment_kbs.plans_keyboard),
+        Case("screen.tariffs_cached", pay.tariffs_screen),
+        Case("screen.consent_cached", lambda: pay.consent_screen("m3", False)),
+        Case("create_invoice", invoice_bench, True, min_time=0.5),
+    ]
+
+
+# ---------- раннер ----------
+
+def _timer(case: Case, loop: asyncio.AbstractEventLoop) -> Callable[[int], float]:
+    fn = case.fn
+    if case.is_async:
+        async def batch(n: int) -> float:
+            t0 = time.perf_counter()
+            for _ in range(n):
+                await fn()
+            return time.perf_counter() - t0
+
+        return lambda n: loop.run_until_complete(batch(n))
+
+    def run(n: int) -> float:
+        t0 = time.perf_counter()
+        for _ in range(n):
+            fn()
+        return time.perf_counter() - t0
+
+    return run
+
+
+def _measure(case: Case, loop: asyncio.AbstractEventLoop, *, runs: int, min_time: float) -> Dict[str, Any]:
+    timed = _timer(case, loop)
+    timed(1)  # прогрев: импорты, кэши, первый запрос к БД
+    loops = 1
+    while True:
+        elapsed = timed(loops)
+        if elapsed >= min_time or loops >= 1 << 24:
+            break
+        # оценка по прошлому прогону, но не больше x10 за шаг
+        loops = min(loops * 10, max(loops * 2, int(loops * min_time / max(elapsed, 1e-9) * 1.1)))
+    samples: List[float] = []
+    gc_was = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(runs):
+            samples.append(timed(loops) / loops * 1e9)
+    finally:
+        if gc_was:
+            gc.enable()
+    return {"loops": loops, "samples_ns": samples}
+
+
+def _summary(loops: int, samples: List[float]) -> Dict[str, Any]:
+    return {
+        "min_ns": round(min(samples), 1),
+        "median_ns": round(statistics.median(samples), 1),
+        "stdev_ns": round(statistics.stdev(samples), 1) if len(samples) > 1 else 0.0,
+        "loops": loops,
+        "runs": len(samples),
+    }
+
+
+def _fmt_ns(ns: float) -> str:
+    if ns >= 1e6:
+        return f"{ns / 1e6:.2f} ms"
+    if ns >= 1e3:
+        return f"{ns / 1e3:.2f} us"
+    return f"{ns:.0f} ns"
+
+
+def _compare(cur: Dict[str, Any], base: Optional[Dict[str, Any]], threshold: float) -> tuple[str, bool]:
+    if base is None:
+        return "new", False
+    # сравниваем лучший прогон: он меньше всего зашумлён соседями по машине
+    ratio = cur["min_ns"] / base["min_ns"]
+    if ratio > 1 + threshold:
+        return f"x{ratio:.2f} SLOWER", True
+    if ratio < 1 / (1 + threshold):
+        return f"x{1 / ratio:.2f} faster", False
+    return f"x{ratio:.2f} ~", False
+
+
+def _worker(pattern: str, names: Sequence[str], runs: int, min_time: float) -> Dict[str, Any]:
+    """Один процесс-воркер: кейсы по очереди, сырые замеры. names — точные имена (перемер)."""
+    loop = asyncio.new_event_loop()
+    out: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory(prefix="bench-hot-") as tmp:
+        invoice_bench = _InvoiceBench(f"sqlite+aiosqlite:///{tmp}/bench.db")
+        try:
+            for case in _cases(invoice_bench):
+                if pattern and pattern not in case.name:
+                    continue
+                if names and case.name not in names:
+                    continue
+                if case.fn is invoice_bench and invoice_bench.n == 0:
+                    loop.run_until_complete(invoice_bench.setup())
+                out[case.name] = _measure(case, loop, runs=runs, min_time=max(min_time, case.min_time))
+        finally:
+            loop.run_until_complete(invoice_bench.engine.dispose())
+            loop.close()
+    return out
+
+
+def _spawn(
+    args: argparse.Namespace,
+    processes: int,
+    *,
+    names: Sequence[str] = (),
+    merged: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Замеры в нескольких свежих процессах, как у pyperf: раскладка памяти, хеш-сиды
+    и частота CPU у процессов разные, и разброс между ними больше, чем внутри одного.
+    Сырые замеры добавляются в merged (перемер дополняет первый проход).
+    """
+    merged = {} if merged is None else merged
+    for i in range(processes):
+        cmd = [
+            sys.executable, str(Path(__file__).resolve()), "--worker",
+            "--runs", str(args.runs), "--min-time", str(args.min_time),
+        ]
+        if args.pattern:
+            cmd += ["-k", args.pattern]
+        for name in names:
+            cmd += ["--case", name]
+        proc = subprocess.run(cmd, capture_output=True, text=True, check=False)
+        if proc.returncode != 0:
+            sys.stderr.write(proc.stderr)
+            raise SystemExit(f"worker {i + 1}/{processes} failed")
+        for name, r in json.loads(proc.stdout).items():
+            acc = merged.setdefault(name, {"loops": r["loops"], "samples_ns": []})
+            acc["samples_ns"] += r["samples_ns"]
+        print(f"worker {i + 1}/{processes} done", file=sys.stderr)
+    return merged
+
+
+def _host() -> Dict[str, str]:
+    """Окружение, в котором снят baseline: с другим замеры несравнимы."""
+    cpu = platform.processor()
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            cpu = next((line.split(":", 1)[1].strip() for line in f if line.startswith("model name")), cpu)
+    except OSError:
+        pass
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "cpu": cpu,
+    }
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-k", dest="pattern", default="", help="подстрока имени кейса")
+    ap.add_argument("--processes", type=int, default=3, help="процессов-воркеров")
+    ap.add_argument("--runs", type=int, default=5, help="прогонов на кейс в каждом процессе")
+    ap.add_argument("--min-time", type=float, default=0.05, help="минимальная длительность одного прогона, с")
+    ap.add_argument("--baseline", type=Path, default=BASELINE)
+    ap.add_argument("--save", action="store_true", help="записать результаты как новый baseline")
+    # на общих VM дрейф между запусками доходит до ±30%; на выделенной машине можно --threshold 0.1
+    ap.add_argument("--threshold", type=float, default=0.35, help="допустимое замедление (0.35 = +35%%)")
+    ap.add_argument("--recheck", type=int, default=3, help="свежих процессов на перемер кейсов за порогом (0 — без)")
+    ap.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    ap.add_argument("--case", dest="cases", action="append", default=[], help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.worker:
+        json.dump(_worker(args.pattern, args.cases, args.runs, args.min_time), sys.stdout)
+        return 0
+
+    base: Dict[str, Any] = {}
+    base_meta: Dict[str, Any] = {}
+    if args.baseline.exists():
+        saved = json.loads(args.baseline.read_text(encoding="utf-8"))
+        base, base_meta = saved.get("results", {}), saved.get("meta", {})
+    host = _host()
+    foreign = {k: (base_meta.get(k), v) for k, v in host.items() if base and base_meta.get(k) != v}
+
+    raw = _spawn(args, args.processes)
+    if not args.save and args.recheck:
+        suspects = [
+            name for name, r in raw.items()
+            if _compare(_summary(r["loops"], r["samples_ns"]), base.get(name), args.threshold)[1]
+        ]
+        if suspects:
+            print(f"rechecking {len(suspects)} case(s) over +{args.threshold:.0%}: {', '.join(suspects)}", file=sys.stderr)
+            _spawn(args, args.recheck, names=suspects, merged=raw)
+    results = {name: _summary(r["loops"], r["samples_ns"]) for name, r in raw.items()}
+    regressions: List[str] = []
+    print(f"{'case':<28} {'min':>10} {'median':>10} {'± stdev':>10} {'baseline':>10}  vs baseline")
+    for name, r in results.items():
+        b = base.get(name)
+        verdict, slow = _compare(r, b, args.threshold)
+        if slow:
+            regressions.append(name)
+        print(
+            f"{name:<28} {_fmt_ns(r['min_ns']):>10} {_fmt_ns(r['median_ns']):>10} {_fmt_ns(r['stdev_ns']):>10} "
+            f"{_fmt_ns(b['min_ns']) if b else '-':>10}  {verdict}"
+        )
+
+    if args.save:
+        if args.pattern and args.baseline.exists():
+            # частичный прогон обновляет только свои кейсы
+            merged = dict(base)
+            merged.update(results)
+            results = merged
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "meta": {**host, "saved_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")},
+            "results": dict(sorted(results.items())),
+        }
+        args.baseline.write_text(json.dumps(payload, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"baseline saved: {args.baseline.relative_to(ROOT) if args.baseline.is_relative_to(ROOT) else args.baseline}")
+        return 0
+
+    if foreign:
+        diff = ", ".join(f"{k}: {old!r} -> {new!r}" for k, (old, new) in foreign.items())
+        print(f"\nbaseline was saved in another environment ({diff}); "
+              "run --save on this machine before comparing, results are informational")
+        return 0
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over +{args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+# benchmarks/read_models.py
+"""
+Гидратация ORM-сущностей vs slotted read-модели (app/repositories/read_models.py).
+
+Для каждого горячего чтения (истёкшие доступы, активные подписки, каталог
+материалов) N строк читаются двумя способами:
+    orm   — select(Model) -> scalars().all(), как было;
+    view  — select_view(View, Model) -> rows_as(View, ...), как сейчас.
+Меряется время (лучший из --repeat прогонов), пик памяти во время выборки и
+память, которую удерживает результат (tracemalloc).
+
+По умолчанию — SQLite в памяти через aiosqlite (extras dev: pip install -e .[dev]).
+
+Запуск:
+    python benchmarks/read_models.py                       # 100k строк, SQLite в памяти
+    python benchmarks/read_models.py --rows 20000 --repeat 5
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/read_models.py   # на живой БД (создаёт и дропает таблицы!)
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import insert, select  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+import app.models  # noqa: E402,F401
+from app.models.access_grant import AccessGrant  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.models.material import Material  # noqa: E402
+from app.models.subscription import Subscription  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.repositories.read_models import (  # noqa: E402
+    ExpiredAccess,
+    MaterialItem,
+    SubscriptionView,
+    rows_as,
+    select_view,
+)
+
+TABLES = [User.__table__, Subscription.__table__, AccessGrant.__table__, Material.__table__]
+
+
+async def _seed(sf, rows: int) -> None:
+    now = datetime.now(timezone.utc)
+    naive = now.replace(tzinfo=None)
+    chunk = 5000
+    async with sf() as s:
+        for lo in range(0, rows, chunk):
+            ids = range(lo + 1, min(lo + chunk, rows) + 1)
+            await s.execute(insert(User), [{"id": i, "tg_id": i} for i in ids])
+            await s.execute(insert(Subscription), [
+                {"user_id": i, "plan": "m1", "started_at": now, "expires_at": now + timedelta(days=i % 30),
+                 "status": "active", "is_trial": False, "auto_renew": True}
+                for i in ids
+            ])
+            await s.execute(insert(AccessGrant), [
+                {"tg_user_id": i, "chat_id": -100, "invite_link": f"https://t.me/+{i:012d}",
+                 "invite_expires_at": naive, "used": True, "access_expires_at": naive - timedelta(hours=1),
+                 "created_at": naive, "updated_at": naive}
+                for i in ids
+            ])
+            await s.execute(insert(Material), [
+                {"title": f"Материал {i}", "description": "описание " * 5, "payload": f"https://example.com/{i}"}
+                for i in ids
+            ])
+        await s.commit()
+
+
+def _cases() -> Dict[str, Tuple[Any, Any]]:
+    cutoff = datetime.utcnow()
+    return {
+        "expired_accesses": (
+            select(AccessGrant).where(AccessGrant.access_expires_at < cutoff),
+            (ExpiredAccess, select_view(ExpiredAccess, AccessGrant).where(AccessGrant.access_expires_at < cutoff)),
+        ),
+        "subscriptions": (
+            select(Subscription).where(Subscription.status == "active"),
+            (SubscriptionView, select_view(SubscriptionView, Subscription).where(Subscription.status == "active")),
+        ),
+        "materials": (
+            select(Material).order_by(Material.created_at.desc()),
+            (MaterialItem, select_view(MaterialItem, Material).order_by(Material.created_at.desc())),
+        ),
+    }
+
+
+async def _measure(sf, load: Callable[[Any], Awaitable[List[Any]]], repeat: int) -> Dict[str, float]:
+    best = float("inf")
+    n = 0
+    for _ in range(repeat):
+        async with sf() as s:
+            gc.collect()
+            t0 = time.perf_counter()
+            res = await load(s)
+            best = min(best, time.perf_counter() - t0)
+            n = len(res)
+            del res
+
+    # память — отдельным прогоном: tracemalloc сам замедляет выполнение в разы
+    async with sf() as s:
+        gc.collect()
+        tracemalloc.start()
+        base, _ = tracemalloc.get_traced_memory()
+        res = await load(s)
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del res
+    return {"rows": n, "ms": best * 1000, "peak_mb": (peak - base) / 2**20, "retained_mb": (retained - base) / 2**20}
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    url = os.getenv("BENCH_DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+    engine = create_async_engine(url, echo=False)
+    sf = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda c: Base.metadata.drop_all(c, tables=TABLES[::-1]))
+        await conn.run_sync(lambda c: Base.metadata.create_all(c, tables=TABLES))
+    await _seed(sf, args.rows)
+
+    print(f"{'case':<18} {'mode':<5} {'rows':>7} {'ms':>9} {'peak MB':>9} {'kept MB':>9}")
+    try:
+        for name, (orm_q, (view, view_q)) in _cases().items():
+            async def orm(s, q=orm_q):
+                return (await s.execute(q)).scalars().all()
+
+            async def slim(s, q=view_q, v=view):
+                return rows_as(v, await s.execute(q))
+
+            a = await _measure(sf, orm, args.repeat)
+            b = await _measure(sf, slim, args.repeat)
+            for mode, r in (("orm", a), ("view", b)):
+                print(f"{name:<18} {mode:<5} {r['rows']:>7} {r['ms']:>9.1f} {r['peak_mb']:>9.1f} {r['retained_mb']:>9.1f}")
+            print(f"{'':<18} x{a['ms'] / b['ms']:.1f} faster, x{a['retained_mb'] / max(b['retained_mb'], 1e-9):.1f} less memory kept")
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(lambda c: Base.metadata.drop_all(c, tables=TABLES[::-1]))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
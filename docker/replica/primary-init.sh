@@ -0,0 +1,18 @@
+#!/usr/bin/env bash
+# Роль и pg_hba для streaming-репликации. Запускается initdb-хуком на пустом томе;
+# на существующем томе — вручную:
+#   docker compose exec db bash /docker-entrypoint-initdb.d/10-replication.sh
+set -e
+
+psql -v ON_ERROR_STOP=1 --username "${POSTGRES_USER:-app}" --dbname "${POSTGRES_DB:-app}" <<'SQL'
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'replicator') THEN
+        CREATE ROLE replicator WITH REPLICATION LOGIN PASSWORD 'replicator';
+    END IF;
+END $$;
+SQL
+
+HBA="${PGDATA:-/var/lib/postgresql/data}/pg_hba.conf"
+grep -q "replication replicator" "$HBA" || echo "host replication replicator all scram-sha-256" >> "$HBA"
+psql --username "${POSTGRES_USER:-app}" --dbname "${POSTGRES_DB:-app}" -c "SELECT pg_reload_conf()"
@@ -0,0 +1,18 @@
+#!/usr/bin/env bash
+# Hot standby: при пустом томе — pg_basebackup с primary (-R пишет standby.signal
+# и primary_conninfo), дальше обычный postgres.
+set -e
+
+PGDATA="${PGDATA:-/var/lib/postgresql/data}"
+
+if [ ! -s "$PGDATA/PG_VERSION" ]; then
+    until pg_basebackup -h "${PRIMARY_HOST:-db}" -U replicator -D "$PGDATA" -R -X stream; do
+        echo "replica: primary not ready, retrying"
+        rm -rf "${PGDATA:?}"/*
+        sleep 2
+    done
+    chown -R postgres:postgres "$PGDATA"
+    chmod 700 "$PGDATA"
+fi
+
+exec gosu postgres postgres -c hot_standby=on